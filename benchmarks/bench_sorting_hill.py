@@ -0,0 +1,291 @@
+"""
+Бенчмарки горячих путей SortingHill.
+
+Замеряются:
+- пропускная способность handle_event (событий в секунду), в том числе с журналом событий;
+- задержка check_event по каждому типу события при росте числа путей и очереди вагонов;
+- время полной смены с оператором и репортёром;
+- время окончания смены, когда на каждом пути стоит поезд с вагонами.
+
+Между прогонами каждого случая замеряется короткий калибровочный цикл на чистом Python,
+и его лучшее время сохраняется в метрике. При сравнении с эталоном метрика приводится
+к скорости машины в момент замера эталона по отношению калибровочных времён, поэтому гейт
+ловит замедление кода, а не разницу между машинами или колебания нагрузки общей машины.
+Метрика без записи в эталоне считается регрессией: новый или переименованный случай
+добавляется в эталон вместе с кодом. Если сравнение нашло регрессии, бенчмарки
+перезапускаются (--confirm раз), и для каждой метрики берётся лучший из прогонов:
+короткий всплеск нагрузки не роняет гейт, а настоящее замедление воспроизводится.
+
+Результаты пишутся в JSON и сравниваются с сохранённым эталоном:
+    python -m benchmarks.bench_sorting_hill --output bench.json --baseline benchmarks/baseline.json
+Обновить эталон:
+    python -m benchmarks.bench_sorting_hill --output benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Sequence
+
+from sorting_handler.sorting_operator import SortingOperatorImpl
+from sorting_handler.sorting_reporter import SortingReporterImpl
+from sorting_hill.consts import EventType, LocoType, WagonType
+from sorting_hill.journal import EventJournal
+from sorting_hill.simulation import run_shift
+from sorting_hill.sink import NullSink
+from sorting_hill.sorting_hill import SortingHill
+
+PATHS_SIZES = (2, 15, 1_000, 10_000)
+WAGONS_SIZES = (1_000, 1_000_000)
+QUICK_PATHS_SIZES = (2, 15, 1_000)
+QUICK_WAGONS_SIZES = (1_000, 10_000)
+
+CHECKED_EVENTS = (EventType.PreparePath, EventType.LocoArrived, EventType.TrainPlanned, EventType.TrainReady)
+
+HIGHER_IS_BETTER = 'higher'
+LOWER_IS_BETTER = 'lower'
+
+
+def _calibration_loop() -> None:
+    table = {number: number for number in range(1024)}
+    total = 0
+    for number in range(30_000):
+        total += table[number & 1023]
+
+
+def _timed(func: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def _best_of(func: Callable[[], None], repeat: int = 5) -> tuple[float, float]:
+    """Лучшее время из нескольких прогонов и лучшее время калибровочного цикла между ними, в секундах"""
+    best = calibration = float('inf')
+    for _ in range(repeat):
+        calibration = min(calibration, _timed(_calibration_loop))
+        best = min(best, _timed(func))
+    return best, calibration
+
+
+def _metric(value: float, unit: str, better: str, calibration: float) -> dict:
+    return {'value': value, 'unit': unit, 'better': better, 'calibration': calibration}
+
+
+def build_yard(number_of_paths: int, number_of_wagons: int) -> SortingHill:
+    """
+    Построить загруженную горку: все пути подготовлены, на каждом недозаполненный поезд.
+
+    :param number_of_paths: Количество путей.
+    :param number_of_wagons: Длина очереди вагонов.
+    :return: Горка без хэндлеров.
+    """
+    hill = SortingHill(number_of_paths)
+    wagon_types = list(WagonType)
+    for path in range(1, number_of_paths + 1):
+        train = f'{path:04d}{wagon_types[path % len(wagon_types)]}'
+        hill.assigned_paths[path] = train
+        hill.trains_formed[train] = [LocoType.Diesel64, f'{path:08d}/{wagon_types[path % len(wagon_types)]}']
+    hill.train_index = number_of_paths
+    hill.wagon_buffer.extend(f'{number:08d}/{wagon_types[number % 4]}' for number in range(number_of_wagons))
+    return hill
+
+
+def bench_handle_event(number_of_events: int) -> dict[str, dict]:
+    """Пропускная способность handle_event(WagonArrived) без хэндлеров"""
+    def run() -> None:
+        hill = SortingHill(2)
+        hill.wagon_buffer.extend(['00000001/Г'] * number_of_events)
+        for _ in range(number_of_events):
+            hill.handle_event(EventType.WagonArrived)
+
+    elapsed, calibration = _best_of(run, repeat=3)
+    return {
+        'handle_event.wagon_arrived': _metric(number_of_events / elapsed, 'events/s', HIGHER_IS_BETTER, calibration),
+    }
+
+
+def bench_journaled_wagons(number_of_events: int) -> dict[str, dict]:
+    """
+    Пропускная способность handle_event(WagonArrived) с журналом событий без fsync.
+
+    Замеряется только запись в журнал: fsync зависит от диска и в гейт не входит.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for compact in (False, True):
+
+            def run(compact: bool = compact) -> None:
+                hill = SortingHill(2, compact=compact)
+                hill.wagon_buffer.extend(['00000001/Г'] * number_of_events)
+                with EventJournal(os.path.join(directory, 'shift.journal'), fsync=False) as journal:
+                    hill.attach_journal(journal)
+                    for _ in range(number_of_events):
+                        hill.handle_event(EventType.WagonArrived)
+
+            elapsed, calibration = _best_of(run, repeat=3)
+            name = 'handle_event.wagon_arrived.journal' + ('.compact' if compact else '')
+            results[name] = _metric(number_of_events / elapsed, 'events/s', HIGHER_IS_BETTER, calibration)
+    return results
+
+
+def bench_check_event(paths_sizes: Sequence[int], wagons_sizes: Sequence[int], calls: int) -> dict[str, dict]:
+    """Задержка check_event по типам событий на загруженной горке"""
+    results = {}
+    for number_of_wagons in wagons_sizes:
+        for number_of_paths in paths_sizes:
+            hill = build_yard(number_of_paths, number_of_wagons)
+            for event in CHECKED_EVENTS:
+
+                def run(check_event: Callable = hill.check_event, event: EventType = event) -> None:
+                    for _ in range(calls):
+                        check_event(event)
+
+                elapsed, calibration = _best_of(run, repeat=7)
+                name = f'check_event.{event.name}.paths={number_of_paths}.wagons={number_of_wagons}'
+                results[name] = _metric(elapsed / calls, 's/call', LOWER_IS_BETTER, calibration)
+    return results
+
+
+def bench_full_shift(number_of_paths: int, number_of_wagons: int) -> dict[str, dict]:
+    """Время полной смены с оператором и репортёром"""
+    def run() -> None:
+        run_shift(seed=0, number_of_paths=number_of_paths, number_of_wagons=number_of_wagons)
+
+    elapsed, calibration = _best_of(run, repeat=3)
+    return {
+        f'full_shift.paths={number_of_paths}.wagons={number_of_wagons}': _metric(
+            elapsed, 's', LOWER_IS_BETTER, calibration,
+        ),
+    }
+
+
+def bench_shift_end(paths_sizes: Sequence[int], repeat: int = 9) -> dict[str, dict]:
+    """Время ShiftEnded с оператором и репортёром, когда на каждом пути стоит поезд с вагонами"""
+    results = {}
+    for number_of_paths in paths_sizes:
+        # На малых горках окончание смены занимает десятки микросекунд, поэтому замер идёт по нескольким горкам
+        yards = max(1, 2_000 // number_of_paths)
+        best = calibration = float('inf')
+        for _ in range(repeat):
+            hills = [build_yard(number_of_paths, 0) for _ in range(yards)]
+            for hill in hills:
+                hill.register_handler(SortingOperatorImpl)
+                hill.register_handler(SortingReporterImpl)
+                hill.sink = NullSink()
+
+            def run(hills: list[SortingHill] = hills) -> None:
+                for hill in hills:
+                    hill.handle_event(EventType.ShiftEnded)
+
+            calibration = min(calibration, _timed(_calibration_loop))
+            best = min(best, _timed(run) / yards)
+        results[f'shift_end.paths={number_of_paths}'] = _metric(best, 's', LOWER_IS_BETTER, calibration)
+    return results
+
+
+def run_benchmarks(quick: bool = False) -> dict[str, dict]:
+    """
+    Прогнать все бенчмарки.
+
+    :param quick: Сокращённые размеры для быстрой проверки.
+    :return: Метрики по именам.
+    """
+    paths_sizes = QUICK_PATHS_SIZES if quick else PATHS_SIZES
+    wagons_sizes = QUICK_WAGONS_SIZES if quick else WAGONS_SIZES
+
+    results = {}
+    results.update(bench_handle_event(10_000 if quick else 200_000))
+    results.update(bench_journaled_wagons(10_000 if quick else 200_000))
+    results.update(bench_check_event(paths_sizes, wagons_sizes, calls=1_000 if quick else 20_000))
+    results.update(bench_full_shift(15, 1_000 if quick else 4_096))
+    results.update(bench_shift_end(paths_sizes))
+    return results
+
+
+def _normalized(metric: dict) -> float:
+    """Метрика в единицах калибровочного цикла, меньше - лучше"""
+    if metric['better'] == HIGHER_IS_BETTER:
+        return -metric['value'] * metric['calibration']
+    return metric['value'] / metric['calibration']
+
+
+def best_of_runs(first: dict[str, dict], second: dict[str, dict]) -> dict[str, dict]:
+    """
+    Объединить два прогона, оставив для каждой метрики лучший результат с поправкой на калибровку.
+
+    :param first: Метрики первого прогона.
+    :param second: Метрики второго прогона.
+    :return: Лучшие метрики по именам.
+    """
+    return {name: min(metric, second.get(name, metric), key=_normalized) for name, metric in first.items()}
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    """
+    Сравнить результаты с эталоном.
+
+    :param results: Текущие метрики.
+    :param baseline: Эталонные метрики.
+    :param tolerance: Допустимое ухудшение, доля (0.2 - на 20%).
+    :return: Описания регрессий, включая метрики без записи в эталоне.
+    """
+    regressions = []
+    for name, metric in results.items():
+        reference = baseline.get(name)
+        if not reference or not reference['value']:
+            regressions.append(f'{name}: нет записи в эталоне')
+            continue
+        # Во сколько раз машина медленнее, чем при замере эталона; без калибровки - абсолютное сравнение
+        speed = 1.0
+        if reference.get('calibration') and metric.get('calibration'):
+            speed = metric['calibration'] / reference['calibration']
+        expected = reference['value'] / speed if metric['better'] == HIGHER_IS_BETTER else reference['value'] * speed
+        ratio = metric['value'] / expected
+        worse = ratio < 1 - tolerance if metric['better'] == HIGHER_IS_BETTER else ratio > 1 + tolerance
+        if worse:
+            regressions.append(f'{name}: {expected:.4g} -> {metric["value"]:.4g} {metric["unit"]}')
+    return regressions
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Точка входа бенчмарков"""
+    parser = argparse.ArgumentParser(description='Бенчмарки SortingHill')
+    parser.add_argument('--output', default='bench.json', help='файл для результатов в формате JSON')
+    parser.add_argument('--baseline', default=None, help='эталонные результаты для сравнения')
+    parser.add_argument('--tolerance', type=float, default=0.3, help='допустимое ухудшение, доля')
+    parser.add_argument('--quick', action='store_true', help='сокращённые размеры')
+    parser.add_argument('--confirm', type=int, default=2, help='сколько раз перезапустить бенчмарки при регрессии')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(quick=args.quick)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)['metrics']
+        for _ in range(args.confirm):
+            if not compare(results, baseline, args.tolerance):
+                break
+            results = best_of_runs(results, run_benchmarks(quick=args.quick))
+
+    report = {'python': platform.python_version(), 'quick': args.quick, 'metrics': results}
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+
+    for name, metric in results.items():
+        print(f'{name:70s} {metric["value"]:12.4g} {metric["unit"]}')
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f'Регрессия: {regression}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import typing
+from abc import ABC, abstractmethod
+
+if typing.TYPE_CHECKING:
+    from sorting_hill.sorting_hill import SortingHill
+
+
+class AsyncSortingHandler(ABC):
+    """
+    Асинхронный интерфейс хэндлера, параллельный SortingHandler.
+
+    Методы вызываются в порядке событий, но после того, как событие уже применено к горке,
+    поэтому к моменту вызова состояние горки может уйти вперёд. Подходит для хэндлеров,
+    ограниченных вводом-выводом (например, репортёров, пишущих на диск).
+    """
+
+    @abstractmethod
+    def __init__(self, sorting_hill: 'SortingHill') -> None:
+        """Инициализация хэндлера"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def handle_wagon(self, wagon_info: str) -> None:
+        """
+        Обработчик поступающих вагонов.
+
+        :param wagon_info: Строка с информацией о вагоне в формате НОМЕР/Т(ип)
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def handle_locomotive(self, locomotive: str) -> None:
+        """
+        Обработчик поступающих локомотивов.
+
+        :param locomotive: Модель локомотива в формате МОДЕЛЬ-ЧислоВагоновМакс
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def prepare_path(self) -> None:
+        """Запрос на подготовку пути"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def allocate_path_for_train(self) -> None:
+        """Запрос на размещение поезда на пути"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def send_train(self) -> None:
+        """Запрос на отправку готового поезда"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def start_shift(self) -> None:
+        """Начало смены"""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def end_shift(self) -> None:
+        """Окончание смены"""
+        raise NotImplementedError
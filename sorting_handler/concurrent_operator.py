@@ -0,0 +1,124 @@
+from collections.abc import Sequence
+from contextlib import ExitStack
+
+from sorting_handler.sorting_operator import SortingOperatorImpl
+
+
+class ConcurrentSortingOperatorImpl(SortingOperatorImpl):
+    """
+    Оператор для ConcurrentSortingHill: несколько экземпляров работают из разных потоков.
+
+    Поезд для вагона выбирается под короткой блокировкой состояния, а прицепка выполняется
+    под блокировкой пути этого поезда с повторной проверкой выбора. Если другой поток успел
+    заполнить или переименовать поезд, выбор повторяется. Редкие структурные операции
+    (пути, планирование, локомотивы, отправка) выполняются под блокировкой состояния целиком.
+    """
+
+    def handle_wagon(self, wagon_info: str) -> str:
+        """
+        Поставить вагон в поезд того же типа, либо в поезд без типа.
+
+        :param wagon_info: Строка с информацией о вагоне в формате НОМЕР/Т(ип)
+        :return: Номер поезда, в который попал вагон.
+        :raises RuntimeError: Если нет путей или подходящего поезда.
+        """
+        hill = self.sorting_hill
+        wagon_type = wagon_info.rpartition('/')[2]
+        while True:
+            with hill.state_lock:
+                if not hill.assigned_paths:
+                    raise RuntimeError(f'no path for wagon {wagon_info}')
+                train = self._select_train(wagon_type)
+                path = hill.path_of(train) if train is not None else None
+            if train is None:
+                self._reject_wagon(wagon_info)
+
+            with hill.path_lock(path):
+                content = hill.trains_formed.get(train)
+                if hill.assigned_paths.get(path) != train or not content:
+                    continue
+                if not content.free_slots:
+                    continue
+                return self._place_wagon(train, wagon_type, wagon_info)
+
+    def _release_path(self) -> str | None:
+        hill = self.sorting_hill
+        with hill.state_lock:
+            train = self._blocked_train()
+            if train is None:
+                return None
+            path = hill.path_of(train)
+
+        # Блокировка пути берётся до блокировки состояния, как при прицепке; выбор проверяется повторно
+        with hill.path_lock(path), hill.state_lock:
+            if hill.assigned_paths.get(path) != train or self._blocked_train() is None:
+                return None
+            hill.trains_formed.depart(train)
+            del hill.assigned_paths[path]
+            return train
+
+    def _place_wagon(self, train: str, wagon_type: str, wagon_info: str) -> str:
+        hill = self.sorting_hill
+        if train[-1].isdigit():
+            typed_train = f'{train}{wagon_type}'
+            with hill.state_lock:
+                path = hill.path_of(train)
+                hill.trains_formed[typed_train] = hill.trains_formed.pop(train)
+                hill.assigned_paths[path] = typed_train
+            train = typed_train
+        hill.trains_formed[train].append(wagon_info)
+        return train
+
+    def handle_locomotive(self, locomotive: str) -> str:
+        with self.sorting_hill.state_lock:
+            return super().handle_locomotive(locomotive)
+
+    def prepare_path(self) -> int:
+        with self.sorting_hill.state_lock:
+            return super().prepare_path()
+
+    def allocate_path_for_train(self) -> dict[int, str]:
+        with self.sorting_hill.state_lock:
+            return super().allocate_path_for_train()
+
+    def send_train(self) -> str:
+        """
+        Отправить готовый поезд и освободить его путь.
+
+        :return: Номер отправленного поезда.
+        :raises RuntimeError: Если готовых поездов нет.
+        """
+        hill = self.sorting_hill
+        while True:
+            with hill.state_lock:
+                train = hill.trains_formed.next_ready(buffer_drained=not hill.wagon_buffer)
+                if train is None:
+                    raise RuntimeError('no train ready')
+                path = hill.path_of(train)
+
+            with hill.path_lock(path), hill.state_lock:
+                if hill.assigned_paths.get(path) != train or train not in hill.trains_formed:
+                    continue
+                hill.trains_formed.depart(train)
+                del hill.assigned_paths[path]
+                return train
+
+    def send_trains(self, trains: Sequence[str]) -> list[str]:
+        """
+        Отправить пакет готовых поездов под блокировками их путей.
+
+        Блокировки путей берутся по возрастанию номера пути, затем блокировка состояния,
+        поэтому пакетная отправка не взаимоблокируется с поштучной прицепкой и отправкой.
+
+        :param trains: Номера поездов в порядке отправки.
+        :return: Номера отправленных поездов.
+        :raises RuntimeError: Если поезд из пакета не готов к отправке (пакет не отправляется).
+        """
+        hill = self.sorting_hill
+        with hill.state_lock:
+            paths = sorted({path for path in map(hill.path_of, trains) if path is not None})
+        with ExitStack() as stack:
+            for path in paths:
+                stack.enter_context(hill.path_lock(path))
+            with hill.state_lock:
+                return super().send_trains(trains)
@@ -1,5 +1,6 @@
 import typing
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
 
 if typing.TYPE_CHECKING:
     from sorting_hill.sorting_hill import SortingHill
@@ -23,6 +24,28 @@ class SortingHandler(ABC):
         """
         raise NotImplementedError
 
+    def handle_wagons(self, wagons: Sequence[str]) -> list[str]:
+        """
+        Пакетный обработчик поступающих вагонов.
+
+        Вагоны обрабатываются по порядку; обработка останавливается на первом вагоне,
+        который не удалось разместить. По умолчанию вызывает handle_wagon для каждого вагона,
+        хэндлеры могут переопределить метод, чтобы обработать пакет за один проход.
+
+        :param wagons: Строки с информацией о вагонах в порядке поступления.
+        :return: Номера поездов для обработанных вагонов (короче wagons, если обработка остановилась).
+        :raises RuntimeError: Если не удалось разместить даже первый вагон.
+        """
+        trains = []
+        for wagon_info in wagons:
+            try:
+                trains.append(self.handle_wagon(wagon_info))
+            except RuntimeError:
+                if not trains:
+                    raise
+                break
+        return trains
+
     @abstractmethod
     def handle_locomotive(self, locomotive: str) -> str:
         """
@@ -51,6 +74,29 @@ class SortingHandler(ABC):
         """
         raise NotImplementedError
 
+    def wants_train(self) -> bool:
+        """
+        Нужен ли хэндлеру новый поезд.
+
+        Горка допускает TrainPlanned, только если новый поезд нужен всем хэндлерам,
+        переопределившим метод. По умолчанию поезд нужен всегда.
+
+        :return: True, если allocate_path_for_train можно вызывать.
+        """
+        return True
+
+    def accepts_wagon(self, wagon_info: str) -> bool:
+        """
+        Может ли хэндлер принять вагон.
+
+        Горка допускает WagonArrived, только если головной вагон очереди принимают все хэндлеры,
+        переопределившие метод. По умолчанию вагон принимается всегда.
+
+        :param wagon_info: Строка с информацией о головном вагоне в формате НОМЕР/Т(ип)
+        :return: True, если handle_wagon можно вызывать для этого вагона.
+        """
+        return True
+
     @abstractmethod
     def send_train(self) -> str:
         """
@@ -60,6 +106,18 @@ class SortingHandler(ABC):
         """
         raise NotImplementedError
 
+    def send_trains(self, trains: Sequence[str]) -> list[str]:
+        """
+        Пакетная отправка поездов в конце смены.
+
+        По умолчанию вызывает send_train по разу на каждый поезд пакета,
+        хэндлеры могут переопределить метод, чтобы отправить пакет за один проход.
+
+        :param trains: Номера поездов с вагонами, оставшихся на путях.
+        :return: Номера отправленных поездов.
+        """
+        return [self.send_train() for _ in trains]
+
     @abstractmethod
     def start_shift(self) -> None:
         """Начало смены"""
@@ -0,0 +1,223 @@
+from sorting_handler.sorting_operator import SortingOperatorImpl
+from sorting_hill.consts import WagonType
+from sorting_hill.locomotives import LOCO_SPECS, loco_capacity
+from sorting_hill.mutations import (
+    LocoAttached,
+    Mutation,
+    PathFreed,
+    TrainRenamed,
+    TrainSent,
+    WagonAttached,
+)
+
+_MEAN_CAPACITY = sum(spec.capacity for spec in LOCO_SPECS.values()) / len(LOCO_SPECS)
+
+
+class PlanningOperatorImpl(SortingOperatorImpl):
+    """
+    Оператор, планирующий поезда по вагонам, ожидающим в голове очереди.
+
+    Ведёт инкрементальное состояние упаковки вагонов в поезда:
+    - спрос: число вагонов каждого типа в окне из window первых вагонов очереди;
+      окно сдвигается на снятый вагон и дочитывается по одному вагону, а не пересчитывается;
+    - предложение: свободные места в поездах каждого типа и вместимость поездов с локомотивом,
+      зарезервированных под тип, но ещё без вагонов (по потоку изменений горки).
+
+    Решения принимаются за время, не зависящее от длины очереди и числа путей:
+    - новый поезд планируется под тип с наибольшим непокрытым спросом, а без такого
+      спроса путь не занимается: wants_train() возвращает False, и горка не допускает TrainPlanned;
+    - прибывший локомотив получает поезд, зарезервированный под тип, спрос которого
+      ближе всего к вместимости локомотива;
+    - вагон без открытого поезда своего типа ставится в поезд, зарезервированный под его тип,
+      иначе в поезд без типа, вместимость которого ближе всего к непокрытому спросу.
+    """
+
+    window = 256
+
+    def __init__(self, sorting_hill, window: int | None = None) -> None:
+        """
+        Инициализация хэндлера.
+
+        :param sorting_hill: Сортировочная горка.
+        :param window: Сколько первых вагонов очереди учитывать при планировании.
+        """
+        super().__init__(sorting_hill)
+        if window is not None:
+            self.window = window
+        self._demand: dict[str, int] = dict.fromkeys(WagonType, 0)
+        self._seen = 0
+        self._supply: dict[str, int] = dict.fromkeys(WagonType, 0)
+        self._ready_supply: dict[str, int] = dict.fromkeys(WagonType, 0)
+        self._waiting: dict[str, dict[str, None]] = {wagon_type: {} for wagon_type in WagonType}
+        self._ready: dict[str, dict[str, None]] = {wagon_type: {} for wagon_type in WagonType}
+        self._reserved: dict[str, str] = {}
+        self._typed: dict[str, str] = {}
+        self._capacity: dict[str, int] = {}
+        sorting_hill.subscribe(self._track)
+
+    def _sync(self) -> None:
+        """
+        Дочитать окно спроса до window вагонов.
+
+        Длина очереди не запрашивается (у текстового манифеста это проход по файлу):
+        окно дочитывается по индексу, пока очередь не кончится.
+        """
+        wagon_buffer = self.sorting_hill.wagon_buffer
+        if self._seen and not wagon_buffer:
+            # Очередь очищена в обход хэндлера: окно читается заново
+            self._demand = dict.fromkeys(WagonType, 0)
+            self._seen = 0
+        while self._seen < self.window:
+            try:
+                wagon_info = wagon_buffer[self._seen]
+            except IndexError:
+                return
+            wagon_type = wagon_info.rpartition('/')[2]
+            self._demand[wagon_type] = self._demand.get(wagon_type, 0) + 1
+            self._seen += 1
+
+    def _uncovered(self, wagon_type: str) -> int:
+        return self._demand.get(wagon_type, 0) - self._supply[wagon_type] - self._ready_supply[wagon_type]
+
+    def handle_wagon(self, wagon_info: str) -> str:
+        train = super().handle_wagon(wagon_info)
+        # Снятый вагон - голова окна; очередь ещё не сдвинута, поэтому окно не дочитывается
+        if self._seen:
+            self._seen -= 1
+            self._demand[wagon_info.rpartition('/')[2]] -= 1
+        return train
+
+    def _select_train(self, wagon_type: str) -> str | None:
+        open_trains = self.sorting_hill.trains_formed.open_trains.get(wagon_type)
+        if open_trains:
+            return next(iter(open_trains))
+        reserved = self._ready.get(wagon_type)
+        if reserved:
+            return next(iter(reserved))
+
+        need = self._uncovered(wagon_type)
+        trains_formed = self.sorting_hill.trains_formed
+        best_train, best_fit = None, None
+        for ready in self._ready.values():
+            if ready:
+                train = next(iter(ready))
+                fit = abs(trains_formed[train].capacity - need)
+                if best_fit is None or fit < best_fit:
+                    best_train, best_fit = train, fit
+        return best_train or super()._select_train(wagon_type)
+
+    def handle_locomotive(self, locomotive: str) -> str:
+        """
+        Прицепить локомотив к поезду, зарезервированному под тип с наиболее подходящим спросом.
+
+        :param locomotive: Модель локомотива в формате МОДЕЛЬ-ЧислоВагоновМакс
+        :return: Номер поезда, в который попал локомотив.
+        :raises RuntimeError: Если нет пустого состава.
+        """
+        self._sync()
+        capacity = loco_capacity(locomotive)
+        best_train, best_fit = None, None
+        for wagon_type, waiting in self._waiting.items():
+            if waiting:
+                fit = abs(self._uncovered(wagon_type) - capacity)
+                if best_fit is None or fit < best_fit:
+                    best_train, best_fit = next(iter(waiting)), fit
+        if best_train is None:
+            return super().handle_locomotive(locomotive)
+        self.sorting_hill.trains_formed[best_train].append(locomotive)
+        return best_train
+
+    def _planned_type(self) -> str | None:
+        """Тип вагонов с наибольшим непокрытым спросом, либо None, если спрос покрыт"""
+        self._sync()
+        best_type, best_gap = None, 0.0
+        for wagon_type, waiting in self._waiting.items():
+            gap = self._uncovered(wagon_type) - len(waiting) * _MEAN_CAPACITY
+            if gap > best_gap:
+                best_type, best_gap = wagon_type, gap
+        return best_type
+
+    def wants_train(self) -> bool:
+        """
+        Новый поезд нужен, только если есть непокрытый спрос.
+
+        :return: True, если есть тип вагонов, спрос которого не покрыт поездами.
+        """
+        return self._planned_type() is not None
+
+    def allocate_path_for_train(self) -> dict[int, str]:
+        """
+        Запланировать поезд под тип вагонов с наибольшим непокрытым спросом.
+
+        :return: Словарь, в котором ключом выступает номер пути, а значением номер поезда.
+        :raises RuntimeError: Если спрос покрыт уже сформированными поездами или нет пути.
+        """
+        best_type = self._planned_type()
+        if best_type is None:
+            raise RuntimeError('no demand for a new train')
+
+        allocated = super().allocate_path_for_train()
+        train = next(iter(allocated.values()))
+        self._reserved[train] = best_type
+        self._waiting[best_type][train] = None
+        return allocated
+
+    def _track(self, mutation: Mutation) -> None:
+        """Вести предложение по потоку изменений горки"""
+        if isinstance(mutation, WagonAttached):
+            train = mutation.train
+            wagon_type = self._typed.get(train)
+            if wagon_type is not None:
+                self._supply[wagon_type] -= 1
+                return
+            wagon_type = mutation.wagon_info.rpartition('/')[2]
+            self._typed[train] = wagon_type
+            capacity = self._capacity.get(train, 0)
+            self._supply[wagon_type] += capacity - 1
+            reserved = self._reserved.pop(train, None)
+            if reserved is not None and train in self._ready[reserved]:
+                del self._ready[reserved][train]
+                self._ready_supply[reserved] -= capacity
+        elif isinstance(mutation, LocoAttached):
+            capacity = loco_capacity(mutation.loco)
+            self._capacity[mutation.train] = capacity
+            reserved = self._reserved.get(mutation.train)
+            if reserved is not None:
+                self._waiting[reserved].pop(mutation.train, None)
+                self._ready[reserved][mutation.train] = None
+                self._ready_supply[reserved] += capacity
+        elif isinstance(mutation, TrainRenamed):
+            self._rename(mutation.old_train, mutation.new_train)
+        elif isinstance(mutation, TrainSent):
+            wagon_type = self._typed.pop(mutation.train, None)
+            capacity = self._capacity.pop(mutation.train, 0)
+            if wagon_type is not None:
+                self._supply[wagon_type] -= capacity - mutation.wagons
+        elif isinstance(mutation, PathFreed) and mutation.train is not None:
+            self._forget(mutation.train)
+
+    def _rename(self, old_train: str, new_train: str) -> None:
+        for state in (self._typed, self._capacity, self._reserved):
+            if old_train in state:
+                state[new_train] = state.pop(old_train)
+        reserved = self._reserved.get(new_train)
+        if reserved is not None:
+            for index in (self._waiting[reserved], self._ready[reserved]):
+                if old_train in index:
+                    del index[old_train]
+                    index[new_train] = None
+
+    def _forget(self, train: str) -> None:
+        capacity = self._capacity.pop(train, 0)
+        reserved = self._reserved.pop(train, None)
+        if reserved is not None:
+            self._waiting[reserved].pop(train, None)
+            if train in self._ready[reserved]:
+                del self._ready[reserved][train]
+                self._ready_supply[reserved] -= capacity
+        self._typed.pop(train, None)
+
+    def start_shift(self) -> None:
+        """Начало смены: окно спроса читается заново"""
+        self._demand = dict.fromkeys(WagonType, 0)
+        self._seen = 0
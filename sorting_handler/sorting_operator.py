@@ -1,5 +1,221 @@
+import typing
+from collections.abc import Sequence
+
 from sorting_handler.interface import SortingHandler
 
+
 class SortingOperatorImpl(SortingHandler):
-    # TODO: Реализуйте здесь все методы интерфейса SortingHandler
-    pass
+    """
+    Оператор горки: готовит пути, формирует и отправляет поезда.
+
+    Если головной вагон некуда поставить и горка заблокирована (все пути заняты поездами
+    других типов с вагонами, а готовых поездов нет), оператор отправляет недозаполненный поезд,
+    чтобы освободить путь: иначе очередь вагонов не сдвинулась бы до конца смены.
+    """
+
+    def __init__(self, sorting_hill) -> None:
+        """Инициализация хэндлера"""
+        self.sorting_hill = sorting_hill
+
+    def handle_wagon(self, wagon_info: str) -> str:
+        """
+        Поставить вагон в поезд того же типа, либо в поезд без типа.
+
+        Поезд без типа получает тип по первому вагону и переименовывается (0001 -> 0001Г).
+
+        :param wagon_info: Строка с информацией о вагоне в формате НОМЕР/Т(ип)
+        :return: Номер поезда, в который попал вагон.
+        :raises RuntimeError: Если нет путей или подходящего поезда.
+        """
+        hill = self.sorting_hill
+        if not hill.assigned_paths:
+            raise RuntimeError(f'no path for wagon {wagon_info}')
+
+        wagon_type = wagon_info.rpartition('/')[2]
+        train = self._select_train(wagon_type)
+        if train is None:
+            self._reject_wagon(wagon_info)
+        return self._place_wagon(train, wagon_type, wagon_info)
+
+    def accepts_wagon(self, wagon_info: str) -> bool:
+        """
+        Вагон принимается, если для него есть поезд, либо если горка заблокирована:
+        тогда handle_wagon отправит недозаполненный поезд и освободит путь.
+
+        :param wagon_info: Строка с информацией о вагоне в формате НОМЕР/Т(ип)
+        :return: True, если handle_wagon сдвинет смену.
+        """
+        if not self.sorting_hill.assigned_paths:
+            return False
+        wagon_type = wagon_info.rpartition('/')[2]
+        return self._select_train(wagon_type) is not None or self._blocked_train() is not None
+
+    def _reject_wagon(self, wagon_info: str) -> typing.NoReturn:
+        """
+        Отказать в размещении вагона, при блокировке горки освободив путь.
+
+        :param wagon_info: Строка с информацией о вагоне в формате НОМЕР/Т(ип)
+        :raises RuntimeError: Всегда; вагон остаётся в очереди до следующей команды.
+        """
+        released = self._release_path()
+        if released is None:
+            raise RuntimeError(f'no train for wagon {wagon_info}')
+        raise RuntimeError(f'no train for wagon {wagon_info}, train {released} sent to free a path')
+
+    def _blocked_train(self) -> str | None:
+        """
+        Поезд, который нужно отправить недозаполненным, чтобы горка не заблокировалась.
+
+        Горка заблокирована, если нет ни свободного или подготовленного пути, ни поезда
+        без локомотива или без типа, ни готового поезда: тогда ни одна команда, кроме отправки
+        недозаполненного поезда, не даст поставить головной вагон.
+
+        :return: Номер поезда с вагонами, раньше других попавшего на пути, либо None, если горка не заблокирована.
+        """
+        paths = self.sorting_hill.assigned_paths
+        trains = self.sorting_hill.trains_formed
+        if paths.free_count or paths.unassigned or trains.empty or trains.untyped or trains.full:
+            return None
+        return next(iter(trains.loaded), None)
+
+    def _release_path(self) -> str | None:
+        """
+        Отправить недозаполненный поезд, если горка заблокирована.
+
+        :return: Номер отправленного поезда, либо None, если горка не заблокирована.
+        """
+        train = self._blocked_train()
+        if train is None:
+            return None
+        hill = self.sorting_hill
+        path = hill.assigned_paths.path_of(train)
+        hill.trains_formed.depart(train)
+        if path is not None:
+            del hill.assigned_paths[path]
+        return train
+
+    def _select_train(self, wagon_type: str) -> str | None:
+        """
+        Выбрать поезд для вагона: сначала поезд того же типа, затем поезд без типа.
+
+        Поиск выполняется по индексу открытых поездов реестра за O(1).
+
+        :param wagon_type: Тип вагона.
+        :return: Номер поезда с локомотивом и свободным местом, либо None.
+        """
+        return self.sorting_hill.trains_formed.next_open(wagon_type)
+
+    def _place_wagon(self, train: str, wagon_type: str, wagon_info: str) -> str:
+        """
+        Прицепить вагон к выбранному поезду, при необходимости типизировав поезд.
+
+        :param train: Номер выбранного поезда.
+        :param wagon_type: Тип вагона.
+        :param wagon_info: Строка с информацией о вагоне в формате НОМЕР/Т(ип)
+        :return: Номер поезда после прицепки.
+        """
+        hill = self.sorting_hill
+        if train[-1].isdigit():
+            typed_train = f'{train}{wagon_type}'
+            path = hill.assigned_paths.path_of(train)
+            hill.trains_formed[typed_train] = hill.trains_formed.pop(train)
+            if path is not None:
+                hill.assigned_paths[path] = typed_train
+            train = typed_train
+        hill.trains_formed[train].append(wagon_info)
+        return train
+
+    def handle_locomotive(self, locomotive: str) -> str:
+        """
+        Прицепить локомотив к первому составу без локомотива.
+
+        :param locomotive: Модель локомотива в формате МОДЕЛЬ-ЧислоВагоновМакс
+        :return: Номер поезда, в который попал локомотив.
+        :raises RuntimeError: Если нет пустого состава.
+        """
+        train = self.sorting_hill.trains_formed.next_empty()
+        if train is None:
+            raise RuntimeError(f'no train for locomotive {locomotive}')
+        self.sorting_hill.trains_formed[train].append(locomotive)
+        return train
+
+    def prepare_path(self) -> int:
+        """
+        Подготовить первый свободный путь.
+
+        :return: Подготовленный путь.
+        :raises RuntimeError: Если свободных путей нет.
+        """
+        path = self.sorting_hill.assigned_paths.next_free()
+        if path is None:
+            raise RuntimeError('no free path')
+        self.sorting_hill.assigned_paths[path] = None
+        return path
+
+    def allocate_path_for_train(self) -> dict[int, str]:
+        """
+        Запланировать новый поезд на подготовленном пути.
+
+        :return: Словарь, в котором ключом выступает номер пути, а значением номер поезда.
+        :raises RuntimeError: Если нет подготовленного пути без поезда.
+        """
+        hill = self.sorting_hill
+        path = hill.assigned_paths.next_unassigned()
+        if path is None:
+            raise RuntimeError('no path for train')
+
+        hill.train_index += 1
+        train = f'{hill.train_index:04d}'
+        hill.assigned_paths[path] = train
+        hill.trains_formed[train] = []
+        return {path: train}
+
+    def send_train(self) -> str:
+        """
+        Отправить готовый поезд и освободить его путь.
+
+        :return: Номер отправленного поезда.
+        :raises RuntimeError: Если готовых поездов нет.
+        """
+        hill = self.sorting_hill
+        train = hill.trains_formed.next_ready(buffer_drained=not hill.wagon_buffer)
+        if train is None:
+            raise RuntimeError('no train ready')
+
+        path = hill.assigned_paths.path_of(train)
+        hill.trains_formed.depart(train)
+        if path is not None:
+            del hill.assigned_paths[path]
+        return train
+
+    def send_trains(self, trains: Sequence[str]) -> list[str]:
+        """
+        Отправить пакет готовых поездов за один проход и освободить их пути.
+
+        Пакет проверяется целиком до отправки: поезд готов, если он заполнен,
+        либо если в нём есть вагоны, а очередь вагонов пуста.
+
+        :param trains: Номера поездов в порядке отправки.
+        :return: Номера отправленных поездов.
+        :raises RuntimeError: Если поезд из пакета не готов к отправке (пакет не отправляется).
+        """
+        hill = self.sorting_hill
+        trains_formed = hill.trains_formed
+        buffer_drained = not hill.wagon_buffer
+        for train in trains:
+            if train not in trains_formed.full and not (buffer_drained and train in trains_formed.loaded):
+                raise RuntimeError(f'train {train} is not ready')
+
+        assigned_paths = hill.assigned_paths
+        for train in trains:
+            path = assigned_paths.path_of(train)
+            trains_formed.depart(train)
+            if path is not None:
+                del assigned_paths[path]
+        return list(trains)
+
+    def start_shift(self) -> None:
+        """Начало смены"""
+
+    def end_shift(self) -> None:
+        """Окончание смены"""
@@ -1,5 +1,108 @@
 from sorting_handler.interface import SortingHandler
 
+# Счётчик статистики -> поддерживаемый агрегат SortingHill
+_STATS_SOURCES = {
+    'paths_prepared': 'paths_prepared',
+    'trains_planned': 'trains_planned',
+    'locos_arrived': 'locos_attached',
+    'wagons_handled': 'wagons_attached',
+    'trains_sent': 'trains_sent',
+}
+
+
 class SortingReporterImpl(SortingHandler):
-    # TODO: Реализуйте здесь все методы интерфейса SortingHandler
-    pass
+    """
+    Репортёр горки: ведёт статистику смены.
+
+    Состояние горки не меняет. Счётчики берутся из агрегатов, которые поддерживает SortingHill,
+    относительно их значений на начало смены, поэтому обновление статистики занимает O(1).
+
+    Как и в отчёте по снэпшотам горки, в trains_sent входят поезда, снятые с путей в конце смены
+    без отправки (составы без вагонов), если в конце смены уходит хотя бы один поезд.
+    """
+
+    def __init__(self, sorting_hill) -> None:
+        """Инициализация хэндлера"""
+        self.sorting_hill = sorting_hill
+        self.stats: dict[str, int] = dict.fromkeys(_STATS_SOURCES, 0)
+        self._baseline = sorting_hill.aggregates()
+        self._trains_at_start = len(sorting_hill.trains_formed)
+        self._trains_cleared = 0
+
+    def _update(self, key: str) -> None:
+        source = _STATS_SOURCES[key]
+        self.stats[key] = self.sorting_hill.aggregates()[source] - self._baseline[source]
+        if key == 'trains_sent':
+            self.stats[key] += self._trains_cleared
+
+    def handle_wagon(self, wagon_info: str) -> None:
+        """
+        Учесть обработанный вагон.
+
+        :param wagon_info: Строка с информацией о вагоне в формате НОМЕР/Т(ип)
+        """
+        self._update('wagons_handled')
+
+    def handle_wagons(self, wagons) -> list[None]:
+        """
+        Учесть пакет обработанных вагонов одним обновлением.
+
+        :param wagons: Строки с информацией о вагонах в порядке поступления.
+        :return: По элементу на каждый учтённый вагон.
+        """
+        self._update('wagons_handled')
+        return [None] * len(wagons)
+
+    def handle_locomotive(self, locomotive: str) -> None:
+        """
+        Учесть прибывший локомотив.
+
+        :param locomotive: Модель локомотива в формате МОДЕЛЬ-ЧислоВагоновМакс
+        """
+        self._update('locos_arrived')
+
+    def prepare_path(self) -> None:
+        """Учесть подготовленный путь"""
+        self._update('paths_prepared')
+
+    def allocate_path_for_train(self) -> None:
+        """Учесть запланированный поезд"""
+        self._update('trains_planned')
+
+    def send_train(self) -> None:
+        """Учесть отправленный поезд"""
+        self._update('trains_sent')
+
+    def send_trains(self, trains) -> list[None]:
+        """
+        Учесть пакет отправленных поездов одним обновлением.
+
+        :param trains: Номера поездов пакета.
+        :return: По элементу на каждый учтённый поезд.
+        """
+        # Пакет отправляется в конце смены, когда составы без вагонов уже сняты с путей:
+        # их число - разница между поездами, которые должны стоять на путях, и оставшимися
+        hill = self.sorting_hill
+        aggregates = hill.aggregates()
+        in_yard = (
+            self._trains_at_start
+            + aggregates['trains_planned'] - self._baseline['trains_planned']
+            - (aggregates['trains_sent'] - self._baseline['trains_sent'])
+        )
+        self._trains_cleared += in_yard - len(hill.trains_formed)
+        self._update('trains_sent')
+        return [None] * len(trains)
+
+    def start_shift(self) -> None:
+        """Начало смены: сброс статистики и базовые значения агрегатов"""
+        self.stats = dict.fromkeys(_STATS_SOURCES, 0)
+        self._baseline = self.sorting_hill.aggregates()
+        self._trains_at_start = len(self.sorting_hill.trains_formed)
+        self._trains_cleared = 0
+
+    def end_shift(self) -> None:
+        """Окончание смены: отчёт о статистике"""
+        for key in _STATS_SOURCES:
+            self._update(key)
+        report = ', '.join(f'{key}={value}' for key, value in self.stats.items())
+        self.sorting_hill.sink.emit('report', f'Отчёт за смену: {report}', **self.stats)
@@ -0,0 +1,237 @@
+"""Модуль с асинхронной сортировочной горкой"""
+
+import asyncio
+
+from sorting_handler.async_interface import AsyncSortingHandler
+from sorting_handler.interface import SortingHandler
+from sorting_hill.consts import EventType
+from sorting_hill.sink import POLICY_DROP
+from sorting_hill.sorting_hill import SortingHill
+
+POLICY_WAIT = 'wait'
+OVERFLOW_POLICIES = (POLICY_WAIT, POLICY_DROP)
+
+_STOP = None
+
+
+class _AsyncBridge(SortingHandler):
+    """
+    Синхронный хэндлер, собирающий вызовы для асинхронных хэндлеров.
+
+    Вызовы копятся, пока горка обрабатывает событие, и передаются асинхронным хэндлерам
+    только после того, как событие успешно применено (см. AsyncSortingHill.run).
+    """
+
+    def __init__(self, sorting_hill: SortingHill) -> None:
+        self.sorting_hill = sorting_hill
+        self.staged: list[tuple[str, tuple[str, ...]]] = []
+
+    def _forward(self, method: str, *args: str) -> None:
+        self.staged.append((method, args))
+
+    def handle_wagon(self, wagon_info: str) -> None:
+        self._forward('handle_wagon', wagon_info)
+
+    def handle_locomotive(self, locomotive: str) -> None:
+        self._forward('handle_locomotive', locomotive)
+
+    def prepare_path(self) -> None:
+        self._forward('prepare_path')
+
+    def allocate_path_for_train(self) -> None:
+        self._forward('allocate_path_for_train')
+
+    def send_train(self) -> None:
+        self._forward('send_train')
+
+    def start_shift(self) -> None:
+        self._forward('start_shift')
+
+    def end_shift(self) -> None:
+        self._forward('end_shift')
+
+
+class AsyncSortingHill:
+    """
+    Сортировочная горка на asyncio.
+
+    События поступают в ограниченную очередь от любого числа независимых источников
+    (прибытие вагонов и локомотивов, команды дежурного) и применяются к SortingHill по одному.
+    Синхронные хэндлеры вызываются сразу, асинхронные - через собственные очереди и задачи,
+    поэтому медленный ввод-вывод не задерживает обработку вагонов. Асинхронный хэндлер получает
+    вызовы события, только если событие применено без ошибки. Очереди асинхронных хэндлеров
+    ограничены: при переполнении политика wait приостанавливает приём событий, пока хэндлер
+    не освободит место, а политика drop отбрасывает вызов и учитывает его в calls_dropped.
+    Один цикл событий может обслуживать несколько горок.
+    """
+
+    def __init__(
+        self,
+        sorting_hill: SortingHill,
+        max_events: int = 1024,
+        max_wagons: int = 4096,
+        fairness_batch: int = 64,
+        max_pending: int = 1024,
+        overflow: str = POLICY_WAIT,
+    ) -> None:
+        """
+        Инициализация горки.
+
+        :param sorting_hill: Горка, к которой применяются события.
+        :param max_events: Вместимость очереди событий; submit ждёт при переполнении.
+        :param max_wagons: Вместимость очереди вагонов; put_wagon ждёт при переполнении.
+        :param fairness_batch: Через сколько событий уступать цикл другим задачам.
+        :param max_pending: Вместимость очереди вызовов каждого асинхронного хэндлера.
+        :param overflow: Политика при переполнении очереди вызовов: wait или drop.
+        :raises ValueError: Если политика переполнения неизвестна.
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'unknown overflow policy: {overflow}')
+        self.sorting_hill = sorting_hill
+        self.events: asyncio.Queue[EventType | None] = asyncio.Queue(max_events)
+        self.max_wagons = max_wagons
+        self.fairness_batch = fairness_batch
+        self.max_pending = max_pending
+        self.overflow = overflow
+        self.events_accepted = 0
+        self.events_rejected = 0
+        self.calls_dropped = 0
+        self.errors: list[Exception] = []
+        self.handlers: list[AsyncSortingHandler] = []
+        self._queues: list[asyncio.Queue] = []
+        self._workers: list[asyncio.Task] = []
+        self._wagon_space = asyncio.Event()
+        self._wagon_space.set()
+        self._closed = False
+        self._bridge: _AsyncBridge | None = None
+
+    def register_handler(self, handler: type[SortingHandler]) -> None:
+        """
+        Зарегистрировать синхронный обработчик.
+
+        :param handler: Обработчик для регистрации.
+        """
+        self.sorting_hill.register_handler(handler)
+
+    def register_async_handler(self, handler: type[AsyncSortingHandler]) -> None:
+        """
+        Зарегистрировать асинхронный обработчик.
+
+        Асинхронные обработчики получают события в том же порядке, что и синхронные;
+        задача обработчика запускается вместе с run().
+
+        :param handler: Обработчик для регистрации.
+        """
+        if self._bridge is None:
+            self.sorting_hill.register_handler(_AsyncBridge)
+            self._bridge = self.sorting_hill.handlers[-1]
+        self.handlers.append(handler(self.sorting_hill))
+        self._queues.append(asyncio.Queue(self.max_pending))
+
+    async def submit(self, event: EventType) -> None:
+        """
+        Поставить событие в очередь; ждёт, если очередь заполнена.
+
+        :param event: Событие.
+        """
+        await self.events.put(event)
+
+    async def put_wagon(self, wagon_info: str) -> None:
+        """
+        Поставить вагон в очередь на сортировку; ждёт, пока в очереди не освободится место.
+
+        :param wagon_info: Строка с информацией о вагоне в формате НОМЕР/Т(ип)
+        :raises RuntimeError: Если run() уже завершился (смена окончена или вызван close()),
+            в том числе пока источник ждал места.
+        """
+        wagon_buffer = self.sorting_hill.wagon_buffer
+        while not self._closed and len(wagon_buffer) >= self.max_wagons:
+            self._wagon_space.clear()
+            await self._wagon_space.wait()
+        if self._closed:
+            raise RuntimeError('async sorting hill is closed')
+        wagon_buffer.append(wagon_info)
+
+    async def close(self) -> None:
+        """Завершить приём событий: run() обработает уже поставленные события и вернёт управление"""
+        await self.events.put(_STOP)
+
+    async def run(self) -> None:
+        """
+        Обрабатывать события до close() или окончания смены.
+
+        Недопустимые события (check_event вернул None) отбрасываются, ошибки обработки
+        копятся в errors. Перед возвратом освобождает источники, ждущие места в очереди вагонов,
+        и дожидается, пока асинхронные хэндлеры обработают всё, что им было передано.
+        """
+        self._workers = [
+            asyncio.create_task(self._pump(handler, queue))
+            for handler, queue in zip(self.handlers, self._queues)
+        ]
+        hill = self.sorting_hill
+        processed = 0
+        try:
+            while True:
+                event = await self.events.get()
+                if event is _STOP:
+                    break
+
+                if hill.check_event(event) is None:
+                    self.events_rejected += 1
+                else:
+                    self.events_accepted += 1
+                    try:
+                        hill.handle_event(event)
+                    except RuntimeError as e:
+                        self.errors.append(e)
+                        if self._bridge is not None:
+                            self._bridge.staged.clear()
+                    else:
+                        await self._deliver()
+                    if len(hill.wagon_buffer) < self.max_wagons and not self._wagon_space.is_set():
+                        self._wagon_space.set()
+
+                if event == EventType.ShiftEnded:
+                    break
+
+                processed += 1
+                if processed % self.fairness_batch == 0:
+                    await asyncio.sleep(0)
+        finally:
+            self._closed = True
+            self._wagon_space.set()
+            for queue in self._queues:
+                await queue.put(_STOP)
+            await asyncio.gather(*self._workers)
+
+    async def _deliver(self) -> None:
+        """Передать асинхронным хэндлерам вызовы успешно применённого события"""
+        if self._bridge is None or not self._bridge.staged:
+            return
+        staged = self._bridge.staged
+        self._bridge.staged = []
+        for queue in self._queues:
+            for item in staged:
+                try:
+                    queue.put_nowait(item)
+                except asyncio.QueueFull:
+                    if self.overflow == POLICY_DROP:
+                        self.calls_dropped += 1
+                    else:
+                        await queue.put(item)
+
+    async def _pump(self, handler: AsyncSortingHandler, queue: asyncio.Queue) -> None:
+        emit = self.sorting_hill.sink.emit
+        name = type(handler).__name__
+        while True:
+            item = await queue.get()
+            if item is _STOP:
+                return
+            method, args = item
+            try:
+                await getattr(handler, method)(*args)
+            except Exception as e:  # noqa: BLE001
+                # Ошибка одного вызова не останавливает задачу хэндлера
+                self.errors.append(e)
+                emit('error', f'Ошибка асинхронного хэндлера {name}.{method}: {e!r}',
+                     handler=name, method=method, error=repr(e))
@@ -0,0 +1,288 @@
+"""
+Модуль с контрольной точкой состояния сортировочной горки.
+
+Формат файла (little-endian, все разделы выровнены на 8 байт):
+- заголовок _HEADER: MAGIC, количество путей, счётчик поездов, размеры разделов и накопительные счётчики реестров;
+- поезда _TRAIN: номер поезда (utf-8, до 16 байт), код локомотива (-1 - без локомотива), число вагонов;
+- пути _PATH: номер пути и номер записи поезда (-1 - путь без поезда);
+- порядок индексов empty, full, loaded (номера записей поездов) и unassigned (номера путей);
+- вагоны составов подряд и оставшиеся вагоны очереди - упакованные числа (см. compact.pack_wagon).
+
+При чтении файл отображается в память, вагоны очереди не разбираются:
+очередь читает их из отображения по мере снятия.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+
+from sorting_hill.compact import CompactWagonQueue, pack_wagon, unpack_wagon
+from sorting_hill.consts import LocoType
+from sorting_hill.path_registry import PathRegistry
+from sorting_hill.train_registry import TrainRegistry
+
+MAGIC = b'SHC1'
+
+_TRAIN_ID_SIZE = 16
+_HEADER = struct.Struct('<4s4x15Q')
+_TRAIN = struct.Struct(f'<{_TRAIN_ID_SIZE}sqQ')
+_PATH = struct.Struct('<Qq')
+_ITEM_SIZE = array('Q').itemsize
+_LOCOS: tuple[LocoType, ...] = tuple(LocoType)
+_LOCO_CODES: dict[str, int] = {loco: code for code, loco in enumerate(_LOCOS)}
+_COUNTERS = ('paths_prepared', 'trains_planned', 'locos_attached', 'wagons_attached', 'trains_sent')
+
+
+class MappedWagonQueue(CompactWagonQueue):
+    """
+    Очередь вагонов, восстановленная из контрольной точки.
+
+    Голова очереди читается прямо из отображённого в память файла, упакованные вагоны
+    разбираются только при снятии; новые вагоны ставятся в хвост, как в CompactWagonQueue.
+    """
+
+    __slots__ = ('_mapped', '_mapped_head')
+
+    def __init__(self, mapped: Sequence[int]) -> None:
+        """
+        Инициализация очереди.
+
+        :param mapped: Упакованные вагоны головы очереди (memoryview формата 'Q' или массив).
+        """
+        super().__init__()
+        self._mapped = mapped
+        self._mapped_head = 0
+
+    def peek(self) -> str | None:
+        if self._mapped_head < len(self._mapped):
+            return unpack_wagon(self._mapped[self._mapped_head])
+        return super().peek()
+
+    def popleft_packed(self) -> int:
+        if self._mapped_head < len(self._mapped):
+            packed = self._mapped[self._mapped_head]
+            self._mapped_head += 1
+            return packed
+        return super().popleft_packed()
+
+    def clear(self) -> None:
+        self._mapped_head = len(self._mapped)
+        super().clear()
+
+    def packed(self) -> array:
+        packed = array('Q', self._mapped[self._mapped_head:])
+        packed.extend(super().packed())
+        return packed
+
+    def packed_chunks(self) -> Iterator[array]:
+        yield array('Q', self._mapped[self._mapped_head:])
+        yield from super().packed_chunks()
+
+    def __len__(self) -> int:
+        return len(self._mapped) - self._mapped_head + super().__len__()
+
+    def __bool__(self) -> bool:
+        return self._mapped_head < len(self._mapped) or super().__bool__()
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._mapped_head, len(self._mapped)):
+            yield unpack_wagon(self._mapped[i])
+        yield from super().__iter__()
+
+    def __getitem__(self, index: int) -> str:
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError('wagon queue index out of range')
+        mapped_size = len(self._mapped) - self._mapped_head
+        if index < mapped_size:
+            return unpack_wagon(self._mapped[self._mapped_head + index])
+        return super().__getitem__(index - mapped_size)
+
+
+@dataclass(frozen=True, slots=True)
+class Checkpoint:
+    """Состояние горки, прочитанное из контрольной точки"""
+
+    number_of_paths: int
+    train_index: int
+    trains: list[tuple[str, list[str]]]
+    paths: list[tuple[int, str | None]]
+    empty: list[str]
+    full: list[str]
+    loaded: list[str]
+    unassigned: list[int]
+    counters: dict[str, int]
+    wagons: Sequence[int]
+
+
+def _packed_chunks(wagon_buffer) -> Iterable[array]:
+    if isinstance(wagon_buffer, CompactWagonQueue):
+        return wagon_buffer.packed_chunks()
+    return (array('Q', map(pack_wagon, wagon_buffer)),)
+
+
+def _little_endian(items: array) -> array:
+    if sys.byteorder == 'big':
+        items.byteswap()
+    return items
+
+
+def write_checkpoint(
+    path: str | os.PathLike,
+    train_index: int,
+    assigned_paths: PathRegistry,
+    trains_formed: TrainRegistry,
+    wagon_buffer,
+) -> None:
+    """
+    Записать контрольную точку.
+
+    Файл пишется рядом во временный и атомарно подменяет прежний, поэтому
+    сбой во время записи оставляет предыдущую контрольную точку целой.
+    Вагоны очереди пишутся последним разделом по порциям (очередь по манифесту
+    не подгружает непрочитанную часть), а их число дописывается в заголовок в конце.
+
+    :param path: Путь к файлу контрольной точки.
+    :param train_index: Счётчик запланированных поездов.
+    :param assigned_paths: Реестр путей.
+    :param trains_formed: Реестр поездов.
+    :param wagon_buffer: Очередь вагонов на сортировку.
+    :raises ValueError: Если номер поезда не помещается в 16 байт.
+    """
+    slots = {train: slot for slot, train in enumerate(trains_formed)}
+    train_records = bytearray()
+    train_wagons = array('Q')
+    for train, content in trains_formed.items():
+        name = train.encode()
+        if len(name) > _TRAIN_ID_SIZE:
+            raise ValueError(f'train id is too long for a checkpoint: {train}')
+        items = list(content)
+        loco = _LOCO_CODES.get(items[0], -1) if items else -1
+        wagons = items[1:] if loco >= 0 else items
+        train_wagons.extend(map(pack_wagon, wagons))
+        train_records += _TRAIN.pack(name, loco, len(wagons))
+
+    path_records = bytearray()
+    for number, train in assigned_paths.items():
+        path_records += _PATH.pack(number, -1 if train is None else slots[train])
+
+    indexes = [
+        array('Q', (slots[train] for train in trains_formed.empty)),
+        array('Q', (slots[train] for train in trains_formed.full)),
+        array('Q', (slots[train] for train in trains_formed.loaded)),
+        array('Q', assigned_paths.unassigned),
+    ]
+
+    def header(buffer_count: int) -> bytes:
+        return _HEADER.pack(
+            MAGIC,
+            assigned_paths.number_of_paths,
+            train_index,
+            len(trains_formed),
+            len(assigned_paths),
+            *map(len, indexes),
+            len(train_wagons),
+            buffer_count,
+            assigned_paths.paths_prepared,
+            assigned_paths.trains_planned,
+            trains_formed.locos_attached,
+            trains_formed.wagons_attached,
+            trains_formed.trains_sent,
+        )
+
+    tmp_path = f'{os.fspath(path)}.tmp'
+    with open(tmp_path, 'wb') as file:
+        file.write(header(0))
+        file.write(train_records)
+        file.write(path_records)
+        for items in (*indexes, train_wagons):
+            file.write(_little_endian(items))
+        buffer_count = 0
+        for chunk in _packed_chunks(wagon_buffer):
+            file.write(_little_endian(chunk))
+            buffer_count += len(chunk)
+        file.seek(0)
+        file.write(header(buffer_count))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_checkpoint(path: str | os.PathLike) -> Checkpoint:
+    """
+    Прочитать контрольную точку.
+
+    Время чтения зависит от числа путей и вагонов в составах, но не от длины очереди:
+    вагоны очереди остаются в отображённом в память файле.
+
+    :param path: Путь к файлу контрольной точки.
+    :return: Прочитанное состояние.
+    :raises ValueError: Если файл не является контрольной точкой горки.
+    """
+    with open(path, 'rb') as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped[:len(MAGIC)] != MAGIC or len(mapped) < _HEADER.size:
+        raise ValueError(f'not a sorting hill checkpoint: {path}')
+
+    (
+        _, number_of_paths, train_index, trains_count, paths_count,
+        empty_count, full_count, loaded_count, unassigned_count,
+        train_wagons_count, buffer_wagons_count, *counters,
+    ) = _HEADER.unpack_from(mapped)
+
+    offset = _HEADER.size
+    train_headers = []
+    for _ in range(trains_count):
+        name, loco, wagons = _TRAIN.unpack_from(mapped, offset)
+        train_headers.append((name.rstrip(b'\0').decode(), loco, wagons))
+        offset += _TRAIN.size
+
+    path_records = []
+    for _ in range(paths_count):
+        path_records.append(_PATH.unpack_from(mapped, offset))
+        offset += _PATH.size
+
+    view = memoryview(mapped)
+
+    def items(count: int) -> Sequence[int]:
+        nonlocal offset
+        section = view[offset:offset + count * _ITEM_SIZE].cast('Q')
+        offset += count * _ITEM_SIZE
+        if sys.byteorder == 'big':
+            section = array('Q', section)
+            section.byteswap()
+        return section
+
+    empty, full, loaded, unassigned = [
+        list(items(count)) for count in (empty_count, full_count, loaded_count, unassigned_count)
+    ]
+    train_wagons = items(train_wagons_count)
+    wagons = items(buffer_wagons_count)
+
+    trains = []
+    start = 0
+    for name, loco, count in train_headers:
+        content = [_LOCOS[loco]] if loco >= 0 else []
+        content.extend(unpack_wagon(packed) for packed in train_wagons[start:start + count])
+        trains.append((name, content))
+        start += count
+
+    names = [name for name, _ in trains]
+    return Checkpoint(
+        number_of_paths=number_of_paths,
+        train_index=train_index,
+        trains=trains,
+        paths=[(number, None if slot < 0 else names[slot]) for number, slot in path_records],
+        empty=[names[slot] for slot in empty],
+        full=[names[slot] for slot in full],
+        loaded=[names[slot] for slot in loaded],
+        unassigned=unassigned,
+        counters=dict(zip(_COUNTERS, counters)),
+        wagons=wagons,
+    )
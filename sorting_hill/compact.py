@@ -0,0 +1,307 @@
+"""Модуль с компактным представлением вагонов и составов"""
+
+from array import array
+from collections.abc import Iterable, Iterator, MutableSequence
+
+from sorting_hill.consts import LocoType, WagonType
+
+_WAGON_TYPES: tuple[WagonType, ...] = tuple(WagonType)
+_WAGON_TYPE_CODES: dict[str, int] = {wagon_type: code for code, wagon_type in enumerate(_WAGON_TYPES)}
+_LOCO_TYPES: dict[str, LocoType] = {loco.value: loco for loco in LocoType}
+_TYPE_BITS = 2
+_TYPE_MASK = (1 << _TYPE_BITS) - 1
+
+assert len(_WAGON_TYPES) <= 1 << _TYPE_BITS, 'тип вагона не помещается в упакованное представление'
+
+
+def pack_wagon(wagon_info: str) -> int:
+    """
+    Упаковать вагон в целое число: номер вагона и двухбитный код типа.
+
+    :param wagon_info: Строка с информацией о вагоне в формате НОМЕР/Т(ип)
+    :return: Упакованный вагон.
+    :raises ValueError: Если строка не соответствует формату.
+    """
+    number, _, wagon_type = wagon_info.partition('/')
+    code = _WAGON_TYPE_CODES.get(wagon_type)
+    if code is None or not number.isdigit():
+        raise ValueError(f'bad wagon info: {wagon_info}')
+    return int(number) << _TYPE_BITS | code
+
+
+def unpack_wagon(packed: int) -> str:
+    """
+    Строковое представление упакованного вагона.
+
+    :param packed: Упакованный вагон.
+    :return: Строка с информацией о вагоне в формате НОМЕР/Т(ип)
+    """
+    return f'{packed >> _TYPE_BITS:08d}/{_WAGON_TYPES[packed & _TYPE_MASK]}'
+
+
+def wagon_type_of(packed: int) -> WagonType:
+    """
+    Тип упакованного вагона без построения строки.
+
+    :param packed: Упакованный вагон.
+    :return: Тип вагона.
+    """
+    return _WAGON_TYPES[packed & _TYPE_MASK]
+
+
+class CompactTrainContent(MutableSequence):
+    """
+    Состав поезда в компактном режиме.
+
+    Локомотив хранится отдельным полем, вагоны - упакованными числами в array('Q'),
+    по 8 байт на вагон. Снаружи состав выглядит как список: локомотив первым элементом,
+    затем строки вагонов, которые строятся только при обращении.
+    Вместимость локомотива (capacity) кэшируется реестром при прицепке локомотива.
+    """
+
+    __slots__ = ('_indexed', '_registry', 'capacity', 'handle', 'loco', 'train', 'wagons')
+
+    def __init__(self, items: Iterable[str] = (), train: str | None = None, registry=None) -> None:
+        """Инициализация состава"""
+        self.loco: LocoType | None = None
+        self.wagons = array('Q')
+        self.train = train
+        self.handle: int | None = None
+        self.capacity: int | None = None
+        self._registry = registry
+        self._indexed = (False, 0, None)
+        for item in items:
+            self._insert(len(self), item)
+
+    @property
+    def free_slots(self) -> int:
+        """Сколько вагонов ещё можно прицепить (0, если локомотива нет)"""
+        return self.capacity - self._indexed[1] if self.capacity is not None else 0
+
+    def first_wagon_type(self) -> WagonType | None:
+        """
+        Тип поезда по первому вагону, без построения строки вагона.
+
+        :return: Тип первого вагона, либо None, если вагонов нет.
+        """
+        return _WAGON_TYPES[self.wagons[0] & _TYPE_MASK] if self.wagons else None
+
+    def _changed(self, appended: str | None = None) -> None:
+        if self._registry is not None:
+            self._registry._reindex(self, appended)
+
+    def _insert(self, index: int, item: str) -> None:
+        loco = _LOCO_TYPES.get(item)
+        if loco is not None:
+            if self.loco is not None or index != 0:
+                raise ValueError('locomotive must be the first element of the train')
+            self.loco = loco
+            return
+        offset = self.loco is not None
+        if index < offset:
+            raise ValueError('locomotive must be the first element of the train')
+        self.wagons.insert(index - offset, pack_wagon(item))
+
+    def _normalize(self, index: int) -> int:
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError('train index out of range')
+        return index
+
+    def __len__(self) -> int:
+        return (self.loco is not None) + len(self.wagons)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = self._normalize(index)
+        if self.loco is not None:
+            if index == 0:
+                return self.loco
+            index -= 1
+        return unpack_wagon(self.wagons[index])
+
+    def __iter__(self) -> Iterator[str]:
+        if self.loco is not None:
+            yield self.loco
+        for packed in self.wagons:
+            yield unpack_wagon(packed)
+
+    def __setitem__(self, index, item) -> None:
+        if isinstance(index, slice):
+            items = list(self)
+            items[index] = item
+            self.loco = None
+            del self.wagons[:]
+            for value in items:
+                self._insert(len(self), value)
+        else:
+            index = self._normalize(index)
+            if self.loco is not None and index == 0:
+                self.loco = None
+                self._insert(0, item)
+            else:
+                self.wagons[index - (self.loco is not None)] = pack_wagon(item)
+        self._changed()
+
+    def __delitem__(self, index) -> None:
+        if isinstance(index, slice):
+            for i in sorted(range(*index.indices(len(self))), reverse=True):
+                self._delete(i)
+        else:
+            self._delete(self._normalize(index))
+        self._changed()
+
+    def _delete(self, index: int) -> None:
+        if self.loco is not None:
+            if index == 0:
+                self.loco = None
+                return
+            index -= 1
+        del self.wagons[index]
+
+    def append(self, item: str) -> None:
+        self._insert(len(self), item)
+        self._changed(item)
+
+    def insert(self, index: int, item: str) -> None:
+        size = len(self)
+        if index < 0:
+            index = max(0, index + size)
+        self._insert(min(index, size), item)
+        self._changed()
+
+    def extend(self, items: Iterable[str]) -> None:
+        for item in items:
+            self._insert(len(self), item)
+        self._changed()
+
+    def clear(self) -> None:
+        self.loco = None
+        del self.wagons[:]
+        self._changed()
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, CompactTrainContent | list):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class CompactWagonQueue:
+    """
+    Очередь вагонов на сортировку в компактном режиме.
+
+    Вагоны хранятся упакованными числами в array('Q'); снятая голова сдвигается
+    индексом и периодически отрезается, так что снятие головы выполняется за амортизированное O(1).
+    Наружу вагоны отдаются строками, как из обычной очереди.
+    """
+
+    __slots__ = ('_head', '_items')
+
+    _COMPACT_THRESHOLD = 4096
+
+    def __init__(self, wagons: Iterable[str] = ()) -> None:
+        """Инициализация очереди"""
+        self._items = array('Q', map(pack_wagon, wagons))
+        self._head = 0
+
+    def append(self, wagon_info: str) -> None:
+        """
+        Поставить вагон в конец очереди.
+
+        :param wagon_info: Строка с информацией о вагоне в формате НОМЕР/Т(ип)
+        """
+        self._items.append(pack_wagon(wagon_info))
+
+    def extend(self, wagons: Iterable[str]) -> None:
+        """
+        Поставить в конец очереди несколько вагонов разом.
+
+        :param wagons: Вагоны в порядке поступления.
+        """
+        self._items.extend(map(pack_wagon, wagons))
+
+    enqueue_many = extend
+
+    def peek(self) -> str | None:
+        """
+        Посмотреть первый вагон в очереди, не снимая его.
+
+        :return: Информация о вагоне, либо None для пустой очереди.
+        """
+        return unpack_wagon(self._items[self._head]) if self else None
+
+    def popleft(self) -> str:
+        """
+        Снять первый вагон из очереди.
+
+        :return: Информация о вагоне.
+        :raises IndexError: Если очередь пуста.
+        """
+        return unpack_wagon(self.popleft_packed())
+
+    def popleft_packed(self) -> int:
+        """
+        Снять первый вагон из очереди, не строя его строку.
+
+        :return: Упакованный вагон.
+        :raises IndexError: Если очередь пуста.
+        """
+        if not self:
+            raise IndexError('pop from an empty wagon queue')
+        packed = self._items[self._head]
+        self._head += 1
+        if self._head >= self._COMPACT_THRESHOLD and self._head * 2 >= len(self._items):
+            del self._items[:self._head]
+            self._head = 0
+        return packed
+
+    def clear(self) -> None:
+        """Очистить очередь"""
+        del self._items[:]
+        self._head = 0
+
+    def packed(self) -> array:
+        """
+        Вагоны очереди упакованными числами, без построения строк.
+
+        :return: Копия оставшихся вагонов в порядке поступления.
+        """
+        return self._items[self._head:]
+
+    def packed_chunks(self) -> Iterator[array]:
+        """
+        Вагоны очереди упакованными порциями, без построения строк.
+
+        Очереди, читающие вагоны из файла, отдают непрочитанную часть порциями,
+        не подгружая её в память очереди целиком.
+
+        :return: Копии порций оставшихся вагонов в порядке поступления.
+        """
+        yield self._items[self._head:]
+
+    def __len__(self) -> int:
+        return len(self._items) - self._head
+
+    def __bool__(self) -> bool:
+        return len(self._items) > self._head
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self._head, len(self._items)):
+            yield unpack_wagon(self._items[i])
+
+    def __getitem__(self, index: int) -> str:
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError('wagon queue index out of range')
+        return unpack_wagon(self._items[self._head + index])
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({list(self)!r})'
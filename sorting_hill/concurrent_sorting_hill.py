@@ -0,0 +1,229 @@
+"""Модуль с потокобезопасной сортировочной горкой"""
+
+import random
+import threading
+from collections.abc import Callable, Iterable
+
+from sorting_hill.compact import CompactWagonQueue
+from sorting_hill.consts import EventType
+from sorting_hill.path_registry import PathRegistry
+from sorting_hill.sink import OutputSink
+from sorting_hill.sorting_hill import SortingHill
+from sorting_hill.train_registry import TrainRegistry
+from sorting_hill.wagon_queue import WagonQueue
+
+
+def _locked(method: Callable) -> Callable:
+    """Выполнять метод реестра под его блокировкой"""
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+class ConcurrentWagonQueue(WagonQueue):
+    """
+    Очередь вагонов с атомарным снятием головы.
+
+    take() снимает вагон за одну операцию под блокировкой, поэтому два потока
+    никогда не получат один и тот же вагон; push_front() возвращает вагон в голову,
+    если его не удалось обработать.
+    """
+
+    __slots__ = ('_lock',)
+
+    def __init__(self, wagons: Iterable[str] = ()) -> None:
+        """Инициализация очереди"""
+        super().__init__(wagons)
+        self._lock = threading.Lock()
+
+    def take(self) -> str | None:
+        """
+        Атомарно снять первый вагон.
+
+        :return: Информация о вагоне, либо None для пустой очереди.
+        """
+        with self._lock:
+            return self._items.popleft() if self._items else None
+
+    def take_many(self, limit: int) -> list[str]:
+        """
+        Атомарно снять до limit вагонов из головы очереди.
+
+        :param limit: Максимальное количество вагонов.
+        :return: Вагоны в порядке поступления.
+        """
+        with self._lock:
+            items = self._items
+            return [items.popleft() for _ in range(min(limit, len(items)))]
+
+    def push_front(self, wagons: Iterable[str]) -> None:
+        """
+        Вернуть вагоны в голову очереди с сохранением их порядка.
+
+        :param wagons: Вагоны в порядке поступления.
+        """
+        with self._lock:
+            self._items.extendleft(reversed(list(wagons)))
+
+    append = _locked(WagonQueue.append)
+    extend = _locked(WagonQueue.extend)
+    enqueue_many = extend
+    peek = _locked(WagonQueue.peek)
+    popleft = _locked(WagonQueue.popleft)
+    clear = _locked(WagonQueue.clear)
+
+
+class LockedPathRegistry(PathRegistry):
+    """Реестр путей, изменения и индексы которого защищены общей блокировкой состояния"""
+
+    def __init__(self, lock: threading.RLock, number_of_paths: int, feed=None) -> None:
+        """Инициализация реестра"""
+        super().__init__(number_of_paths, feed=feed)
+        self._lock = lock
+
+    next_free = _locked(PathRegistry.next_free)
+    next_unassigned = _locked(PathRegistry.next_unassigned)
+    path_of = _locked(PathRegistry.path_of)
+    __setitem__ = _locked(PathRegistry.__setitem__)
+    __delitem__ = _locked(PathRegistry.__delitem__)
+    pop = _locked(PathRegistry.pop)
+    popitem = _locked(PathRegistry.popitem)
+    setdefault = _locked(PathRegistry.setdefault)
+    update = _locked(PathRegistry.update)
+    clear = _locked(PathRegistry.clear)
+
+
+class LockedTrainRegistry(TrainRegistry):
+    """Реестр поездов, изменения и индексы которого защищены общей блокировкой состояния"""
+
+    def __init__(self, lock: threading.RLock, compact: bool = False, feed=None) -> None:
+        """Инициализация реестра"""
+        super().__init__(compact=compact, feed=feed)
+        self._lock = lock
+
+    _reindex = _locked(TrainRegistry._reindex)
+    next_empty = _locked(TrainRegistry.next_empty)
+    next_open = _locked(TrainRegistry.next_open)
+    has_ready = _locked(TrainRegistry.has_ready)
+    next_ready = _locked(TrainRegistry.next_ready)
+    __setitem__ = _locked(TrainRegistry.__setitem__)
+    __delitem__ = _locked(TrainRegistry.__delitem__)
+    pop = _locked(TrainRegistry.pop)
+    popitem = _locked(TrainRegistry.popitem)
+    setdefault = _locked(TrainRegistry.setdefault)
+    update = _locked(TrainRegistry.update)
+    clear = _locked(TrainRegistry.clear)
+
+
+class ConcurrentSortingHill(SortingHill):
+    """
+    Сортировочная горка для нескольких потоков-операторов.
+
+    - state_lock - короткая блокировка индексов и счётчиков реестров: под ней выполняется
+      только учёт изменений, а не логика хэндлеров;
+    - path_lock(path) - блокировка пути и стоящего на нём поезда: операторы, работающие
+      с разными путями, не мешают друг другу;
+    - очередь вагонов снимает голову атомарно;
+    - check_event читает индексы под state_lock и видит согласованное состояние.
+
+    Хэндлеры регистрируются до запуска потоков, окончание смены выполняется после их остановки.
+    """
+
+    def __init__(
+        self,
+        number_of_paths: int,
+        compact: bool = False,
+        rng: random.Random | None = None,
+        metrics: bool = False,
+        sink: OutputSink | None = None,
+    ):
+        """
+        Инициализация сервиса.
+
+        :param number_of_paths: Количество путей.
+        :param compact: Компактное хранение составов (очередь вагонов хранит строки).
+        :param rng: Собственный генератор случайных чисел.
+        :param metrics: Включить сбор метрик.
+        :param sink: Приёмник вывода для трассы и отчётов.
+        """
+        super().__init__(number_of_paths, compact=compact, rng=rng, metrics=metrics, sink=sink)
+        self.state_lock = threading.RLock()
+        self._path_locks = {path: threading.Lock() for path in range(1, number_of_paths + 1)}
+        self.assigned_paths = LockedPathRegistry(self.state_lock, number_of_paths, feed=self.mutations)
+        self.trains_formed = LockedTrainRegistry(self.state_lock, compact=compact, feed=self.mutations)
+        self.wagon_buffer = ConcurrentWagonQueue()
+
+    def path_lock(self, path: int) -> threading.Lock:
+        """
+        Блокировка пути.
+
+        :param path: Номер пути.
+        :return: Блокировка, под которой меняется поезд на этом пути.
+        """
+        lock = self._path_locks.get(path)
+        if lock is None:
+            lock = self._path_locks.setdefault(path, threading.Lock())
+        return lock
+
+    def _use_wagon_buffer(self, wagon_buffer: CompactWagonQueue) -> None:
+        # Очередь для нескольких потоков снимает голову под блокировкой, поэтому вагоны копируются в неё
+        self.wagon_buffer = ConcurrentWagonQueue(wagon_buffer)
+
+    def _wagon_arrived(self) -> str | None:
+        wagon_info = self.wagon_buffer.take()
+        if wagon_info is None:
+            return None
+
+        try:
+            for handle_wagon in self._wagon_calls:
+                handle_wagon(wagon_info)
+        except BaseException:
+            self.wagon_buffer.push_front([wagon_info])
+            raise
+        return wagon_info
+
+    def _wagon_arrived_journaled(self) -> None:
+        wagon_info = self._wagon_arrived()
+        if wagon_info is not None:
+            self._journal.record_wagon(wagon_info)
+
+    def handle_wagons(self, limit: int) -> int:
+        """
+        Передать хэндлерам пакет вагонов, атомарно снятый из головы очереди.
+
+        Необработанный хвост пакета возвращается в голову очереди.
+
+        :param limit: Максимальное количество вагонов в пакете.
+        :return: Количество обработанных вагонов.
+        :raises RuntimeError: Если хэндлер не смог разместить первый вагон пакета.
+        """
+        batch = self.wagon_buffer.take_many(limit)
+        handled = len(batch)
+        try:
+            for handle_wagons in self._wagons_batch_calls:
+                if not handled:
+                    break
+                handled = min(handled, len(handle_wagons(batch[:handled])))
+        except BaseException:
+            handled = 0
+            raise
+        finally:
+            if handled < len(batch):
+                self.wagon_buffer.push_front(batch[handled:])
+        if self._journal is not None:
+            for wagon_info in batch[:handled]:
+                self._journal.record_wagon(wagon_info)
+        return handled
+
+    def check_event(self, candidate: EventType) -> str | None:
+        """
+        Проверка события на согласованном состоянии.
+
+        :param candidate: Событие-кандидат для проверки.
+        :return: Строка с событием, если оно прошло проверку, либо None.
+        """
+        with self.state_lock:
+            return super().check_event(candidate)
@@ -0,0 +1,159 @@
+"""
+Модуль с журналом событий сортировочной горки.
+
+Формат файла: заголовок MAGIC, затем записи фиксированной длины - беззнаковые 64-битные
+числа в порядке байтов little-endian. Старший байт записи - код события, младшие биты -
+данные события: упакованный вагон для WagonArrived (см. compact.pack_wagon)
+и код модели локомотива для LocoArrived. Недописанная при сбое последняя запись
+при чтении отбрасывается.
+"""
+
+import os
+import sys
+from array import array
+from collections.abc import Iterator
+from typing import Self
+
+from sorting_hill.compact import _TYPE_BITS, _WAGON_TYPE_CODES, pack_wagon, unpack_wagon
+from sorting_hill.consts import EventType, LocoType
+
+MAGIC = b'SHJ1'
+
+_EVENTS: tuple[EventType, ...] = tuple(EventType)
+_EVENT_CODES: dict[str, int] = {event: code for code, event in enumerate(_EVENTS)}
+_LOCOS: tuple[LocoType, ...] = tuple(LocoType)
+_LOCO_CODES: dict[str, int] = {loco: code for code, loco in enumerate(_LOCOS)}
+
+_CODE_SHIFT = 56
+_PAYLOAD_MASK = (1 << _CODE_SHIFT) - 1
+_RECORD_SIZE = array('Q').itemsize
+_WAGON_RECORD = _EVENT_CODES[EventType.WagonArrived] << _CODE_SHIFT
+_LOCO_RECORD = _EVENT_CODES[EventType.LocoArrived] << _CODE_SHIFT
+_EVENT_RECORDS: dict[str, int] = {event: code << _CODE_SHIFT for event, code in _EVENT_CODES.items()}
+
+
+class EventJournal:
+    """
+    Журнал принятых событий с групповой фиксацией.
+
+    Записи копятся в массиве и пишутся в файл одним вызовом write, а fsync выполняется
+    один раз на группу из group_size записей, а не на каждое событие.
+    """
+
+    def __init__(self, path: str | os.PathLike, group_size: int = 4096, fsync: bool = True) -> None:
+        """
+        Инициализация журнала; существующий файл дописывается.
+
+        :param path: Путь к файлу журнала.
+        :param group_size: Количество записей в группе фиксации.
+        :param fsync: Сбрасывать ли группу на диск через os.fsync.
+        """
+        self.path = path
+        self.group_size = group_size
+        self.fsync = fsync
+        self._records = array('Q')
+        # Файл открыт, пока журнал пишется, и закрывается в close()
+        self._file = open(path, 'ab')  # noqa: SIM115
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+
+    def record(self, event: EventType) -> None:
+        """
+        Записать событие без данных.
+
+        :param event: Событие.
+        """
+        self._records.append(_EVENT_RECORDS[event])
+        if len(self._records) >= self.group_size:
+            self.commit()
+
+    def record_wagon(self, wagon_info: str) -> None:
+        """
+        Записать обработанный вагон.
+
+        :param wagon_info: Строка с информацией о вагоне в формате НОМЕР/Т(ип)
+        """
+        # Вагон уже принят хэндлерами, поэтому формат перепроверяется только для неизвестного типа
+        number, _, wagon_type = wagon_info.partition('/')
+        code = _WAGON_TYPE_CODES.get(wagon_type)
+        packed = int(number) << _TYPE_BITS | code if code is not None else pack_wagon(wagon_info)
+        self._records.append(_WAGON_RECORD | packed)
+        if len(self._records) >= self.group_size:
+            self.commit()
+
+    def record_packed(self, packed: int) -> None:
+        """
+        Записать обработанный вагон, уже упакованный очередью (см. compact.pack_wagon).
+
+        :param packed: Упакованный вагон.
+        """
+        self._records.append(_WAGON_RECORD | packed)
+        if len(self._records) >= self.group_size:
+            self.commit()
+
+    def record_loco(self, locomotive: str) -> None:
+        """
+        Записать прибывший локомотив.
+
+        :param locomotive: Модель локомотива в формате МОДЕЛЬ-ЧислоВагоновМакс
+        """
+        self._records.append(_LOCO_RECORD | _LOCO_CODES[locomotive])
+        if len(self._records) >= self.group_size:
+            self.commit()
+
+    def commit(self) -> None:
+        """Записать накопленную группу и сбросить её на диск"""
+        records = self._records
+        if not records:
+            return
+        if sys.byteorder == 'big':
+            records.byteswap()
+        self._file.write(records)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._records = array('Q')
+
+    def close(self) -> None:
+        """Зафиксировать остаток и закрыть файл"""
+        if self._file.closed:
+            return
+        self.commit()
+        self._file.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_journal(path: str | os.PathLike) -> Iterator[tuple[EventType, str | None]]:
+    """
+    Прочитать журнал.
+
+    :param path: Путь к файлу журнала.
+    :return: Пары (событие, вагон или локомотив либо None) в порядке записи.
+    :raises ValueError: Если файл не является журналом горки.
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f'not a sorting hill journal: {path}')
+
+    body = memoryview(data)[len(MAGIC):]
+    records = array('Q')
+    records.frombytes(body[:len(body) - len(body) % _RECORD_SIZE])
+    if sys.byteorder == 'big':
+        records.byteswap()
+
+    wagon_record = _WAGON_RECORD >> _CODE_SHIFT
+    loco_record = _LOCO_RECORD >> _CODE_SHIFT
+    for record in records:
+        code = record >> _CODE_SHIFT
+        if code == wagon_record:
+            yield EventType.WagonArrived, unpack_wagon(record & _PAYLOAD_MASK)
+        elif code == loco_record:
+            yield EventType.LocoArrived, _LOCOS[record & _PAYLOAD_MASK]
+        else:
+            yield _EVENTS[code], None
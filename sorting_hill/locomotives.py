@@ -0,0 +1,77 @@
+"""
+Модуль с характеристиками локомотивов.
+
+Характеристики выводятся из модели локомотива (СЕРИЯ-ЧислоВагоновМакс) один раз при импорте
+для каждого члена LocoType: вместимость - из номера модели, тяга - по таблице SERIES_TRACTION.
+Новая модель известной серии получает характеристики без правок этого модуля, а новую серию
+нужно внести в таблицу, иначе импорт завершится ошибкой.
+"""
+
+from dataclasses import dataclass
+from enum import StrEnum
+
+from sorting_hill.consts import LocoType
+
+
+class Traction(StrEnum):
+    Electric = 'электровоз'
+    Diesel = 'тепловоз'
+
+
+SERIES_TRACTION: dict[str, Traction] = {
+    'ЭВЛ': Traction.Electric,
+    'ДЛ': Traction.Diesel,
+    'ТДЛ': Traction.Diesel,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class LocoSpec:
+    """Характеристики модели локомотива"""
+
+    model: str
+    series: str
+    capacity: int
+    traction: Traction
+
+
+def resolve_loco(model: str) -> LocoSpec:
+    """
+    Разобрать модель локомотива.
+
+    :param model: Модель локомотива в формате СЕРИЯ-ЧислоВагоновМакс
+    :return: Характеристики модели.
+    :raises ValueError: Если модель не соответствует формату или серии нет в SERIES_TRACTION.
+    """
+    series, _, capacity = model.rpartition('-')
+    if not series or not capacity.isdigit() or int(capacity) <= 0:
+        raise ValueError(f'bad locomotive model: {model}')
+    traction = SERIES_TRACTION.get(series)
+    if traction is None:
+        raise ValueError(f'unknown locomotive series: {series}')
+    return LocoSpec(model, series, int(capacity), traction)
+
+
+LOCO_SPECS: dict[str, LocoSpec] = {loco.value: resolve_loco(loco) for loco in LocoType}
+
+_LOCO_CAPACITY: dict[str, int] = {loco: spec.capacity for loco, spec in LOCO_SPECS.items()}
+
+
+def loco_spec(loco: object) -> LocoSpec | None:
+    """
+    Характеристики локомотива.
+
+    :param loco: Элемент состава, предположительно локомотив.
+    :return: Характеристики модели, либо None, если это не локомотив.
+    """
+    return LOCO_SPECS.get(loco)
+
+
+def loco_capacity(loco: object) -> int | None:
+    """
+    Вместимость локомотива.
+
+    :param loco: Элемент состава, предположительно локомотив.
+    :return: Максимальное число вагонов, либо None, если это не локомотив.
+    """
+    return _LOCO_CAPACITY.get(loco)
@@ -0,0 +1,290 @@
+"""
+Модуль с потоковой загрузкой манифеста вагонов.
+
+Поддерживаются два формата:
+- текстовый: по вагону в строке в формате НОМЕР/Т(ип), пустые строки пропускаются;
+- упакованный: заголовок MAGIC, затем вагоны беззнаковыми 64-битными числами
+  в порядке байтов little-endian (см. compact.pack_wagon).
+
+Манифест читается порциями ограниченного размера по мере снятия вагонов из очереди,
+поэтому ни время запуска, ни занимаемая память не зависят от размера файла.
+
+Упаковка текстового манифеста:
+    python -m sorting_hill.manifest wagons.txt wagons.bin
+"""
+
+import argparse
+import os
+import sys
+from array import array
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from itertools import islice
+
+from sorting_hill.compact import CompactWagonQueue, pack_wagon, unpack_wagon
+
+MAGIC = b'SHM1'
+
+_ITEM_SIZE = array('Q').itemsize
+_COUNT_BLOCK = 1 << 20
+
+
+def iter_text_manifest(path: str | os.PathLike, chunk_size: int = 4096, start: int = 0) -> Iterator[array]:
+    """
+    Прочитать текстовый манифест порциями.
+
+    :param path: Путь к файлу манифеста.
+    :param chunk_size: Количество вагонов в порции.
+    :param start: Сколько первых вагонов пропустить, не разбирая их строк.
+    :return: Порции упакованных вагонов в порядке файла.
+    :raises ValueError: Если непустая строка манифеста не соответствует формату.
+    """
+    with open(path, encoding='utf-8') as file:
+        chunk = array('Q')
+        for line_number, line in enumerate(file, 1):
+            if line.isspace():
+                continue
+            if start:
+                start -= 1
+                continue
+            wagon_info = line.rstrip('\r\n')
+            try:
+                chunk.append(pack_wagon(wagon_info))
+            except ValueError:
+                raise ValueError(f'bad manifest line {line_number}: {wagon_info!r}') from None
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = array('Q')
+        if chunk:
+            yield chunk
+
+
+def iter_binary_manifest(path: str | os.PathLike, chunk_size: int = 4096, start: int = 0) -> Iterator[array]:
+    """
+    Прочитать упакованный манифест порциями, без разбора строк.
+
+    :param path: Путь к файлу манифеста.
+    :param chunk_size: Количество вагонов в порции.
+    :param start: Сколько первых вагонов пропустить (переход по смещению в файле).
+    :return: Порции упакованных вагонов в порядке файла.
+    :raises ValueError: Если файл не является упакованным манифестом.
+    """
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'not a packed wagon manifest: {path}')
+        file.seek(start * _ITEM_SIZE, os.SEEK_CUR)
+        while True:
+            chunk = array('Q')
+            try:
+                chunk.fromfile(file, chunk_size)
+            except EOFError:
+                pass
+            if not chunk:
+                return
+            if sys.byteorder == 'big':
+                chunk.byteswap()
+            yield chunk
+
+
+def write_manifest(path: str | os.PathLike, wagons: Iterable[str], chunk_size: int = 4096) -> int:
+    """
+    Записать упакованный манифест.
+
+    :param path: Путь к файлу манифеста.
+    :param wagons: Вагоны в порядке поступления.
+    :param chunk_size: Количество вагонов, упаковываемых перед записью.
+    :return: Количество записанных вагонов.
+    """
+    packed = map(pack_wagon, wagons)
+    chunks = iter(lambda: array('Q', islice(packed, chunk_size)), array('Q'))
+    return _write_chunks(path, chunks)
+
+
+def _write_chunks(path: str | os.PathLike, chunks: Iterable[array]) -> int:
+    written = 0
+    with open(path, 'wb') as file:
+        file.write(MAGIC)
+        for chunk in chunks:
+            if sys.byteorder == 'big':
+                chunk.byteswap()
+            chunk.tofile(file)
+            written += len(chunk)
+    return written
+
+
+def _count_lines(path: str | os.PathLike) -> int:
+    """Количество непустых строк текстового манифеста, без разбора вагонов"""
+    count = 0
+    rest = b''
+    with open(path, 'rb') as file:
+        while block := file.read(_COUNT_BLOCK):
+            lines = (rest + block).split(b'\n')
+            rest = lines.pop()
+            count += sum(1 for line in lines if line.strip())
+    return count + bool(rest.strip())
+
+
+class ManifestWagonQueue(CompactWagonQueue):
+    """
+    Очередь вагонов, которая подгружает манифест порциями по мере снятия.
+
+    В памяти держится только текущая порция (и порции, до которых дошёл просмотр очереди).
+    Вагоны, поставленные в очередь до конца манифеста, встают за ним.
+    Длина упакованного манифеста известна по размеру файла (total), длина текстового
+    считается только при первом вызове len() одним проходом по файлу без разбора строк.
+    Контрольная точка получает непрочитанную часть манифеста порциями из повторно
+    открытого файла (reopen), не подгружая её в очередь.
+    """
+
+    __slots__ = ('_chunks', '_count', '_loaded', '_reopen', '_tail', '_total')
+
+    def __init__(
+        self,
+        chunks: Iterator[array],
+        count: Callable[[], int],
+        total: int | None = None,
+        reopen: Callable[[int], Iterator[array]] | None = None,
+    ) -> None:
+        """
+        Инициализация очереди.
+
+        :param chunks: Порции упакованных вагонов манифеста.
+        :param count: Функция, возвращающая количество вагонов в манифесте.
+        :param total: Количество вагонов в манифесте, если оно известно без прохода по файлу.
+        :param reopen: Функция, читающая манифест порциями заново с вагона с заданным номером;
+            без неё packed_chunks() подгружает остаток манифеста в очередь.
+        """
+        super().__init__()
+        self._chunks: Iterator[array] | None = chunks
+        self._count = count
+        self._total = total
+        self._reopen = reopen
+        self._loaded = 0
+        self._tail = array('Q')
+
+    @property
+    def total(self) -> int | None:
+        """Количество вагонов в манифесте, либо None, если его ещё не считали"""
+        return self._total
+
+    def _load(self) -> bool:
+        """Подгрузить следующую порцию; False, если подгружать нечего"""
+        if self._chunks is None:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            # Манифест прочитан: вагоны, поставленные за ним, переходят в основную очередь
+            self._chunks = None
+            self._items.extend(self._tail)
+            self._tail = array('Q')
+            return len(self._items) > self._head
+        self._items.extend(chunk)
+        self._loaded += len(chunk)
+        return True
+
+    def _ensure(self, index: int = 0) -> bool:
+        while self._head + index >= len(self._items):
+            if not self._load():
+                return False
+        return True
+
+    def append(self, wagon_info: str) -> None:
+        (self._items if self._chunks is None else self._tail).append(pack_wagon(wagon_info))
+
+    def extend(self, wagons: Iterable[str]) -> None:
+        (self._items if self._chunks is None else self._tail).extend(map(pack_wagon, wagons))
+
+    enqueue_many = extend
+
+    def peek(self) -> str | None:
+        return super().peek() if self._ensure() else None
+
+    def popleft_packed(self) -> int:
+        self._ensure()
+        return super().popleft_packed()
+
+    def clear(self) -> None:
+        if self._chunks is not None:
+            close = getattr(self._chunks, 'close', None)
+            if close is not None:
+                close()
+            self._chunks = None
+        self._tail = array('Q')
+        super().clear()
+
+    def packed(self) -> array:
+        packed = array('Q')
+        for chunk in self.packed_chunks():
+            packed.extend(chunk)
+        return packed
+
+    def packed_chunks(self) -> Iterator[array]:
+        if self._chunks is None or self._reopen is None:
+            while self._load():
+                pass
+            yield from super().packed_chunks()
+            return
+        yield self._items[self._head:]
+        yield from self._reopen(self._loaded)
+        yield self._tail[:]
+
+    def __len__(self) -> int:
+        unread = 0
+        if self._chunks is not None:
+            if self._total is None:
+                self._total = self._count()
+            unread = self._total - self._loaded
+        return super().__len__() + unread + len(self._tail)
+
+    def __bool__(self) -> bool:
+        return self._ensure()
+
+    def __iter__(self) -> Iterator[str]:
+        index = 0
+        while self._ensure(index):
+            yield unpack_wagon(self._items[self._head + index])
+            index += 1
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            while self._load():
+                pass
+        elif self._ensure(index):
+            return unpack_wagon(self._items[self._head + index])
+        return super().__getitem__(index)
+
+
+def open_manifest(path: str | os.PathLike, chunk_size: int = 4096) -> ManifestWagonQueue:
+    """
+    Открыть манифест как очередь вагонов; формат определяется по заголовку файла.
+
+    :param path: Путь к файлу манифеста.
+    :param chunk_size: Количество вагонов в подгружаемой порции.
+    :return: Очередь, читающая манифест порциями.
+    """
+    with open(path, 'rb') as file:
+        binary = file.read(len(MAGIC)) == MAGIC
+    if binary:
+        total = (os.path.getsize(path) - len(MAGIC)) // _ITEM_SIZE
+        return ManifestWagonQueue(
+            iter_binary_manifest(path, chunk_size), lambda: total, total,
+            lambda start: iter_binary_manifest(path, chunk_size, start),
+        )
+    return ManifestWagonQueue(
+        iter_text_manifest(path, chunk_size), lambda: _count_lines(path),
+        reopen=lambda start: iter_text_manifest(path, chunk_size, start),
+    )
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Точка входа упаковки текстового манифеста"""
+    parser = argparse.ArgumentParser(description='Упаковка текстового манифеста вагонов')
+    parser.add_argument('source', help='текстовый манифест, по вагону в строке')
+    parser.add_argument('target', help='файл упакованного манифеста')
+    args = parser.parse_args(argv)
+
+    written = _write_chunks(args.target, iter_text_manifest(args.source))
+    print(f'Упаковано вагонов: {written}')
+
+
+if __name__ == '__main__':
+    main()
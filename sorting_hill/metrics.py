@@ -0,0 +1,128 @@
+"""Модуль с метриками сортировочной горки"""
+
+from collections.abc import Callable
+from time import perf_counter_ns
+
+SECTION_EVENTS = 'events'
+SECTION_HANDLERS = 'handlers'
+SECTION_CHECKS = 'checks'
+
+
+class LatencyHistogram:
+    """
+    Гистограмма задержек с корзинами по степеням двойки (в наносекундах).
+
+    Запись значения - одна операция bit_length и инкремент счётчика.
+    """
+
+    __slots__ = ('_buckets', 'count', 'max_ns', 'total_ns')
+
+    def __init__(self) -> None:
+        """Инициализация гистограммы"""
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self._buckets = [0] * 64
+
+    def record(self, elapsed_ns: int) -> None:
+        """
+        Записать задержку.
+
+        :param elapsed_ns: Задержка в наносекундах.
+        """
+        self.count += 1
+        self.total_ns += elapsed_ns
+        self.max_ns = max(self.max_ns, elapsed_ns)
+        self._buckets[min(elapsed_ns.bit_length(), 63)] += 1
+
+    def snapshot(self) -> dict:
+        """
+        Снимок гистограммы.
+
+        :return: Число вызовов, суммарное, среднее и максимальное время, корзины {верхняя граница, нс: число}.
+        """
+        return {
+            'count': self.count,
+            'total_ns': self.total_ns,
+            'mean_ns': self.total_ns / self.count if self.count else 0.0,
+            'max_ns': self.max_ns,
+            'buckets': {1 << index: count for index, count in enumerate(self._buckets) if count},
+        }
+
+
+class HillMetrics:
+    """
+    Метрики SortingHill: гистограммы по событиям, методам хэндлеров и проверкам,
+    счётчики принятых и отклонённых проверок check_event.
+    """
+
+    def __init__(self) -> None:
+        """Инициализация метрик"""
+        self._histograms: dict[str, dict[str, LatencyHistogram]] = {
+            SECTION_EVENTS: {},
+            SECTION_HANDLERS: {},
+            SECTION_CHECKS: {},
+        }
+        self._checks: dict[str, list[int]] = {}
+
+    def histogram(self, section: str, name: str) -> LatencyHistogram:
+        """
+        Гистограмма по имени, создаётся при первом обращении.
+
+        :param section: Раздел метрик (events, handlers, checks).
+        :param name: Имя метрики.
+        :return: Гистограмма.
+        """
+        histograms = self._histograms[section]
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = LatencyHistogram()
+        return histogram
+
+    def timed(self, section: str, name: str, func: Callable) -> Callable:
+        """
+        Обернуть вызываемый объект замером времени.
+
+        :param section: Раздел метрик.
+        :param name: Имя метрики.
+        :param func: Вызываемый объект.
+        :return: Обёртка, записывающая задержку каждого вызова, в том числе завершившегося исключением.
+        """
+        record = self.histogram(section, name).record
+
+        def wrapper(*args, **kwargs):
+            started = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(perf_counter_ns() - started)
+
+        return wrapper
+
+    def count_check(self, event: str, accepted: bool) -> None:
+        """
+        Учесть результат проверки события.
+
+        :param event: Событие-кандидат.
+        :param accepted: Прошло ли событие проверку.
+        """
+        counters = self._checks.get(event)
+        if counters is None:
+            counters = self._checks[event] = [0, 0]
+        counters[0 if accepted else 1] += 1
+
+    def snapshot(self) -> dict:
+        """
+        Снимок всех метрик.
+
+        :return: Словарь с разделами events, handlers, checks и check_results.
+        """
+        result = {
+            section: {name: histogram.snapshot() for name, histogram in histograms.items()}
+            for section, histograms in self._histograms.items()
+        }
+        result['check_results'] = {
+            event: {'accepted': accepted, 'rejected': rejected}
+            for event, (accepted, rejected) in self._checks.items()
+        }
+        return result
@@ -0,0 +1,165 @@
+"""
+Модуль с параллельным прогоном смен методом Монте-Карло.
+
+Независимые смены с разными зёрнами и числом путей раздаются по процессам ProcessPoolExecutor.
+Каждый процесс возвращает только компактные итоги смены, а не состояние горки.
+
+Запуск:
+    python -m sorting_hill.monte_carlo --shifts 1000 --paths 2-15 --wagons 4096
+"""
+
+import argparse
+import os
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from sorting_handler.sorting_operator import SortingOperatorImpl
+from sorting_hill.locomotives import loco_capacity
+from sorting_hill.mutations import LocoAttached, Mutation, TrainRenamed, TrainSent
+from sorting_hill.simulation import run_shift
+
+
+@dataclass(frozen=True, slots=True)
+class ShiftStats:
+    """Компактные итоги одной смены"""
+
+    seed: int
+    number_of_paths: int
+    trains_sent: int
+    fill_ratio: float
+    leftover_wagons: int
+
+
+class _FillTracker:
+    """Подписчик на поток изменений: средняя заполненность отправленных поездов"""
+
+    def __init__(self) -> None:
+        self.capacities: dict[str, int] = {}
+        self.fill_total = 0.0
+        self.trains = 0
+
+    def __call__(self, mutation: Mutation) -> None:
+        if isinstance(mutation, LocoAttached):
+            self.capacities[mutation.train] = loco_capacity(mutation.loco)
+        elif isinstance(mutation, TrainRenamed):
+            if mutation.old_train in self.capacities:
+                self.capacities[mutation.new_train] = self.capacities.pop(mutation.old_train)
+        elif isinstance(mutation, TrainSent):
+            capacity = self.capacities.pop(mutation.train, None)
+            if capacity:
+                self.fill_total += mutation.wagons / capacity
+                self.trains += 1
+
+    @property
+    def fill_ratio(self) -> float:
+        return self.fill_total / self.trains if self.trains else 0.0
+
+
+def simulate_shift(task: tuple[int, int, int | None]) -> ShiftStats:
+    """
+    Прогнать одну смену в процессе-исполнителе.
+
+    :param task: Зерно, количество путей и количество вагонов (None - как в main()).
+    :return: Итоги смены.
+    """
+    seed, number_of_paths, number_of_wagons = task
+    tracker = _FillTracker()
+    summary = run_shift(
+        seed=seed,
+        number_of_paths=number_of_paths,
+        number_of_wagons=number_of_wagons,
+        handlers=(SortingOperatorImpl,),
+        subscribers=(tracker,),
+    )
+    return ShiftStats(
+        seed=seed,
+        number_of_paths=number_of_paths,
+        trains_sent=summary.trains_sent,
+        fill_ratio=tracker.fill_ratio,
+        leftover_wagons=summary.wagons_left + summary.wagons_on_tracks,
+    )
+
+
+def run_monte_carlo(
+    shifts: int,
+    paths_values: Iterable[int],
+    number_of_wagons: int | None = None,
+    base_seed: int = 0,
+    workers: int | None = None,
+) -> list[ShiftStats]:
+    """
+    Прогнать смены параллельно.
+
+    :param shifts: Количество смен на каждое значение числа путей.
+    :param paths_values: Значения числа путей.
+    :param number_of_wagons: Количество вагонов в смене (None - как в main()).
+    :param base_seed: Зерно первой смены; смены получают последовательные зёрна.
+    :param workers: Количество процессов, по умолчанию - число ядер.
+    :return: Итоги смен в порядке задач.
+    """
+    tasks = [
+        (base_seed + index, number_of_paths, number_of_wagons)
+        for number_of_paths in paths_values
+        for index in range(shifts)
+    ]
+    workers = workers or os.cpu_count() or 1
+    # Крупные порции снижают накладные расходы на передачу задач между процессами
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(simulate_shift, tasks, chunksize=chunksize))
+
+
+def aggregate(stats: Iterable[ShiftStats]) -> dict[int, dict[str, float]]:
+    """
+    Свести итоги смен по количеству путей.
+
+    :param stats: Итоги смен.
+    :return: Для каждого числа путей: количество смен, средние отправленные поезда,
+        заполненность и оставшиеся вагоны.
+    """
+    totals: dict[int, list[float]] = {}
+    for item in stats:
+        total = totals.setdefault(item.number_of_paths, [0, 0.0, 0.0, 0.0])
+        total[0] += 1
+        total[1] += item.trains_sent
+        total[2] += item.fill_ratio
+        total[3] += item.leftover_wagons
+
+    return {
+        number_of_paths: {
+            'shifts': count,
+            'trains_sent': trains_sent / count,
+            'fill_ratio': fill_ratio / count,
+            'leftover_wagons': leftover / count,
+        }
+        for number_of_paths, (count, trains_sent, fill_ratio, leftover) in sorted(totals.items())
+    }
+
+
+def _parse_paths(value: str) -> range:
+    first, _, last = value.partition('-')
+    return range(int(first), int(last or first) + 1)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Точка входа параллельного прогона"""
+    parser = argparse.ArgumentParser(description='Параллельный прогон смен сортировочной горки')
+    parser.add_argument('--shifts', type=int, default=100, help='смен на каждое значение числа путей')
+    parser.add_argument('--paths', type=_parse_paths, default=range(2, 16), help='число путей или диапазон, например 2-15')
+    parser.add_argument('--wagons', type=int, default=None, help='количество вагонов в смене')
+    parser.add_argument('--seed', type=int, default=0, help='зерно первой смены')
+    parser.add_argument('--workers', type=int, default=None, help='количество процессов')
+    args = parser.parse_args(argv)
+
+    stats = run_monte_carlo(args.shifts, args.paths, args.wagons, args.seed, args.workers)
+    print(f'{"пути":>6} {"смен":>6} {"поездов":>10} {"заполн.":>8} {"остаток":>8}')
+    for number_of_paths, row in aggregate(stats).items():
+        print(
+            f'{number_of_paths:>6} {row["shifts"]:>6} {row["trains_sent"]:>10.1f} '
+            f'{row["fill_ratio"]:>8.3f} {row["leftover_wagons"]:>8.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
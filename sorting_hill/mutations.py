@@ -0,0 +1,103 @@
+"""Модуль с потоком изменений состояния сортировочной горки"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class PathPrepared:
+    """Путь подготовлен"""
+
+    path: int
+
+
+@dataclass(frozen=True, slots=True)
+class TrainAllocated:
+    """Поезд запланирован на подготовленном пути"""
+
+    path: int
+    train: str
+
+
+@dataclass(frozen=True, slots=True)
+class LocoAttached:
+    """К составу прицеплен локомотив"""
+
+    train: str
+    loco: str
+
+
+@dataclass(frozen=True, slots=True)
+class WagonAttached:
+    """К составу прицеплен вагон"""
+
+    train: str
+    wagon_info: str
+
+
+@dataclass(frozen=True, slots=True)
+class TrainRenamed:
+    """Поезд переименован (например, получил тип по первому вагону)"""
+
+    old_train: str
+    new_train: str
+
+
+@dataclass(frozen=True, slots=True)
+class TrainSent:
+    """Поезд отправлен"""
+
+    train: str
+    wagons: int
+
+
+@dataclass(frozen=True, slots=True)
+class PathFreed:
+    """Путь освобождён"""
+
+    path: int
+    train: str | None
+
+
+Mutation = PathPrepared | TrainAllocated | LocoAttached | WagonAttached | TrainRenamed | TrainSent | PathFreed
+
+
+class MutationFeed:
+    """
+    Раздача записей об изменениях подписчикам внутри процесса.
+
+    Источники проверяют subscribers перед построением записи, поэтому без подписчиков
+    поток изменений почти ничего не стоит.
+    """
+
+    __slots__ = ('subscribers',)
+
+    def __init__(self) -> None:
+        """Инициализация потока"""
+        self.subscribers: list[Callable[[Mutation], None]] = []
+
+    def subscribe(self, callback: Callable[[Mutation], None]) -> None:
+        """
+        Подписаться на изменения.
+
+        :param callback: Вызывается с каждой записью в порядке изменений.
+        """
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Mutation], None]) -> None:
+        """
+        Отписаться от изменений.
+
+        :param callback: Ранее подписанный вызываемый объект.
+        :raises ValueError: Если подписчик не найден.
+        """
+        self.subscribers.remove(callback)
+
+    def publish(self, mutation: Mutation) -> None:
+        """
+        Разослать запись подписчикам.
+
+        :param mutation: Запись об изменении.
+        """
+        for callback in self.subscribers:
+            callback(mutation)
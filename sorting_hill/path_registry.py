@@ -0,0 +1,135 @@
+"""Модуль с реестром путей сортировочной горки"""
+
+import heapq
+
+from sorting_hill.mutations import MutationFeed, PathFreed, PathPrepared, TrainAllocated
+
+
+class PathRegistry(dict):
+    """
+    Словарь подготовленных путей (номер пути -> номер поезда или None).
+
+    Поддерживает:
+    - unassigned: подготовленные пути, на которые ещё не поставлен поезд;
+    - обратный индекс номер поезда -> путь, поэтому путь поезда находится без обхода путей;
+    - кучу свободных номеров путей для выдачи первого свободного пути за O(log n);
+    - накопительные счётчики подготовленных путей и запланированных на них поездов.
+    Проверки допустимости событий по путям выполняются за O(1).
+    """
+
+    def __init__(self, number_of_paths: int, feed: MutationFeed | None = None) -> None:
+        """
+        Инициализация реестра.
+
+        :param number_of_paths: Количество путей.
+        :param feed: Поток изменений для записей PathPrepared, TrainAllocated и PathFreed.
+        """
+        super().__init__()
+        self.feed = feed or MutationFeed()
+        self.number_of_paths = number_of_paths
+        self.unassigned: dict[int, None] = {}
+        self._train_paths: dict[str, int] = {}
+        self._free = list(range(1, number_of_paths + 1))
+        self._in_heap = set(self._free)
+        self.paths_prepared = 0
+        self.trains_planned = 0
+
+    @property
+    def free_count(self) -> int:
+        """Количество свободных (неподготовленных) путей"""
+        return max(0, self.number_of_paths - len(self))
+
+    def next_free(self) -> int | None:
+        """
+        Первый свободный путь.
+
+        :return: Наименьший номер неподготовленного пути, либо None, если свободных путей нет.
+        """
+        free = self._free
+        while free and free[0] in self:
+            self._in_heap.discard(heapq.heappop(free))
+        return free[0] if free else None
+
+    def next_unassigned(self) -> int | None:
+        """
+        Подготовленный путь без поезда.
+
+        :return: Номер пути, либо None, если все подготовленные пути заняты.
+        """
+        return next(iter(self.unassigned), None)
+
+    def path_of(self, train: str) -> int | None:
+        """
+        Путь, на котором стоит поезд.
+
+        :param train: Номер поезда.
+        :return: Номер пути, либо None, если поезд не стоит на пути.
+        """
+        return self._train_paths.get(train)
+
+    def _unlink(self, path: int, train: str | None) -> None:
+        if train is not None and self._train_paths.get(train) == path:
+            del self._train_paths[train]
+
+    def _release(self, path: int, train: str | None) -> None:
+        if self.feed.subscribers:
+            self.feed.publish(PathFreed(path, train))
+        self._unlink(path, train)
+        self.unassigned.pop(path, None)
+        if 1 <= path <= self.number_of_paths and path not in self._in_heap:
+            self._in_heap.add(path)
+            heapq.heappush(self._free, path)
+
+    def __setitem__(self, path: int, train: str | None) -> None:
+        prepared = path not in self
+        previous = None if prepared else super().__getitem__(path)
+        allocated = train is not None and previous is None
+        super().__setitem__(path, train)
+        self._unlink(path, previous)
+        if train is not None:
+            self._train_paths[train] = path
+        if prepared:
+            self.paths_prepared += 1
+        if allocated:
+            self.trains_planned += 1
+
+        if self.feed.subscribers:
+            if prepared:
+                self.feed.publish(PathPrepared(path))
+            if allocated:
+                self.feed.publish(TrainAllocated(path, train))
+        if train is None:
+            self.unassigned.setdefault(path)
+        else:
+            self.unassigned.pop(path, None)
+
+    def __delitem__(self, path: int) -> None:
+        train = super().pop(path)
+        self._release(path, train)
+
+    def pop(self, path: int, *default):
+        if path not in self:
+            if default:
+                return default[0]
+            raise KeyError(path)
+        train = super().pop(path)
+        self._release(path, train)
+        return train
+
+    def popitem(self) -> tuple[int, str | None]:
+        path, train = super().popitem()
+        self._release(path, train)
+        return path, train
+
+    def setdefault(self, path: int, default: str | None = None) -> str | None:
+        if path not in self:
+            self[path] = default
+        return self[path]
+
+    def update(self, *args, **kwargs) -> None:
+        for path, train in dict(*args, **kwargs).items():
+            self[path] = train
+
+    def clear(self) -> None:
+        for path in list(self):
+            del self[path]
@@ -0,0 +1,295 @@
+"""
+Модуль с профилированием смены.
+
+Смена с фиксированным зерном прогоняется одним из двух способов:
+- под cProfile: детерминированный профиль всех вызовов, пишется в файл pstats;
+- под семплирующим профилировщиком: фоновый поток через равные промежутки снимает стек
+  основного потока, свёрнутые стеки пишутся в файл для flamegraph.pl или speedscope.
+Накладные расходы семплирования не зависят от числа вызовов, поэтому его профиль
+ближе к настоящему распределению времени, чем профиль cProfile.
+
+Сводка сужается до SortingHill.handle_event, SortingHill.check_event и методов хэндлеров,
+чтобы при регрессии сразу было видно, какая часть горки или хэндлеров виновата.
+
+Запуск:
+    python -m sorting_hill.profiling --seed 0 --output profile/shift
+    python -m sorting_hill.profiling --seed 0 --mode sample --output profile/shift
+"""
+
+import argparse
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Sequence
+from dataclasses import dataclass
+from types import CodeType
+from typing import Self
+
+from sorting_hill.simulation import DEFAULT_HANDLERS, PLANNER_HANDLERS, run_shift
+
+MODE_CPROFILE = 'cprofile'
+MODE_SAMPLE = 'sample'
+MODES = (MODE_CPROFILE, MODE_SAMPLE)
+
+_HILL_FILE = 'sorting_hill.py'
+_HILL_METHODS = frozenset({'handle_event', 'check_event'})
+_HANDLER_PACKAGE = 'sorting_handler'
+
+
+def scope_name(filename: str, function: str) -> str | None:
+    """
+    Имя функции в сводке профиля.
+
+    :param filename: Файл, в котором определена функция.
+    :param function: Имя функции.
+    :return: SortingHill.<метод> для handle_event и check_event, <модуль>.<метод> для методов
+        хэндлеров, либо None, если функция не входит в сводку.
+    """
+    directory, basename = os.path.split(filename)
+    if basename == _HILL_FILE and function in _HILL_METHODS:
+        return f'SortingHill.{function}'
+    if os.path.basename(directory) == _HANDLER_PACKAGE and not function.startswith('<'):
+        return f'{basename.removesuffix(".py")}.{function}'
+    return None
+
+
+@dataclass(frozen=True, slots=True)
+class ScopeStat:
+    """Строка сводки профиля"""
+
+    name: str
+    calls: int | None
+    self_time: float
+    total_time: float
+
+
+class StackSampler:
+    """
+    Семплирующий профилировщик одного потока.
+
+    Фоновый поток каждые interval секунд снимает стек профилируемого потока
+    и считает одинаковые стеки. Стеки хранятся кортежами объектов кода,
+    подписи кадров строятся только при выводе. На время семплирования интервал
+    переключения GIL уменьшается до interval, иначе фоновый поток просыпается
+    не чаще раза в 5 мс.
+    """
+
+    def __init__(self, interval: float = 0.001, thread_id: int | None = None) -> None:
+        """
+        Инициализация профилировщика.
+
+        :param interval: Промежуток между снимками стека, в секундах.
+        :param thread_id: Идентификатор профилируемого потока, по умолчанию - поток, вызвавший start().
+        """
+        self.interval = interval
+        self.thread_id = thread_id
+        self.counts: Counter[tuple[CodeType, ...]] = Counter()
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started = 0.0
+        self._switch_interval = sys.getswitchinterval()
+
+    def start(self) -> None:
+        """Начать семплирование"""
+        if self.thread_id is None:
+            self.thread_id = threading.get_ident()
+        self._stop.clear()
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval))
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Остановить семплирование"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.elapsed += time.perf_counter() - self._started
+        sys.setswitchinterval(self._switch_interval)
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        counts = self.counts
+        thread_id = self.thread_id
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            if stack:
+                stack.reverse()
+                counts[tuple(stack)] += 1
+
+    @staticmethod
+    def _label(code: CodeType) -> str:
+        module = os.path.basename(code.co_filename).removesuffix('.py')
+        return f'{module}:{code.co_qualname}'
+
+    def write_collapsed(self, path: str | os.PathLike) -> int:
+        """
+        Записать свёрнутые стеки: по строке «кадр;кадр;...;кадр число_снимков».
+
+        :param path: Путь к файлу.
+        :return: Количество записанных стеков.
+        """
+        labels: dict[CodeType, str] = {}
+        with open(path, 'w', encoding='utf-8') as file:
+            for stack, count in self.counts.most_common():
+                frames = ';'.join(labels.get(code) or labels.setdefault(code, self._label(code)) for code in stack)
+                file.write(f'{frames} {count}\n')
+        return len(self.counts)
+
+    def scope_stats(self) -> list[ScopeStat]:
+        """
+        Сводка по функциям сводки профиля.
+
+        Время функции оценивается долей снимков, в стеке которых она есть (total_time),
+        и снимков, в которых она ближайшая к вершине стека функция сводки (self_time).
+
+        :return: Строки сводки по убыванию полного времени.
+        """
+        samples = sum(self.counts.values())
+        if not samples:
+            return []
+        per_sample = self.elapsed / samples
+        names: dict[CodeType, str | None] = {}
+        inclusive: Counter[str] = Counter()
+        exclusive: Counter[str] = Counter()
+        for stack, count in self.counts.items():
+            scoped = []
+            for code in stack:
+                if code not in names:
+                    names[code] = scope_name(code.co_filename, code.co_name)
+                if names[code] is not None:
+                    scoped.append(names[code])
+            for name in set(scoped):
+                inclusive[name] += count
+            if scoped:
+                exclusive[scoped[-1]] += count
+        return sorted(
+            (ScopeStat(name, None, exclusive[name] * per_sample, total * per_sample)
+             for name, total in inclusive.items()),
+            key=lambda stat: stat.total_time,
+            reverse=True,
+        )
+
+
+def pstats_scope_stats(stats: pstats.Stats) -> list[ScopeStat]:
+    """
+    Сводка по функциям сводки профиля из профиля cProfile.
+
+    :param stats: Профиль cProfile.
+    :return: Строки сводки по убыванию полного времени.
+    """
+    calls: Counter[str] = Counter()
+    self_time: Counter[str] = Counter()
+    total_time: Counter[str] = Counter()
+    for (filename, _, function), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        name = scope_name(filename, function)
+        if name is not None:
+            calls[name] += ncalls
+            self_time[name] += tottime
+            total_time[name] += cumtime
+    return sorted(
+        (ScopeStat(name, calls[name], self_time[name], total_time[name]) for name in calls),
+        key=lambda stat: stat.total_time,
+        reverse=True,
+    )
+
+
+def profile_shift(
+    output: str | os.PathLike,
+    seed: int,
+    mode: str = MODE_CPROFILE,
+    interval: float = 0.001,
+    **shift_options,
+) -> list[ScopeStat]:
+    """
+    Прогнать смену под профилировщиком и записать профиль.
+
+    :param output: Путь к файлам профиля без расширения: <output>.pstats или <output>.folded.
+    :param seed: Зерно генератора случайных чисел.
+    :param mode: cprofile или sample.
+    :param interval: Промежуток между снимками стека в режиме sample, в секундах.
+    :param shift_options: Остальные параметры run_shift.
+    :return: Сводка по SortingHill.handle_event, check_event и методам хэндлеров.
+    :raises ValueError: Если передан неизвестный режим.
+    """
+    if mode not in MODES:
+        raise ValueError(f'unknown profiling mode: {mode}')
+    directory = os.path.dirname(os.fspath(output))
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    if mode == MODE_CPROFILE:
+        profiler = cProfile.Profile()
+        profiler.runcall(run_shift, seed=seed, **shift_options)
+        profiler.dump_stats(f'{os.fspath(output)}.pstats')
+        return pstats_scope_stats(pstats.Stats(profiler))
+
+    with StackSampler(interval) as sampler:
+        run_shift(seed=seed, **shift_options)
+    sampler.write_collapsed(f'{os.fspath(output)}.folded')
+    return sampler.scope_stats()
+
+
+def format_report(stats: Sequence[ScopeStat], top: int | None = None) -> str:
+    """
+    Таблица сводки профиля.
+
+    :param stats: Строки сводки.
+    :param top: Сколько строк выводить, по умолчанию все.
+    :return: Текст таблицы.
+    """
+    lines = [f'{"функция":48s} {"вызовы":>10s} {"собств., с":>12s} {"полное, с":>12s}']
+    for stat in stats[:top]:
+        calls = '-' if stat.calls is None else str(stat.calls)
+        lines.append(f'{stat.name:48s} {calls:>10s} {stat.self_time:12.6f} {stat.total_time:12.6f}')
+    return '\n'.join(lines)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Точка входа профилирования смены"""
+    parser = argparse.ArgumentParser(description='Профилирование рабочей смены сортировочной горки')
+    parser.add_argument('--seed', type=int, default=0, help='зерно генератора случайных чисел')
+    parser.add_argument('--paths', type=int, default=None, help='количество путей')
+    parser.add_argument('--wagons', type=int, default=None, help='количество вагонов')
+    parser.add_argument('--mode', choices=MODES, default=MODE_CPROFILE, help='профилировщик')
+    parser.add_argument('--interval', type=float, default=0.001, help='промежуток семплирования, с')
+    parser.add_argument('--output', default='profile/shift', help='путь к файлам профиля без расширения')
+    parser.add_argument('--top', type=int, default=30, help='сколько строк сводки выводить')
+    parser.add_argument('--compact', action='store_true', help='компактное хранение вагонов')
+    parser.add_argument('--planner', action='store_true', help='оператор с планированием поездов по очереди вагонов')
+    args = parser.parse_args(argv)
+
+    stats = profile_shift(
+        args.output,
+        seed=args.seed,
+        mode=args.mode,
+        interval=args.interval,
+        number_of_paths=args.paths,
+        number_of_wagons=args.wagons,
+        handlers=PLANNER_HANDLERS if args.planner else DEFAULT_HANDLERS,
+        compact=args.compact,
+    )
+    suffix = '.pstats' if args.mode == MODE_CPROFILE else '.folded'
+    print(format_report(stats, args.top))
+    print(f'Профиль записан: {args.output}{suffix}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Модуль с планировщиком допустимых событий.
+
+Вместо выборки с отбраковкой (случайное событие из EVENTS_BALANCED, затем check_event
+и повтор при отказе) планировщик тянет жребий с теми же относительными весами, что и
+в EVENTS_BALANCED, но отклонённое событие исключается из жребия до конца выбора.
+Проверяется только вытянутый кандидат, поэтому на выбор приходится не больше проверок,
+чем типов событий, а в типичном шаге - одна.
+"""
+
+import random
+from collections import Counter
+from collections.abc import Sequence
+
+from sorting_hill.consts import EVENTS_BALANCED, EventType
+
+POLICY_BALANCED = 'balanced'
+POLICY_SEND_FIRST = 'send-first'
+POLICY_EAGER = 'eager'
+
+POLICIES: dict[str, tuple[EventType, ...]] = {
+    # Только веса EVENTS_BALANCED
+    POLICY_BALANCED: (),
+    # Готовый поезд отправляется сразу, путь освобождается раньше
+    POLICY_SEND_FIRST: (EventType.TrainReady,),
+    # Поезд доводится до готовности до того, как снимается следующий вагон
+    POLICY_EAGER: (EventType.TrainReady, EventType.LocoArrived, EventType.TrainPlanned, EventType.PreparePath),
+}
+
+
+class EventScheduler:
+    """
+    Выбор следующего события из допустимых на горке.
+
+    Политика приоритетов - последовательность событий, которые выбираются без жребия,
+    если допустимы (первое допустимое по порядку); иначе событие выбирается случайно
+    среди допустимых пропорционально весам.
+    """
+
+    def __init__(
+        self,
+        sorting_hill,
+        rng: random.Random,
+        events: Sequence[EventType] = EVENTS_BALANCED,
+        policy: str | Sequence[EventType] = POLICY_BALANCED,
+    ) -> None:
+        """
+        Инициализация планировщика.
+
+        :param sorting_hill: Горка, по состоянию которой определяется допустимость событий.
+        :param rng: Генератор случайных чисел.
+        :param events: Список событий, в котором вес события - число его повторений.
+        :param policy: Имя политики из POLICIES либо последовательность приоритетных событий.
+        :raises ValueError: Если политика неизвестна или приоритетное событие отсутствует в events.
+        """
+        if isinstance(policy, str):
+            if policy not in POLICIES:
+                raise ValueError(f'unknown scheduling policy: {policy}')
+            policy = POLICIES[policy]
+        weights = Counter(events)
+        for event in policy:
+            if event not in weights:
+                raise ValueError(f'priority event {event} is not scheduled')
+
+        self.sorting_hill = sorting_hill
+        self.rng = rng
+        self.priorities: tuple[EventType, ...] = tuple(policy)
+        self.weights: dict[EventType, int] = dict(weights)
+        self.total_weight = sum(weights.values())
+
+    def enabled(self) -> dict[EventType, int]:
+        """
+        Допустимые события.
+
+        :return: Словарь допустимых событий с их весами, в порядке первого появления в events.
+        """
+        check_event = self.sorting_hill.check_event
+        return {event: weight for event, weight in self.weights.items() if check_event(event) is not None}
+
+    def _draw(self, weights: dict[EventType, int], total_weight: int) -> EventType:
+        """Случайное событие пропорционально весам"""
+        point = self.rng.random() * total_weight
+        for event, weight in weights.items():
+            point -= weight
+            if point < 0:
+                return event
+        return event
+
+    def next_event(self) -> EventType | None:
+        """
+        Выбрать следующее событие.
+
+        :return: Допустимое событие, либо None, если допустимых событий нет.
+        """
+        check_event = self.sorting_hill.check_event
+        for event in self.priorities:
+            if check_event(event) is not None:
+                return event
+
+        weights, total_weight = self.weights, self.total_weight
+        while weights:
+            event = self._draw(weights, total_weight)
+            if check_event(event) is not None:
+                return event
+            if weights is self.weights:
+                weights = dict(weights)
+            total_weight -= weights.pop(event)
+        return None
@@ -0,0 +1,279 @@
+"""
+Модуль с безголовым прогоном рабочей смены.
+
+Повторяет сценарий main(), но без ожиданий и с явным зерном генератора:
+задержки между командами накапливаются на виртуальных часах, вывод можно отключить.
+
+Запуск:
+    python -m sorting_hill.simulation --seed 42 --wagons 100000 --paths 50
+"""
+
+import argparse
+import os
+import random
+from collections.abc import Callable, Sequence
+from dataclasses import asdict, dataclass
+
+from sorting_handler.interface import SortingHandler
+from sorting_handler.planning_operator import PlanningOperatorImpl
+from sorting_handler.sorting_operator import SortingOperatorImpl
+from sorting_handler.sorting_reporter import SortingReporterImpl
+from sorting_hill.consts import EventType, WagonType
+from sorting_hill.mutations import Mutation
+from sorting_hill.scheduler import POLICIES, POLICY_BALANCED, EventScheduler
+from sorting_hill.sink import (
+    FORMAT_TEXT,
+    FORMATS,
+    OVERLOAD_POLICIES,
+    POLICY_DROP,
+    NullSink,
+    OutputSink,
+    open_sink,
+)
+from sorting_hill.sorting_hill import SortingHill
+
+OUTPUT_OFF = 'off'
+OUTPUT_SUMMARY = 'summary'
+OUTPUT_TRACE = 'trace'
+OUTPUT_MODES = (OUTPUT_OFF, OUTPUT_SUMMARY, OUTPUT_TRACE)
+
+DEFAULT_HANDLERS: tuple[type[SortingHandler], ...] = (SortingOperatorImpl, SortingReporterImpl)
+PLANNER_HANDLERS: tuple[type[SortingHandler], ...] = (PlanningOperatorImpl, SortingReporterImpl)
+
+_WAGON_TYPES = list(WagonType)
+
+
+@dataclass
+class ShiftSummary:
+    """Итоги прогона смены"""
+
+    seed: int
+    number_of_paths: int
+    wagons_total: int | None
+    wagons_left: int
+    events_accepted: int
+    errors: int
+    virtual_time: float
+    trains_sent: int
+    wagons_on_tracks: int
+    stalled: bool
+
+
+def generate_wagons(rng: random.Random, number_of_wagons: int) -> list[str]:
+    """
+    Сгенерировать очередь вагонов.
+
+    :param rng: Генератор случайных чисел.
+    :param number_of_wagons: Количество вагонов.
+    :return: Строки с информацией о вагонах в формате НОМЕР/Т(ип)
+    """
+    return [
+        f'{rng.randint(0, 99999999):08d}/{rng.choice(_WAGON_TYPES)}'
+        for _ in range(number_of_wagons)
+    ]
+
+
+def build_hill(
+    rng: random.Random,
+    number_of_paths: int | None = None,
+    number_of_wagons: int | None = None,
+    handlers: Sequence[type[SortingHandler]] = DEFAULT_HANDLERS,
+    compact: bool = False,
+    manifest: str | os.PathLike | None = None,
+) -> SortingHill:
+    """
+    Подготовить сортировочную горку к смене так же, как это делает main().
+
+    :param rng: Генератор случайных чисел, общий для горки и сценария смены.
+    :param number_of_paths: Количество путей, по умолчанию - как в main().
+    :param number_of_wagons: Количество вагонов, по умолчанию - как в main().
+    :param handlers: Хэндлеры для регистрации.
+    :param compact: Компактный режим хранения вагонов.
+    :param manifest: Файл манифеста вагонов; если задан, вагоны читаются из него порциями, а не генерируются.
+    :return: Горка с заполненной очередью вагонов.
+    :raises Exception: Ошибка регистрации хэндлера передаётся вызывающему (в отличие от main(),
+        смена со сломанным оператором не запускается вхолостую).
+    """
+    if number_of_paths is None:
+        number_of_paths = max(2, rng.randint(0, 15))
+    hill = SortingHill(number_of_paths, compact=compact, rng=rng)
+
+    for handler in handlers:
+        hill.register_handler(handler)
+
+    if manifest is not None:
+        hill.load_manifest(manifest)
+        return hill
+
+    if number_of_wagons is None:
+        number_of_wagons = max(1024, rng.randint(1024, 4095))
+    hill.wagon_buffer.extend(generate_wagons(rng, number_of_wagons))
+    return hill
+
+
+def run_shift(
+    seed: int,
+    number_of_paths: int | None = None,
+    number_of_wagons: int | None = None,
+    handlers: Sequence[type[SortingHandler]] = DEFAULT_HANDLERS,
+    output: str = OUTPUT_OFF,
+    max_delay: float = 0.1,
+    compact: bool = False,
+    subscribers: Sequence[Callable[[Mutation], None]] = (),
+    stall_limit: int = 10_000,
+    checkpoint: str | os.PathLike | None = None,
+    checkpoint_every: int = 10_000,
+    manifest: str | os.PathLike | None = None,
+    policy: str = POLICY_BALANCED,
+    sink: OutputSink | None = None,
+) -> ShiftSummary:
+    """
+    Прогнать рабочую смену на полной скорости.
+
+    :param seed: Зерно генератора случайных чисел; одинаковое зерно даёт одинаковую трассу.
+    :param number_of_paths: Количество путей, по умолчанию - как в main().
+    :param number_of_wagons: Количество вагонов, по умолчанию - как в main().
+    :param handlers: Хэндлеры для регистрации.
+    :param output: Режим вывода: off, summary или trace (каждая команда с виртуальным временем).
+    :param max_delay: Максимальная виртуальная задержка после принятой команды, в секундах.
+    :param compact: Компактный режим хранения вагонов.
+    :param subscribers: Подписчики на поток изменений горки на время смены.
+    :param stall_limit: Через сколько команд без снятия вагона из очереди смена считается заблокированной
+        и завершается досрочно (например, все пути заняты поездами другого типа, чем головной вагон).
+    :param checkpoint: Файл контрольной точки, которая перезаписывается каждые checkpoint_every принятых команд.
+    :param checkpoint_every: Период контрольной точки в принятых командах.
+    :param manifest: Файл манифеста вагонов вместо сгенерированной очереди.
+    :param policy: Политика приоритетов планировщика событий (см. scheduler.POLICIES).
+    :param sink: Приёмник вывода для трассы, отчётов и итогов, по умолчанию печать в консоль,
+        а в режиме off - приёмник, отбрасывающий записи (в том числе отчёт репортёра);
+        к концу смены всё переданное в него записано, закрывает приёмник вызывающий.
+    :return: Итоги смены.
+    :raises ValueError: Если передан неизвестный режим вывода или политика.
+    """
+    if output not in OUTPUT_MODES:
+        raise ValueError(f'unknown output mode: {output}')
+    trace = output == OUTPUT_TRACE
+
+    rng = random.Random(seed)
+    hill = build_hill(rng, number_of_paths, number_of_wagons, handlers, compact, manifest)
+    scheduler = EventScheduler(hill, rng, policy=policy)
+    if sink is not None:
+        hill.sink = sink
+    elif output == OUTPUT_OFF:
+        hill.sink = NullSink()
+    emit = hill.sink.emit
+    # Длина текстового манифеста неизвестна без прохода по файлу, поэтому не запрашивается до смены
+    wagons_total = hill.wagon_buffer.total if manifest is not None else len(hill.wagon_buffer)
+    for subscriber in subscribers:
+        hill.subscribe(subscriber)
+    if output != OUTPUT_OFF and not hill.handlers:
+        emit('notice', 'Нет зарегистрированных операторов, работы не выполняются.')
+
+    clock = 0.0
+    accepted = errors = 0
+    stalled = False
+    idle_steps = 0
+    hill.handle_event(EventType.ShiftStarted)
+
+    while hill.wagon_buffer:
+        if idle_steps >= stall_limit:
+            stalled = True
+            if output != OUTPUT_OFF:
+                emit('notice', f'Смена заблокирована: {stall_limit} команд без снятия вагона, '
+                               f'в очереди {len(hill.wagon_buffer)}')
+            break
+        idle_steps += 1
+
+        next_event = scheduler.next_event()
+        if next_event is None:
+            stalled = True
+            if output != OUTPUT_OFF:
+                emit('notice', f'Смена заблокирована: нет допустимых команд, в очереди {len(hill.wagon_buffer)}')
+            break
+
+        accepted += 1
+        try:
+            if trace:
+                emit('command', f'[{clock:12.3f}] Команда дежурного: {next_event}', clock=clock, event=next_event.name)
+            hill.handle_event(next_event)
+            if next_event is EventType.WagonArrived:
+                idle_steps = 0
+            clock += rng.uniform(0, max_delay)
+            if checkpoint is not None and accepted % checkpoint_every == 0:
+                hill.save_checkpoint(checkpoint)
+        except RuntimeError as e:
+            errors += 1
+            if trace:
+                emit('error', f'[{clock:12.3f}] Произошла ошибка обработки: {e}', clock=clock, error=str(e))
+
+    wagons_left = len(hill.wagon_buffer)
+    # Окончание смены отправляет поезда, только когда очередь вагонов пуста
+    hill.wagon_buffer.clear()
+    hill.handle_event(EventType.ShiftEnded)
+
+    summary = ShiftSummary(
+        seed=seed,
+        number_of_paths=hill.get_number_of_paths(),
+        wagons_total=wagons_total,
+        wagons_left=wagons_left,
+        events_accepted=accepted,
+        errors=errors,
+        virtual_time=clock,
+        trains_sent=hill.trains_formed.trains_sent,
+        wagons_on_tracks=hill.trains_formed.wagons_on_tracks,
+        stalled=stalled,
+    )
+    if output != OUTPUT_OFF:
+        fields = asdict(summary)
+        emit('summary', ' '.join(f'{key}={value}' for key, value in fields.items()), **fields)
+    hill.sink.flush()
+    return summary
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Точка входа безголового прогона"""
+    parser = argparse.ArgumentParser(description='Безголовый прогон рабочей смены сортировочной горки')
+    parser.add_argument('--seed', type=int, default=0, help='зерно генератора случайных чисел')
+    parser.add_argument('--paths', type=int, default=None, help='количество путей')
+    parser.add_argument('--wagons', type=int, default=None, help='количество вагонов')
+    parser.add_argument('--output', choices=OUTPUT_MODES, default=OUTPUT_SUMMARY, help='режим вывода')
+    parser.add_argument('--compact', action='store_true', help='компактное хранение вагонов')
+    parser.add_argument('--manifest', default=None, help='файл манифеста вагонов (текстовый или упакованный)')
+    parser.add_argument('--checkpoint', default=None, help='файл периодической контрольной точки')
+    parser.add_argument('--checkpoint-every', type=int, default=10_000, help='период контрольной точки в командах')
+    parser.add_argument('--policy', choices=POLICIES, default=POLICY_BALANCED, help='политика приоритетов команд')
+    parser.add_argument('--log', default=None, help='файл вывода (через фоновый поток записи)')
+    parser.add_argument('--log-format', choices=FORMATS, default=None, help='формат вывода через фоновый поток')
+    parser.add_argument('--log-policy', choices=OVERLOAD_POLICIES, default=POLICY_DROP,
+                        help='что делать с записями при переполнении очереди вывода')
+    parser.add_argument('--planner', action='store_true', help='оператор с планированием поездов по очереди вагонов')
+    args = parser.parse_args(argv)
+
+    sink = None
+    if args.log is not None or args.log_format is not None:
+        sink = open_sink(args.log, args.log_format or FORMAT_TEXT, args.log_policy)
+    try:
+        _run_from_args(args, sink)
+    finally:
+        if sink is not None:
+            sink.close()
+
+
+def _run_from_args(args: argparse.Namespace, sink: OutputSink | None) -> None:
+    run_shift(
+        seed=args.seed,
+        number_of_paths=args.paths,
+        number_of_wagons=args.wagons,
+        handlers=PLANNER_HANDLERS if args.planner else DEFAULT_HANDLERS,
+        output=args.output,
+        compact=args.compact,
+        checkpoint=args.checkpoint,
+        checkpoint_every=args.checkpoint_every,
+        manifest=args.manifest,
+        policy=args.policy,
+        sink=sink,
+    )
+
+
+if __name__ == '__main__':
+    main()
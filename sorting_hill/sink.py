@@ -0,0 +1,313 @@
+"""
+Модуль с приёмниками вывода сортировочной горки.
+
+Горка, репортёр и безголовый прогон пишут строки трассы, ошибки и отчёты не через print(),
+а в приёмник вывода (SortingHill.sink):
+- ConsoleSink печатает запись сразу, как print() (по умолчанию);
+- NullSink отбрасывает записи (безголовый прогон в режиме off);
+- BufferedSink кладёт запись в ограниченную очередь и возвращает управление,
+  а форматирование и запись выполняет фоновый поток пакетами через буферизованный файл.
+  При переполнении очереди запись не ждёт места: лишние записи отбрасываются (drop)
+  или сворачиваются в счётчики по видам записей (aggregate), поэтому вывод
+  никогда не задерживает обработку вагонов.
+
+Форматы BufferedSink:
+- text: строка сообщения;
+- jsonl: JSON-объект в строке с видом записи, сообщением и полями;
+- prometheus: файл в текстовом формате экспозиции Prometheus (счётчики записей по видам
+  и последние значения числовых полей), перезаписывается целиком при сбросе.
+"""
+
+import json
+import os
+import queue
+import re
+import sys
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter
+from collections.abc import Callable
+from typing import Self, TextIO
+
+FORMAT_TEXT = 'text'
+FORMAT_JSONL = 'jsonl'
+FORMAT_PROMETHEUS = 'prometheus'
+FORMATS = (FORMAT_TEXT, FORMAT_JSONL, FORMAT_PROMETHEUS)
+
+POLICY_DROP = 'drop'
+POLICY_AGGREGATE = 'aggregate'
+OVERLOAD_POLICIES = (POLICY_DROP, POLICY_AGGREGATE)
+
+KIND_AGGREGATED = 'aggregated'
+
+_METRIC_PREFIX = 'sorting_hill'
+_FLUSH = object()
+_STOP = object()
+
+Record = tuple[str, str, dict]
+
+
+class OutputSink(ABC):
+    """Интерфейс приёмника вывода"""
+
+    @abstractmethod
+    def emit(self, kind: str, message: str, **fields) -> None:
+        """
+        Записать запись.
+
+        :param kind: Вид записи (command, error, report, summary, notice).
+        :param message: Сообщение для человека.
+        :param fields: Поля записи для машинных форматов.
+        """
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Дождаться записи всего, что было передано до вызова"""
+
+    def close(self) -> None:
+        """Записать оставшееся и освободить ресурсы"""
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ConsoleSink(OutputSink):
+    """Приёмник, печатающий сообщение сразу"""
+
+    def emit(self, kind: str, message: str, **fields) -> None:
+        print(message)
+
+
+class NullSink(OutputSink):
+    """Приёмник, отбрасывающий все записи"""
+
+    def emit(self, kind: str, message: str, **fields) -> None:
+        pass
+
+
+def format_text(record: Record) -> str:
+    """Строка записи в текстовом формате"""
+    return record[1] + '\n'
+
+
+def format_jsonl(record: Record) -> str:
+    """Строка записи в формате JSON Lines"""
+    kind, message, fields = record
+    return json.dumps({'kind': kind, 'message': message, **fields}, ensure_ascii=False, default=str) + '\n'
+
+
+def _metric_name(*parts: str) -> str:
+    return re.sub(r'[^a-zA-Z0-9_]', '_', '_'.join((_METRIC_PREFIX, *parts)))
+
+
+class PrometheusState:
+    """
+    Состояние файла экспозиции Prometheus.
+
+    Ведёт счётчики записей по видам и последние значения числовых полей записей;
+    render() строит текст экспозиции целиком.
+    """
+
+    def __init__(self) -> None:
+        """Инициализация состояния"""
+        self.records: Counter[str] = Counter()
+        self.gauges: dict[str, int | float] = {}
+        self.dropped = 0
+
+    def update(self, record: Record) -> None:
+        """
+        Учесть запись.
+
+        :param record: Вид записи, сообщение и поля.
+        """
+        kind, _, fields = record
+        if kind == KIND_AGGREGATED:
+            self.records[fields['aggregated_kind']] += fields['count']
+            return
+        self.records[kind] += 1
+        for field, value in fields.items():
+            if isinstance(value, int | float):
+                self.gauges[_metric_name(kind, field)] = int(value) if isinstance(value, bool) else value
+
+    def render(self) -> str:
+        """
+        Текст экспозиции.
+
+        :return: Метрики в текстовом формате Prometheus.
+        """
+        records = _metric_name('records_total')
+        dropped = _metric_name('dropped_records_total')
+        lines = [
+            f'# HELP {records} Записи вывода горки по видам.',
+            f'# TYPE {records} counter',
+            *(f'{records}{{kind="{kind}"}} {count}' for kind, count in sorted(self.records.items())),
+            f'# HELP {dropped} Записи, отброшенные при переполнении очереди вывода.',
+            f'# TYPE {dropped} counter',
+            f'{dropped} {self.dropped}',
+        ]
+        for name, value in sorted(self.gauges.items()):
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+class BufferedSink(OutputSink):
+    """
+    Неблокирующий приёмник с фоновым потоком записи.
+
+    emit() только кладёт запись в ограниченную очередь. Фоновый поток забирает записи
+    пакетами до batch_size, форматирует их и пишет одним вызовом write в буферизованный файл;
+    файл сбрасывается, когда очередь опустела. При переполнении очереди действует политика:
+    drop - запись отбрасывается и учитывается в dropped; aggregate - запись учитывается
+    в счётчике своего вида, а поток записи выводит по записи aggregated на каждый вид.
+    """
+
+    def __init__(
+        self,
+        target: str | os.PathLike | TextIO,
+        output_format: str = FORMAT_TEXT,
+        policy: str = POLICY_DROP,
+        max_queue: int = 65_536,
+        batch_size: int = 1024,
+    ) -> None:
+        """
+        Инициализация приёмника и запуск потока записи.
+
+        :param target: Путь к файлу либо открытый текстовый поток (например, sys.stdout).
+        :param output_format: text, jsonl или prometheus.
+        :param policy: Политика при переполнении очереди: drop или aggregate.
+        :param max_queue: Вместимость очереди записей.
+        :param batch_size: Сколько записей поток записи забирает из очереди за раз.
+        :raises ValueError: Если формат или политика неизвестны или формат prometheus задан без файла.
+        """
+        if output_format not in FORMATS:
+            raise ValueError(f'unknown output format: {output_format}')
+        if policy not in OVERLOAD_POLICIES:
+            raise ValueError(f'unknown overload policy: {policy}')
+        is_path = isinstance(target, str | os.PathLike)
+        if output_format == FORMAT_PROMETHEUS and not is_path:
+            raise ValueError('prometheus output needs a file path')
+
+        self.output_format = output_format
+        self.policy = policy
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.error: BaseException | None = None
+        self._path = os.fspath(target) if is_path else None
+        self._file: TextIO | None = None
+        if output_format != FORMAT_PROMETHEUS:
+            # Свой файл открыт, пока работает поток записи, и закрывается в close()
+            self._file = open(target, 'w', encoding='utf-8') if is_path else target  # noqa: SIM115
+        self._owns_file = is_path
+        self._format: Callable[[Record], str] = format_jsonl if output_format == FORMAT_JSONL else format_text
+        self._prometheus = PrometheusState() if output_format == FORMAT_PROMETHEUS else None
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._overflow: Counter[str] = Counter()
+        self._overflow_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='output-sink', daemon=True)
+        self._thread.start()
+
+    def emit(self, kind: str, message: str, **fields) -> None:
+        try:
+            self._queue.put_nowait((kind, message, fields))
+        except queue.Full:
+            with self._overflow_lock:
+                if self.policy == POLICY_AGGREGATE:
+                    self._overflow[kind] += 1
+                else:
+                    self.dropped += 1
+
+    def flush(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(_FLUSH)
+            self._queue.join()
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        if self._owns_file and self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.error is not None:
+            raise RuntimeError('output sink failed') from self.error
+
+    def _run(self) -> None:
+        get = self._queue.get
+        while True:
+            item = get()
+            batch = [item]
+            while item is not _STOP and len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+            try:
+                if self.error is None:
+                    self._write(batch)
+            except Exception as e:  # noqa: BLE001
+                # Ошибка записи не роняет поток: она поднимается из close()
+                self.error = e
+            for _ in batch:
+                self._queue.task_done()
+            if batch[-1] is _STOP:
+                return
+
+    def _drain_overflow(self) -> list[Record]:
+        with self._overflow_lock:
+            overflow, self._overflow = self._overflow, Counter()
+            dropped = self.dropped
+        if self._prometheus is not None:
+            self._prometheus.dropped = dropped
+        return [
+            (KIND_AGGREGATED, f'Свёрнуто записей {kind}: {count}', {'aggregated_kind': kind, 'count': count})
+            for kind, count in overflow.items()
+        ]
+
+    def _write(self, batch: list) -> None:
+        records = [item for item in batch if item is not _FLUSH and item is not _STOP]
+        # Сброс выполняется, когда очередь опустела или его запросили flush() и close()
+        drained = len(records) < len(batch) or self._queue.empty()
+        if drained:
+            records.extend(self._drain_overflow())
+
+        if self._prometheus is not None:
+            for record in records:
+                self._prometheus.update(record)
+            if drained:
+                self._write_prometheus()
+            return
+
+        if records:
+            self._file.write(''.join(map(self._format, records)))
+        if drained:
+            self._file.flush()
+
+    def _write_prometheus(self) -> None:
+        # Файл заменяется атомарно, чтобы сборщик не прочитал его наполовину записанным
+        temporary = f'{self._path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            file.write(self._prometheus.render())
+        os.replace(temporary, self._path)
+
+
+def open_sink(
+    path: str | os.PathLike | None = None,
+    output_format: str = FORMAT_TEXT,
+    policy: str = POLICY_DROP,
+    max_queue: int = 65_536,
+) -> OutputSink:
+    """
+    Открыть приёмник вывода.
+
+    :param path: Файл вывода; без файла текст и JSON Lines пишутся в stdout через фоновый поток.
+    :param output_format: text, jsonl или prometheus.
+    :param policy: Политика при переполнении очереди: drop или aggregate.
+    :param max_queue: Вместимость очереди записей.
+    :return: Приёмник; вызывающий закрывает его через close().
+    """
+    return BufferedSink(sys.stdout if path is None else path, output_format, policy, max_queue)
@@ -1,20 +1,94 @@
+import os
 import random
+from collections.abc import Callable, Iterable
+from itertools import islice
+from time import perf_counter_ns
 
 from sorting_handler.interface import SortingHandler
+from sorting_hill.checkpoint import MappedWagonQueue, read_checkpoint, write_checkpoint
+from sorting_hill.compact import CompactWagonQueue
 from sorting_hill.consts import EventType, LocoType
+from sorting_hill.journal import EventJournal, read_journal
+from sorting_hill.manifest import open_manifest
+from sorting_hill.metrics import (
+    SECTION_CHECKS,
+    SECTION_EVENTS,
+    SECTION_HANDLERS,
+    HillMetrics,
+)
+from sorting_hill.mutations import Mutation, MutationFeed
+from sorting_hill.path_registry import PathRegistry
+from sorting_hill.sink import ConsoleSink, OutputSink
+from sorting_hill.train_registry import TrainRegistry
+from sorting_hill.wagon_queue import WagonQueue
+
+_HANDLER_METHODS = {
+    EventType.ShiftStarted: 'start_shift',
+    EventType.PreparePath: 'prepare_path',
+    EventType.TrainPlanned: 'allocate_path_for_train',
+    EventType.TrainReady: 'send_train',
+}
+_LOCO_TYPES = list(LocoType)
+
+
+def _call_each(calls: tuple[Callable[[], object], ...]) -> Callable[[], None]:
+    """Собрать действие, вызывающее привязанные методы хэндлеров по порядку"""
+    def action() -> None:
+        for call in calls:
+            call()
+    return action
+
+
+def _call_each_journaled(
+    calls: tuple[Callable[[], object], ...],
+    record: Callable[[EventType], None],
+    event: EventType,
+) -> Callable[[], None]:
+    """Собрать действие, вызывающее привязанные методы хэндлеров и записывающее событие в журнал после успеха"""
+    def action() -> None:
+        for call in calls:
+            call()
+        record(event)
+    return action
+
 
 class SortingHill:
     """Класс для запуска сервиса"""
 
-    def __init__(self, number_of_paths: int):
-        """Инициализация сервиса"""
+    def __init__(
+        self,
+        number_of_paths: int,
+        compact: bool = False,
+        rng: random.Random | None = None,
+        metrics: bool = False,
+        sink: OutputSink | None = None,
+    ):
+        """
+        Инициализация сервиса.
+
+        :param number_of_paths: Количество путей.
+        :param compact: Компактный режим: вагоны хранятся упакованными числами (8 байт на вагон),
+            а строки вагонов строятся только при передаче хэндлерам.
+        :param rng: Собственный генератор случайных чисел (для воспроизводимых прогонов),
+            по умолчанию используется модуль random.
+        :param metrics: Включить сбор метрик (см. enable_metrics).
+        :param sink: Приёмник вывода для трассы и отчётов, по умолчанию печать в консоль.
+        """
 
         self.handlers: list[SortingHandler] = []
         self._number_of_paths = number_of_paths
-        self.assigned_paths: dict[int, str | None] = {}
-        self.wagon_buffer: list[str] = []
-        self.trains_formed: dict[str, list[str]] = {}
+        self.mutations = MutationFeed()
+        self.assigned_paths = PathRegistry(number_of_paths, feed=self.mutations)
+        self.wagon_buffer = CompactWagonQueue() if compact else WagonQueue()
+        self.trains_formed = TrainRegistry(compact=compact, feed=self.mutations)
         self.train_index = 0
+        self._rng = rng or random
+        self.sink: OutputSink = sink or ConsoleSink()
+        self._metrics: HillMetrics | None = None
+        self._journal: EventJournal | None = None
+        self._build_dispatch()
+        if metrics:
+            self.enable_metrics()
 
     def get_number_of_paths(self) -> int:
         """
@@ -24,74 +98,378 @@ class SortingHill:
         """
         return self._number_of_paths
 
+    def path_of(self, train: str) -> int | None:
+        """
+        Путь, на котором стоит поезд, по обратному индексу реестра путей.
+
+        :param train: Номер поезда.
+        :return: Номер пути, либо None, если поезда нет на путях.
+        """
+        return self.assigned_paths.path_of(train)
+
+    def subscribe(self, callback: Callable[[Mutation], None]) -> None:
+        """
+        Подписаться на поток изменений состояния горки.
+
+        Подписчик получает записи PathPrepared, TrainAllocated, LocoAttached, WagonAttached,
+        TrainRenamed, TrainSent и PathFreed в порядке изменений и может вести своё состояние
+        инкрементально, без обхода путей и составов.
+
+        :param callback: Вызывается с каждой записью об изменении.
+        """
+        self.mutations.subscribe(callback)
+
+    def aggregates(self) -> dict[str, int]:
+        """
+        Поддерживаемые агрегаты состояния горки, без обхода путей и составов.
+
+        :return: Накопительные счётчики (paths_prepared, trains_planned, locos_attached, wagons_attached,
+            trains_sent) и текущие значения (paths_assigned, trains_formed, wagons_on_tracks).
+        """
+        paths = self.assigned_paths
+        trains = self.trains_formed
+        return {
+            'paths_prepared': paths.paths_prepared,
+            'trains_planned': paths.trains_planned,
+            'locos_attached': trains.locos_attached,
+            'wagons_attached': trains.wagons_attached,
+            'trains_sent': trains.trains_sent,
+            'paths_assigned': len(paths),
+            'trains_formed': len(trains),
+            'wagons_on_tracks': trains.wagons_on_tracks,
+        }
+
     def handle_event(self, event: EventType) -> None:
         """
         Обработчик событий.
 
+        Событие разрешается одним поиском в таблице диспетчеризации,
+        которая собирается при регистрации хэндлеров.
+
         :param event: Тип события (один из членов строкового енама)
         :raises RuntimeError: Если передано неизвестное событие.
         """
+        action = self._dispatch.get(event)
+        if action is None:
+            raise RuntimeError(f'unknown event: {event}')
+        action()
+
+    def _build_dispatch(self) -> None:
+        """Собрать таблицу диспетчеризации из заранее привязанных методов хэндлеров"""
+        metrics = self._metrics
+
+        def bind(method: str) -> tuple[Callable, ...]:
+            bound = tuple(getattr(handler, method) for handler in self.handlers)
+            if metrics is None:
+                return bound
+            return tuple(
+                metrics.timed(SECTION_HANDLERS, f'{type(handler).__name__}.{method}', call)
+                for handler, call in zip(self.handlers, bound)
+            )
+
+        calls = {event: bind(method) for event, method in _HANDLER_METHODS.items()}
+        self._wagon_calls = bind('handle_wagon')
+        self._wagons_batch_calls = bind('handle_wagons')
+        self._loco_calls = bind('handle_locomotive')
+        self._send_batch_calls = bind('send_trains')
+        self._end_shift_calls = bind('end_shift')
+        self._plan_checks = tuple(
+            handler.wants_train for handler in self.handlers
+            if type(handler).wants_train is not SortingHandler.wants_train
+        )
+        self._wagon_checks = tuple(
+            handler.accepts_wagon for handler in self.handlers
+            if type(handler).accepts_wagon is not SortingHandler.accepts_wagon
+        )
+
+        if self._journal is None:
+            self._dispatch = {event: _call_each(event_calls) for event, event_calls in calls.items()}
+            self._dispatch[EventType.ShiftEnded] = self._shift_ended
+            self._dispatch[EventType.WagonArrived] = self._wagon_arrived
+            self._dispatch[EventType.LocoArrived] = self._loco_arrived
+        else:
+            # Запись в журнал встроена в действия, а не навешена обёрткой на каждое событие
+            record = self._journal.record
+            self._dispatch = {
+                event: _call_each_journaled(event_calls, record, event) for event, event_calls in calls.items()
+            }
+            self._dispatch[EventType.ShiftEnded] = self._shift_ended_journaled
+            self._dispatch[EventType.WagonArrived] = self._wagon_arrived_journaled
+            self._dispatch[EventType.LocoArrived] = self._loco_arrived_journaled
+
+        if metrics is not None:
+            self._dispatch = {
+                event: metrics.timed(SECTION_EVENTS, event.name, action)
+                for event, action in self._dispatch.items()
+            }
+
+    def attach_journal(self, journal: EventJournal | None) -> None:
+        """
+        Подключить журнал событий.
+
+        Каждое успешно обработанное событие записывается в журнал вместе с выбранным локомотивом
+        и снятым из очереди вагоном, поэтому replay() восстанавливает состояние без генератора
+        случайных чисел и без исходной очереди вагонов. Без журнала таблица диспетчеризации
+        собирается без обёрток.
+
+        :param journal: Журнал, либо None, чтобы отключить журналирование.
+        """
+        self._journal = journal
+        self._build_dispatch()
+
+    def replay(self, path: str | os.PathLike) -> int:
+        """
+        Восстановить состояние горки по журналу.
+
+        Записанные вагоны и локомотивы передаются хэндлерам напрямую, без проверки событий
+        и без очереди вагонов. Вызывается на новой горке с теми же хэндлерами до загрузки
+        оставшихся вагонов; журнал подключается после восстановления.
+
+        :param path: Путь к файлу журнала.
+        :return: Количество применённых событий.
+        :raises RuntimeError: Если к горке подключён журнал.
+        """
+        if self._journal is not None:
+            raise RuntimeError('cannot replay with an attached journal')
+
+        dispatch = self._dispatch
+        wagon_calls = self._wagon_calls
+        loco_calls = self._loco_calls
+        count = 0
+        for event, payload in read_journal(path):
+            if event == EventType.WagonArrived:
+                for handle_wagon in wagon_calls:
+                    handle_wagon(payload)
+            elif event == EventType.LocoArrived:
+                for handle_locomotive in loco_calls:
+                    handle_locomotive(payload)
+            else:
+                dispatch[event]()
+            count += 1
+        return count
+
+    def save_checkpoint(self, path: str | os.PathLike) -> None:
+        """
+        Записать контрольную точку: пути, поезда, счётчик поездов и оставшиеся вагоны очереди.
 
-        exc = None
-        try:
-            match event:
-                case EventType.ShiftStarted:
-                    for handler in self.handlers:
-                        handler.start_shift()
+        Запись атомарна, поэтому её можно выполнять периодически поверх прежней контрольной точки.
 
-                case EventType.ShiftEnded:
-                    last_trains_count = 0
-                    for path in self.assigned_paths.copy():
-                        train = self.assigned_paths.get(path)
-                        train_content = self.trains_formed.get(train, [])
-                        if train_content and len(train_content) > 1:
-                            last_trains_count += 1
-                        else:
-                            if train in self.trains_formed:
-                                del self.trains_formed[train]
-                            del self.assigned_paths[path]
+        :param path: Путь к файлу контрольной точки.
+        """
+        write_checkpoint(path, self.train_index, self.assigned_paths, self.trains_formed, self.wagon_buffer)
+
+    def load_checkpoint(self, path: str | os.PathLike) -> None:
+        """
+        Восстановить состояние горки из контрольной точки.
+
+        Пути и поезда восстанавливаются вместе с порядком индексов и накопительными счётчиками,
+        а очередь вагонов читается из отображённого в память файла по мере снятия, поэтому
+        время восстановления не зависит ни от длины истории, ни от длины очереди.
+        Вызывается на новой горке с тем же количеством путей.
+
+        :param path: Путь к файлу контрольной точки.
+        :raises RuntimeError: Если у горки уже есть пути, поезда или вагоны в очереди.
+        :raises ValueError: Если файл не является контрольной точкой или количество путей отличается.
+        """
+        if self.assigned_paths or self.trains_formed or self.wagon_buffer:
+            raise RuntimeError('cannot load a checkpoint into a non-empty hill')
+        checkpoint = read_checkpoint(path)
+        if checkpoint.number_of_paths != self._number_of_paths:
+            raise ValueError(
+                f'checkpoint is for {checkpoint.number_of_paths} paths, not {self._number_of_paths}'
+            )
 
-                    while last_trains_count > 0:
-                        self.handle_event(EventType.TrainReady)
-                        last_trains_count -= 1
+        paths = self.assigned_paths
+        trains = self.trains_formed
+        for number, train in checkpoint.paths:
+            paths[number] = train
+        for train, content in checkpoint.trains:
+            trains[train] = content
+        trains.empty = dict.fromkeys(checkpoint.empty)
+        trains.full = dict.fromkeys(checkpoint.full)
+        trains.loaded = dict.fromkeys(checkpoint.loaded)
+        paths.unassigned = dict.fromkeys(checkpoint.unassigned)
+        counters = checkpoint.counters
+        paths.paths_prepared = counters['paths_prepared']
+        paths.trains_planned = counters['trains_planned']
+        trains.locos_attached = counters['locos_attached']
+        trains.wagons_attached = counters['wagons_attached']
+        trains.trains_sent = counters['trains_sent']
+        self.train_index = checkpoint.train_index
+        self._use_wagon_buffer(MappedWagonQueue(checkpoint.wagons))
+
+    def load_manifest(self, path: str | os.PathLike, chunk_size: int = 4096) -> None:
+        """
+        Поставить в очередь вагоны из манифеста.
+
+        Манифест (текстовый или упакованный) читается порциями по chunk_size вагонов
+        по мере снятия вагонов из очереди, а не загружается целиком.
+
+        :param path: Путь к файлу манифеста.
+        :param chunk_size: Количество вагонов в подгружаемой порции.
+        :raises RuntimeError: Если в очереди уже есть вагоны.
+        """
+        if self.wagon_buffer:
+            raise RuntimeError('cannot load a manifest into a non-empty wagon queue')
+        self._use_wagon_buffer(open_manifest(path, chunk_size))
+
+    def _use_wagon_buffer(self, wagon_buffer: CompactWagonQueue) -> None:
+        self.wagon_buffer = wagon_buffer
+
+    def enable_metrics(self, enabled: bool = True) -> None:
+        """
+        Включить или выключить сбор метрик.
+
+        При включении методы хэндлеров, действия событий и check_event оборачиваются замером времени;
+        при выключении таблица диспетчеризации собирается без обёрток, и накладных расходов нет.
+
+        :param enabled: Включить (True) или выключить (False) сбор метрик; включение сбрасывает накопленное.
+        """
+        self._metrics = HillMetrics() if enabled else None
+        self._build_dispatch()
+        if enabled:
+            self.check_event = self._check_event_instrumented
+        else:
+            self.__dict__.pop('check_event', None)
+
+    def metrics(self) -> dict:
+        """
+        Снимок метрик.
+
+        :return: Словарь с разделами events, handlers, checks (гистограммы задержек)
+            и check_results (принятые и отклонённые проверки), либо пустой словарь, если сбор выключен.
+        """
+        return self._metrics.snapshot() if self._metrics is not None else {}
 
-                    for handler in self.handlers:
-                        handler.end_shift()
+    def _check_event_instrumented(self, candidate: EventType) -> str | None:
+        started = perf_counter_ns()
+        result = type(self).check_event(self, candidate)
+        elapsed_ns = perf_counter_ns() - started
 
-                case EventType.PreparePath:
-                    for handler in self.handlers:
-                        handler.prepare_path()
+        name = candidate.name if isinstance(candidate, EventType) else str(candidate)
+        self._metrics.histogram(SECTION_CHECKS, name).record(elapsed_ns)
+        self._metrics.count_check(name, result is not None)
+        return result
 
-                case EventType.WagonArrived:
-                    if not self.wagon_buffer:
-                        return
+    def _shift_ended(self) -> None:
+        # Один проход по путям: пустые составы и пути снимаются сразу,
+        # поезда с вагонами уходят одним пакетом через send_trains
+        assigned_paths = self.assigned_paths
+        trains_formed = self.trains_formed
+        departing = []
+        for path, train in list(assigned_paths.items()):
+            train_content = trains_formed.get(train)
+            if train_content and len(train_content) > 1:
+                departing.append(train)
+            else:
+                if train_content is not None:
+                    del trains_formed[train]
+                del assigned_paths[path]
 
-                    wagon_info = self.wagon_buffer[0]
+        if departing:
+            for send_trains in self._send_batch_calls:
+                send_trains(departing)
 
-                    for handler in self.handlers:
-                        handler.handle_wagon(wagon_info)
-                    self.wagon_buffer.pop(0)
+        for end_shift in self._end_shift_calls:
+            end_shift()
 
-                case EventType.LocoArrived:
-                    loco = random.choice(list(LocoType))
-                    for handler in self.handlers:
-                        handler.handle_locomotive(loco)
+    def _wagon_arrived(self) -> str | None:
+        if not self.wagon_buffer:
+            return None
 
-                case EventType.TrainPlanned:
-                    for handler in self.handlers:
-                        handler.allocate_path_for_train()
+        wagon_info = self.wagon_buffer.peek()
 
-                case EventType.TrainReady:
-                    for handler in self.handlers:
-                        handler.send_train()
+        for handle_wagon in self._wagon_calls:
+            handle_wagon(wagon_info)
+        self.wagon_buffer.popleft()
+        return wagon_info
 
-                case _:
-                    raise RuntimeError(f'unknown event: {event}')
-        except RuntimeError as e:
-            exc = e
+    def _loco_arrived(self) -> str:
+        loco = self._rng.choice(_LOCO_TYPES)
+        for handle_locomotive in self._loco_calls:
+            handle_locomotive(loco)
+        return loco
 
-        if exc:
-            raise exc
+    def _shift_ended_journaled(self) -> None:
+        self._shift_ended()
+        self._journal.record(EventType.ShiftEnded)
+
+    def _wagon_arrived_journaled(self) -> None:
+        wagon_buffer = self.wagon_buffer
+        if not wagon_buffer:
+            return
+
+        wagon_info = wagon_buffer.peek()
+
+        for handle_wagon in self._wagon_calls:
+            handle_wagon(wagon_info)
+        # Компактная очередь отдаёт вагон упакованным числом, и строка вагона не разбирается заново
+        if isinstance(wagon_buffer, CompactWagonQueue):
+            self._journal.record_packed(wagon_buffer.popleft_packed())
+        else:
+            wagon_buffer.popleft()
+            self._journal.record_wagon(wagon_info)
+
+    def _loco_arrived_journaled(self) -> None:
+        loco = self._rng.choice(_LOCO_TYPES)
+        for handle_locomotive in self._loco_calls:
+            handle_locomotive(loco)
+        self._journal.record_loco(loco)
+
+    def handle_events(self, events: Iterable[EventType]) -> None:
+        """
+        Пакетный обработчик событий.
+
+        Подряд идущие события WagonArrived объединяются в один пакет и передаются
+        хэндлерам через handle_wagons, остальные события обрабатываются по одному.
+
+        :param events: События в порядке поступления.
+        :raises RuntimeError: Если передано неизвестное событие или хэндлер не смог обработать событие.
+        """
+        wagons_pending = 0
+        for event in events:
+            if event == EventType.WagonArrived:
+                wagons_pending += 1
+                continue
+            if wagons_pending:
+                self.handle_wagons(wagons_pending)
+                wagons_pending = 0
+            self.handle_event(event)
+
+        if wagons_pending:
+            self.handle_wagons(wagons_pending)
+
+    def handle_wagons(self, limit: int) -> int:
+        """
+        Передать хэндлерам пакет вагонов из головы очереди.
+
+        Каждый хэндлер получает пакет одним вызовом handle_wagons. Из очереди снимаются
+        только вагоны, которые обработали все хэндлеры, как и при поштучной обработке.
+
+        :param limit: Максимальное количество вагонов в пакете.
+        :return: Количество снятых из очереди вагонов.
+        :raises RuntimeError: Если хэндлер не смог разместить первый вагон пакета.
+        """
+        batch = list(islice(self.wagon_buffer, limit))
+        handled = len(batch)
+        for handle_wagons in self._wagons_batch_calls:
+            if not handled:
+                break
+            handled = min(handled, len(handle_wagons(batch[:handled])))
+
+        wagon_buffer = self.wagon_buffer
+        journal = self._journal
+        if journal is None:
+            for _ in range(handled):
+                wagon_buffer.popleft()
+        elif isinstance(wagon_buffer, CompactWagonQueue):
+            for _ in range(handled):
+                journal.record_packed(wagon_buffer.popleft_packed())
+        else:
+            for wagon_info in batch[:handled]:
+                wagon_buffer.popleft()
+                journal.record_wagon(wagon_info)
+        return handled
 
     def check_event(self, candidate: EventType) -> str | None:
         """
@@ -102,33 +480,28 @@ class SortingHill:
         """
         match candidate:
             case EventType.PreparePath:
-                if len(self.assigned_paths) >= self._number_of_paths:
+                if not self.assigned_paths.free_count:
                     return None
             case EventType.LocoArrived:
-                if not any(content == [] for content in self.trains_formed.values()):
+                if not self.trains_formed.empty:
                     return None
             case EventType.TrainPlanned:
-                if not any(train is None for train in self.assigned_paths.values()):
+                if not self.assigned_paths.unassigned:
                     return None
+                for wants_train in self._plan_checks:
+                    if not wants_train():
+                        return None
             case EventType.TrainReady:
-                ready_train = None
-                for train, train_content in self.trains_formed.items():
-                    if not train_content:
-                        continue
-
-                    maybe_loco = train_content[0]
-                    if maybe_loco not in LocoType:
-                        break
-
-                    loco_descr = maybe_loco.split('-')
-                    train_size = int(loco_descr[-1])
-
-                    if len(train_content) == train_size + 1 or (len(train_content) > 1 and not self.wagon_buffer):
-                        ready_train = train
-                        break
-
-                if not ready_train:
+                if not self.trains_formed.has_ready(buffer_drained=not self.wagon_buffer):
                     return None
+            case EventType.WagonArrived:
+                if self._wagon_checks:
+                    wagon_info = self.wagon_buffer.peek()
+                    if wagon_info is None:
+                        return None
+                    for accepts_wagon in self._wagon_checks:
+                        if not accepts_wagon(wagon_info):
+                            return None
             case _:
                 return candidate
 
@@ -141,3 +514,4 @@ class SortingHill:
         :param handler: Обработчик для регистрации.
         """
         self.handlers.append(handler(self))
+        self._build_dispatch()
@@ -0,0 +1,346 @@
+"""Модуль с реестром формируемых поездов"""
+
+from collections.abc import Iterable
+from typing import Self
+
+from sorting_hill.compact import CompactTrainContent
+from sorting_hill.consts import WagonType
+from sorting_hill.locomotives import LOCO_SPECS, loco_capacity
+from sorting_hill.mutations import (
+    LocoAttached,
+    MutationFeed,
+    TrainRenamed,
+    TrainSent,
+    WagonAttached,
+)
+
+
+class TrainContent(list):
+    """
+    Состав поезда: локомотив первым элементом, затем вагоны.
+
+    Ведёт себя как обычный список, но после каждого изменения
+    сообщает реестру, чтобы тот обновил индекс готовых поездов.
+    Вместимость локомотива (capacity) кэшируется реестром при прицепке локомотива.
+    """
+
+    __slots__ = ('_indexed', '_registry', 'capacity', 'handle', 'train')
+
+    def __init__(self, items: Iterable[str] = (), train: str | None = None,
+                 registry: 'TrainRegistry | None' = None) -> None:
+        """Инициализация состава"""
+        super().__init__(items)
+        self.train = train
+        self.handle: int | None = None
+        self.capacity: int | None = None
+        self._registry = registry
+        self._indexed = (False, 0, None)
+
+    @property
+    def free_slots(self) -> int:
+        """Сколько вагонов ещё можно прицепить (0, если локомотива нет)"""
+        return self.capacity - self._indexed[1] if self.capacity is not None else 0
+
+    def first_wagon_type(self) -> str | None:
+        """
+        Тип поезда по первому вагону.
+
+        :return: Тип первого вагона после локомотива, либо None, если вагонов нет.
+        """
+        for item in self:
+            if item not in LOCO_SPECS:
+                return item.rpartition('/')[2]
+        return None
+
+    def _changed(self, appended: str | None = None) -> None:
+        if self._registry is not None:
+            self._registry._reindex(self, appended)
+
+    def append(self, item: str) -> None:
+        super().append(item)
+        self._changed(item)
+
+    def extend(self, items: Iterable[str]) -> None:
+        super().extend(items)
+        self._changed()
+
+    def insert(self, index: int, item: str) -> None:
+        super().insert(index, item)
+        self._changed()
+
+    def pop(self, index: int = -1) -> str:
+        item = super().pop(index)
+        self._changed()
+        return item
+
+    def remove(self, item: str) -> None:
+        super().remove(item)
+        self._changed()
+
+    def clear(self) -> None:
+        super().clear()
+        self._changed()
+
+    def __setitem__(self, index, value) -> None:
+        super().__setitem__(index, value)
+        self._changed()
+
+    def __delitem__(self, index) -> None:
+        super().__delitem__(index)
+        self._changed()
+
+    def __iadd__(self, items: Iterable[str]) -> Self:
+        super().__iadd__(items)
+        self._changed()
+        return self
+
+
+class TrainRegistry(dict):
+    """
+    Словарь формируемых поездов (номер поезда -> состав).
+
+    Поддерживает индексы поездов:
+    - empty: запланированный состав, к которому ещё не подан локомотив;
+    - full: состав заполнен до вместимости локомотива;
+    - loaded: к локомотиву прицеплен хотя бы один вагон;
+    - open_trains: для каждого типа вагона - поезда этого типа (по первому вагону) с локомотивом
+      и свободным местом;
+    - untyped: поезда с локомотивом, но ещё без вагонов и без типа.
+    Индексы обновляются при изменении составов, поэтому проверки допустимости событий выполняются за O(1).
+
+    Кроме индексов реестр ведёт агрегаты: число вагонов на путях и накопительные счётчики
+    прицепленных локомотивов и вагонов и отправленных поездов. Отправленным считается только
+    поезд, снятый с путей через depart() хотя бы с одним вагоном; pop, del и clear лишь удаляют
+    составы из реестра (например, при переименовании или уборке пустых составов).
+    Индексы хранятся в словарях как упорядоченных множествах: первым отдаётся поезд,
+    раньше других попавший в индекс.
+
+    Каждый состав при первом размещении получает постоянный внутренний номер (handle),
+    который сохраняется при переименовании; номер поезда (content.train) служит
+    отображаемым именем и ключом словаря.
+    """
+
+    def __init__(self, compact: bool = False, feed: MutationFeed | None = None) -> None:
+        """
+        Инициализация реестра.
+
+        :param compact: Хранить составы в компактном виде (CompactTrainContent).
+        :param feed: Поток изменений для записей LocoAttached, WagonAttached, TrainRenamed и TrainSent.
+        """
+        super().__init__()
+        self.feed = feed or MutationFeed()
+        self._content_type = CompactTrainContent if compact else TrainContent
+        self.empty: dict[str, None] = {}
+        self.full: dict[str, None] = {}
+        self.loaded: dict[str, None] = {}
+        self.open_trains: dict[str, dict[str, None]] = {wagon_type: {} for wagon_type in WagonType}
+        self.untyped: dict[str, None] = {}
+        self._handles: dict[int, str] = {}
+        self._next_handle = 1
+        self.wagons_on_tracks = 0
+        self.locos_attached = 0
+        self.wagons_attached = 0
+        self.trains_sent = 0
+
+    def _reindex(self, content: TrainContent | CompactTrainContent, appended: str | None = None) -> None:
+        train = content.train
+        had_loco, had_wagons, had_type = content._indexed
+        if appended is not None and had_loco:
+            # Прицепка в конец не меняет локомотив: вместимость и тип берутся из кэша состава
+            capacity = content.capacity
+            has_loco = True
+            wagons = had_wagons + 1
+            size = wagons + 1
+            wagon_type = had_type
+            if wagon_type is None and appended not in LOCO_SPECS:
+                wagon_type = appended.rpartition('/')[2]
+        else:
+            size = len(content)
+            capacity = loco_capacity(content[0]) if size else None
+            content.capacity = capacity
+            has_loco = capacity is not None
+            wagons = size - has_loco
+            wagon_type = content.first_wagon_type() if has_loco and wagons else None
+        content._indexed = (has_loco, wagons, wagon_type)
+        if has_loco and not had_loco:
+            self.locos_attached += 1
+            if self.feed.subscribers:
+                self.feed.publish(LocoAttached(train, content[0]))
+        if wagons > had_wagons:
+            self.wagons_attached += wagons - had_wagons
+            if self.feed.subscribers:
+                for wagon_info in content[size - (wagons - had_wagons):]:
+                    self.feed.publish(WagonAttached(train, wagon_info))
+        self.wagons_on_tracks += wagons - had_wagons
+
+        if size:
+            self.empty.pop(train, None)
+        else:
+            self.empty.setdefault(train)
+
+        if capacity is not None and size > 1:
+            self.loaded.setdefault(train)
+        else:
+            self.loaded.pop(train, None)
+
+        if capacity is not None and size == capacity + 1:
+            self.full.setdefault(train)
+        else:
+            self.full.pop(train, None)
+
+        if had_type is not None and had_type != wagon_type:
+            self.open_trains[had_type].pop(train, None)
+        if wagon_type is not None:
+            open_trains = self.open_trains.setdefault(wagon_type, {})
+            if wagons < capacity:
+                open_trains.setdefault(train)
+            else:
+                open_trains.pop(train, None)
+
+        if has_loco and not wagons:
+            self.untyped.setdefault(train)
+        else:
+            self.untyped.pop(train, None)
+
+    def _unindex(self, train: str, content: TrainContent | CompactTrainContent) -> None:
+        _, wagons, wagon_type = content._indexed
+        self.wagons_on_tracks -= wagons
+        self.empty.pop(train, None)
+        self.full.pop(train, None)
+        self.loaded.pop(train, None)
+        self.untyped.pop(train, None)
+        if wagon_type is not None:
+            self.open_trains[wagon_type].pop(train, None)
+        self._handles.pop(content.handle, None)
+
+    def depart(self, train: str) -> TrainContent | CompactTrainContent:
+        """
+        Отправить поезд: снять состав с реестра и учесть отправку.
+
+        :param train: Номер поезда.
+        :return: Состав отправленного поезда.
+        :raises KeyError: Если поезда нет в реестре.
+        """
+        content = self.pop(train)
+        wagons = content._indexed[1]
+        if wagons:
+            self.trains_sent += 1
+            if self.feed.subscribers:
+                self.feed.publish(TrainSent(train, wagons))
+        return content
+
+    def next_empty(self) -> str | None:
+        """
+        Номер запланированного поезда без локомотива.
+
+        :return: Номер поезда, либо None, если все поезда уже с локомотивом.
+        """
+        return next(iter(self.empty), None)
+
+    def train_of(self, handle: int) -> str | None:
+        """
+        Текущий номер поезда по постоянному внутреннему номеру.
+
+        :param handle: Внутренний номер состава (content.handle).
+        :return: Номер поезда, либо None, если состава нет в реестре.
+        """
+        return self._handles.get(handle)
+
+    def next_open(self, wagon_type: str) -> str | None:
+        """
+        Номер поезда, в который можно поставить вагон: сначала поезд того же типа, затем поезд без типа.
+
+        :param wagon_type: Тип вагона.
+        :return: Номер поезда с локомотивом и свободным местом, либо None.
+        """
+        open_trains = self.open_trains.get(wagon_type)
+        if open_trains:
+            return next(iter(open_trains))
+        return next(iter(self.untyped), None)
+
+    def has_ready(self, buffer_drained: bool) -> bool:
+        """
+        Есть ли поезд, готовый к отправке.
+
+        :param buffer_drained: Очередь вагонов на сортировку пуста.
+        :return: True, если хотя бы один поезд готов.
+        """
+        return bool(self.full or (buffer_drained and self.loaded))
+
+    def next_ready(self, buffer_drained: bool) -> str | None:
+        """
+        Номер поезда, готового к отправке.
+
+        :param buffer_drained: Очередь вагонов на сортировку пуста.
+        :return: Номер поезда, либо None, если готовых поездов нет.
+        """
+        if self.full:
+            return next(iter(self.full))
+        if buffer_drained and self.loaded:
+            return next(iter(self.loaded))
+        return None
+
+    def __setitem__(self, train: str, content: Iterable[str]) -> None:
+        if train in self:
+            self._detach(train)
+
+        # Чужой или уже размещённый под другим номером состав копируется, чтобы не делить индекс
+        if not isinstance(content, self._content_type) or content._registry is not None:
+            content = self._content_type(content)
+        elif content.train is not None and content.train != train and self.feed.subscribers:
+            self.feed.publish(TrainRenamed(content.train, train))
+        content.train = train
+        content._registry = self
+        if content.handle is None:
+            content.handle = self._next_handle
+            self._next_handle += 1
+        self._handles[content.handle] = train
+        super().__setitem__(train, content)
+        # Возвращённый в реестр состав (например, после переименования) снова учитывается на путях
+        self.wagons_on_tracks += content._indexed[1]
+        self._reindex(content)
+
+    def __delitem__(self, train: str) -> None:
+        self._detach(train)
+        super().__delitem__(train)
+
+    def _detach(self, train: str) -> None:
+        content = super().__getitem__(train)
+        content._registry = None
+        self._unindex(train, content)
+
+    def pop(self, train: str, *default):
+        if train not in self:
+            if default:
+                return default[0]
+            raise KeyError(train)
+        self._detach(train)
+        return super().pop(train)
+
+    def popitem(self) -> tuple[str, TrainContent]:
+        train, content = super().popitem()
+        content._registry = None
+        self._unindex(train, content)
+        return train, content
+
+    def setdefault(self, train: str, default: Iterable[str] = ()) -> TrainContent:
+        if train not in self:
+            self[train] = default
+        return self[train]
+
+    def update(self, *args, **kwargs) -> None:
+        for train, content in dict(*args, **kwargs).items():
+            self[train] = content
+
+    def clear(self) -> None:
+        for train, content in self.items():
+            content._registry = None
+            self._unindex(train, content)
+        super().clear()
+        self.empty.clear()
+        self.full.clear()
+        self.loaded.clear()
+        self.untyped.clear()
+        self._handles.clear()
+        for open_trains in self.open_trains.values():
+            open_trains.clear()
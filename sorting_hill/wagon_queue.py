@@ -0,0 +1,73 @@
+"""Модуль с очередью поступающих вагонов"""
+
+from collections import deque
+from collections.abc import Iterable, Iterator
+
+
+class WagonQueue:
+    """
+    Очередь вагонов на сортировку.
+
+    Снятие головы очереди, добавление в хвост и получение длины выполняются за O(1).
+    Поддерживает проверку на истинность так же, как обычный список.
+    """
+
+    __slots__ = ('_items',)
+
+    def __init__(self, wagons: Iterable[str] = ()) -> None:
+        """Инициализация очереди"""
+        self._items: deque[str] = deque(wagons)
+
+    def append(self, wagon_info: str) -> None:
+        """
+        Поставить вагон в конец очереди.
+
+        :param wagon_info: Строка с информацией о вагоне в формате НОМЕР/Т(ип)
+        """
+        self._items.append(wagon_info)
+
+    def extend(self, wagons: Iterable[str]) -> None:
+        """
+        Поставить в конец очереди несколько вагонов разом.
+
+        :param wagons: Вагоны в порядке поступления.
+        """
+        self._items.extend(wagons)
+
+    enqueue_many = extend
+
+    def peek(self) -> str | None:
+        """
+        Посмотреть первый вагон в очереди, не снимая его.
+
+        :return: Информация о вагоне, либо None для пустой очереди.
+        """
+        return self._items[0] if self._items else None
+
+    def popleft(self) -> str:
+        """
+        Снять первый вагон из очереди.
+
+        :return: Информация о вагоне.
+        :raises IndexError: Если очередь пуста.
+        """
+        return self._items.popleft()
+
+    def clear(self) -> None:
+        """Очистить очередь"""
+        self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __bool__(self) -> bool:
+        return bool(self._items)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._items)
+
+    def __getitem__(self, index: int) -> str:
+        return self._items[index]
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({list(self._items)!r})'
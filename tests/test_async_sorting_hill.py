@@ -0,0 +1,226 @@
+"""
+План тестирования (асинхронная сортировочная горка)
+===================================================
+Позитивные тесты:
+- test_async_handlers_receive_events_from_several_producers:
+  события от нескольких источников применяются к горке, асинхронный хэндлер получает их по порядку.
+- test_put_wagon_waits_for_free_space:
+  постановка вагона в заполненную очередь ждёт, пока вагон не будет обработан.
+- test_failed_event_is_not_forwarded:
+  вагон, который оператор не разместил, не передаётся асинхронному хэндлеру, а повтор передаётся один раз.
+- test_full_handler_queue_drops_calls:
+  при политике drop переполненная очередь хэндлера отбрасывает вызовы и считает их.
+- test_handler_error_does_not_stop_pump:
+  исключение асинхронного хэндлера учитывается, а следующие вызовы продолжают обрабатываться.
+
+Негативные тесты:
+- test_waiting_put_wagon_is_released_on_shift_end:
+  источник, ждущий места в очереди вагонов, получает исключение после окончания смены.
+- test_unknown_overflow_policy_raises:
+  неизвестная политика переполнения приводит к ожидаемому исключению.
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sorting_handler.async_interface import AsyncSortingHandler
+from sorting_handler.sorting_operator import SortingOperatorImpl
+from sorting_hill.async_sorting_hill import AsyncSortingHill
+from sorting_hill.sink import POLICY_DROP
+from sorting_hill.consts import EventType, WagonType
+from sorting_hill.sorting_hill import SortingHill
+
+
+class _AsyncRecorder(AsyncSortingHandler):
+    """Асинхронный хэндлер, записывающий вызовы с имитацией ввода-вывода."""
+
+    def __init__(self, sorting_hill: SortingHill) -> None:
+        self.sorting_hill = sorting_hill
+        self.calls: list[str] = []
+
+    async def _record(self, name: str) -> None:
+        await asyncio.sleep(0)
+        self.calls.append(name)
+
+    async def handle_wagon(self, wagon_info: str) -> None:
+        await self._record(f'wagon {wagon_info}')
+
+    async def handle_locomotive(self, locomotive: str) -> None:
+        await self._record('loco')
+
+    async def prepare_path(self) -> None:
+        await self._record('path')
+
+    async def allocate_path_for_train(self) -> None:
+        await self._record('train')
+
+    async def send_train(self) -> None:
+        await self._record('send')
+
+    async def start_shift(self) -> None:
+        await self._record('start')
+
+    async def end_shift(self) -> None:
+        await self._record('end')
+
+
+class _FailingRecorder(_AsyncRecorder):
+    """Асинхронный хэндлер, падающий на подготовке пути."""
+
+    async def prepare_path(self) -> None:
+        raise ValueError('disk is full')
+
+
+# ---------- позитивные юниты ----------
+
+def test_async_handlers_receive_events_from_several_producers() -> None:
+    """AsyncSortingHill: несколько источников, синхронный оператор и асинхронный хэндлер."""
+    hill = SortingHill(number_of_paths=2)
+    yard = AsyncSortingHill(hill)
+    yard.register_handler(SortingOperatorImpl)
+    yard.register_async_handler(_AsyncRecorder)
+    recorder = yard.handlers[0]
+    wagon_info = f'12345678/{WagonType.Gruz}'
+
+    async def dispatcher() -> None:
+        for event in (EventType.ShiftStarted, EventType.PreparePath, EventType.TrainPlanned):
+            await yard.submit(event)
+
+    async def locos() -> None:
+        await yard.submit(EventType.LocoArrived)
+
+    async def wagons() -> None:
+        await yard.put_wagon(wagon_info)
+        await yard.submit(EventType.WagonArrived)
+        await yard.submit(EventType.ShiftEnded)
+
+    async def scenario() -> None:
+        await dispatcher()
+        await locos()
+        await asyncio.gather(yard.run(), wagons())
+
+    asyncio.run(scenario())
+    assert recorder.calls == ['start', 'path', 'train', 'loco', f'wagon {wagon_info}', 'send', 'end'], (
+        'Убедитесь, что асинхронный хэндлер получает события в порядке их применения к горке.'
+    )
+    assert not hill.trains_formed and not yard.errors, (
+        'Проверьте, что события применены к горке синхронно и смена завершилась без ошибок.'
+    )
+
+
+def test_put_wagon_waits_for_free_space() -> None:
+    """put_wagon: при заполненной очереди вагонов источник ждёт обработки."""
+    hill = SortingHill(number_of_paths=2)
+    yard = AsyncSortingHill(hill, max_wagons=1)
+
+    async def scenario() -> bool:
+        await yard.put_wagon(f'00000001/{WagonType.Gruz}')
+        blocked = asyncio.create_task(yard.put_wagon(f'00000002/{WagonType.Gruz}'))
+        await asyncio.sleep(0)
+        was_blocked = not blocked.done()
+
+        runner = asyncio.create_task(yard.run())
+        await yard.submit(EventType.WagonArrived)
+        await blocked
+        await yard.close()
+        await runner
+        return was_blocked
+
+    assert asyncio.run(scenario()), 'Убедитесь, что put_wagon ждёт, пока в очереди вагонов нет места.'
+    assert list(hill.wagon_buffer) == [f'00000002/{WagonType.Gruz}'], (
+        'Проверьте, что после обработки вагона ожидавший источник ставит свой вагон в очередь.'
+    )
+
+
+def test_failed_event_is_not_forwarded() -> None:
+    """run: вызовы события передаются асинхронным хэндлерам только после успешной обработки."""
+    hill = SortingHill(number_of_paths=1)
+    yard = AsyncSortingHill(hill)
+    yard.register_handler(SortingOperatorImpl)
+    yard.register_async_handler(_AsyncRecorder)
+    recorder = yard.handlers[0]
+    first, wagon_info = f'11111111/{WagonType.Gruz}', f'12345678/{WagonType.Pass}'
+    hill.wagon_buffer.extend([first, wagon_info])
+    train = (EventType.PreparePath, EventType.TrainPlanned, EventType.LocoArrived)
+
+    async def scenario() -> None:
+        # Единственный путь занят поездом другого типа: оператор отклоняет вагон, отправив поезд,
+        # вагон остаётся в очереди и снимается повторной командой, когда готов новый поезд
+        for event in (*train, EventType.WagonArrived, EventType.WagonArrived, *train, EventType.WagonArrived):
+            await yard.submit(event)
+        await yard.close()
+        await yard.run()
+
+    asyncio.run(scenario())
+    assert len(yard.errors) == 1, 'Проверьте, что ошибка оператора учтена.'
+    assert recorder.calls == ['path', 'train', 'loco', f'wagon {first}', 'path', 'train', 'loco', f'wagon {wagon_info}'], (
+        'Убедитесь, что отклонённый вагон не передаётся асинхронному хэндлеру, а повтор передаётся один раз.'
+    )
+
+
+def test_full_handler_queue_drops_calls() -> None:
+    """run(overflow=drop): очередь хэндлера ограничена max_pending."""
+    hill = SortingHill(number_of_paths=15)
+    yard = AsyncSortingHill(hill, max_pending=2, overflow=POLICY_DROP, fairness_batch=1_000)
+    yard.register_async_handler(_AsyncRecorder)
+    recorder = yard.handlers[0]
+
+    async def scenario() -> None:
+        for _ in range(10):
+            await yard.submit(EventType.PreparePath)
+        await yard.close()
+        await yard.run()
+
+    asyncio.run(scenario())
+    assert yard.calls_dropped + len(recorder.calls) == 10 and yard.calls_dropped > 0, (
+        'Проверьте, что лишние вызовы отбрасываются и учитываются в calls_dropped.'
+    )
+    assert yard.events_accepted == 10, 'Убедитесь, что переполнение не влияет на обработку событий горкой.'
+
+
+def test_handler_error_does_not_stop_pump() -> None:
+    """_pump: исключение любого типа не останавливает задачу асинхронного хэндлера."""
+    hill = SortingHill(number_of_paths=2)
+    yard = AsyncSortingHill(hill)
+    yard.register_async_handler(_FailingRecorder)
+    recorder = yard.handlers[0]
+
+    async def scenario() -> None:
+        for event in (EventType.ShiftStarted, EventType.PreparePath, EventType.ShiftEnded):
+            await yard.submit(event)
+        await yard.run()
+
+    asyncio.run(scenario())
+    assert recorder.calls == ['start', 'end'], 'Убедитесь, что после ошибки хэндлер получает следующие вызовы.'
+    assert len(yard.errors) == 1 and isinstance(yard.errors[0], ValueError), (
+        'Проверьте, что ошибка асинхронного хэндлера учтена в errors.'
+    )
+
+
+# ---------- негативные юниты ----------
+
+def test_waiting_put_wagon_is_released_on_shift_end() -> None:
+    """put_wagon: ожидание места прерывается исключением, когда run() завершился."""
+    hill = SortingHill(number_of_paths=2)
+    yard = AsyncSortingHill(hill, max_wagons=1)
+
+    async def scenario() -> None:
+        await yard.put_wagon(f'00000001/{WagonType.Gruz}')
+        blocked = asyncio.create_task(yard.put_wagon(f'00000002/{WagonType.Gruz}'))
+        await yard.submit(EventType.ShiftEnded)
+        await yard.run()
+        with pytest.raises(RuntimeError, match='async sorting hill is closed'):
+            await asyncio.wait_for(blocked, timeout=5)
+
+    asyncio.run(scenario())
+
+
+def test_unknown_overflow_policy_raises() -> None:
+    """AsyncSortingHill: неизвестная политика переполнения приводит к ValueError."""
+    with pytest.raises(ValueError, match='unknown overflow policy'):
+        AsyncSortingHill(SortingHill(number_of_paths=2), overflow='block')
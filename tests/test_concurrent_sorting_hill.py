@@ -0,0 +1,67 @@
+"""
+План тестирования (потокобезопасная сортировочная горка)
+========================================================
+Позитивные тесты:
+- test_parallel_operators_place_every_wagon_once:
+  несколько потоков-операторов разбирают общую очередь, каждый вагон попадает ровно в один поезд.
+- test_take_is_atomic_and_push_front_restores_order:
+  атомарное снятие вагонов и возврат необработанных вагонов в голову очереди.
+"""
+
+import os
+import sys
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sorting_handler.concurrent_operator import ConcurrentSortingOperatorImpl
+from sorting_hill.concurrent_sorting_hill import ConcurrentSortingHill, ConcurrentWagonQueue
+from sorting_hill.consts import EventType, LocoType, WagonType
+
+
+# ---------- позитивные юниты ----------
+
+def test_parallel_operators_place_every_wagon_once() -> None:
+    """ConcurrentSortingHill: вагоны из общей очереди распределяются без потерь и дублей."""
+    hill = ConcurrentSortingHill(number_of_paths=8)
+    hill.register_handler(ConcurrentSortingOperatorImpl)
+    for _ in range(8):
+        hill.handle_event(EventType.PreparePath)
+        hill.handle_event(EventType.TrainPlanned)
+        hill.handlers[0].handle_locomotive(LocoType.Diesel64)
+
+    wagons = [f'{number:08d}/{WagonType.Gruz}' for number in range(400)]
+    hill.wagon_buffer.extend(wagons)
+
+    def worker() -> None:
+        while hill.wagon_buffer:
+            hill.handle_event(EventType.WagonArrived)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    placed = [wagon for content in hill.trains_formed.values() for wagon in content[1:]]
+    assert sorted(placed) == wagons, 'Убедитесь, что каждый вагон попал ровно в один поезд.'
+    assert all(len(content) <= 65 for content in hill.trains_formed.values()), (
+        'Проверьте, что параллельная прицепка не превышает вместимость локомотива.'
+    )
+    assert hill.trains_formed.wagons_on_tracks == len(wagons), (
+        'Убедитесь, что агрегаты реестра согласованы после параллельной работы.'
+    )
+    assert all(hill.path_of(train) is not None for train in hill.trains_formed), (
+        'Проверьте, что для каждого поезда известен его путь.'
+    )
+
+
+def test_take_is_atomic_and_push_front_restores_order() -> None:
+    """ConcurrentWagonQueue: take/take_many и возврат вагонов в голову очереди."""
+    queue = ConcurrentWagonQueue(['1', '2', '3', '4'])
+    assert queue.take() == '1' and queue.take_many(2) == ['2', '3'], (
+        'Убедитесь, что вагоны снимаются из головы очереди по порядку.'
+    )
+    queue.push_front(['2', '3'])
+    assert list(queue) == ['2', '3', '4'], 'Проверьте, что возвращённые вагоны встают в голову очереди по порядку.'
+    assert ConcurrentWagonQueue().take() is None, 'Убедитесь, что take на пустой очереди возвращает None.'
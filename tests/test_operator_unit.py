@@ -12,12 +12,20 @@
   метод handle_wagon определяет тип состава по первому вагону и переименовывает идентификатор поезда.
 - test_send_train_when_full_or_allowed:
   метод send_train отправляет готовый поезд и освобождает путь.
+- test_operator_actions_publish_mutations:
+  действия оператора публикуются в поток изменений SortingHill в порядке выполнения.
+- test_shift_end_sends_trains_in_one_batch:
+  окончание смены отправляет все поезда с вагонами одним вызовом send_trains и освобождает пути.
+- test_blocked_yard_sends_partial_train:
+  если все пути заняты поездами других типов, вагон не размещается, но недозаполненный поезд уходит и путь освобождается.
 
 Негативные тесты:
 - test_handle_wagon_without_paths_raises:
   метод handle_wagon вызывается до подготовки путей — ожидается исключение.
 - test_second_allocate_without_free_path_raises:
   метод allocate_path_for_train вызывается повторно без свободного места — ожидается исключение.
+- test_send_trains_with_unready_train_raises:
+  пакет с неготовым поездом не отправляется — ожидается исключение.
 """
 
 import os
@@ -28,8 +36,11 @@ import pytest
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from sorting_hill.sorting_hill import SortingHill
-from sorting_hill.consts import WagonType, LocoType
+from sorting_hill.consts import EventType, WagonType, LocoType
 from sorting_handler.sorting_operator import SortingOperatorImpl
+from sorting_hill.mutations import (
+    LocoAttached, PathFreed, PathPrepared, TrainAllocated, TrainRenamed, TrainSent, WagonAttached,
+)
 
 
 # ---------- фикстуры ----------
@@ -136,6 +147,92 @@ def test_send_train_when_full_or_allowed(operator: SortingOperatorImpl, hill: So
     )
 
 
+def test_operator_actions_publish_mutations(operator: SortingOperatorImpl, hill: SortingHill) -> None:
+    """subscribe: подписчик получает записи об изменениях без обхода состояния."""
+    mutations = []
+    hill.subscribe(mutations.append)
+
+    operator.prepare_path()
+    operator.allocate_path_for_train()
+    operator.handle_locomotive(LocoType.Electro16)
+    wagon_info = f'12345678/{WagonType.Pass}'
+    typed_train = operator.handle_wagon(wagon_info)
+    operator.send_train()
+
+    assert mutations == [
+        PathPrepared(1),
+        TrainAllocated(1, '0001'),
+        LocoAttached('0001', LocoType.Electro16),
+        TrainRenamed('0001', typed_train),
+        WagonAttached(typed_train, wagon_info),
+        TrainSent(typed_train, 1),
+        PathFreed(1, typed_train),
+    ], 'Убедитесь, что каждое изменение путей и составов публикуется одной записью в порядке выполнения.'
+
+
+class _BatchRecordingOperator(SortingOperatorImpl):
+    """Оператор, записывающий пакеты отправки."""
+
+    def __init__(self, sorting_hill: SortingHill) -> None:
+        super().__init__(sorting_hill)
+        self.batches: list[list[str]] = []
+
+    def send_trains(self, trains):
+        self.batches.append(list(trains))
+        return super().send_trains(trains)
+
+
+def test_shift_end_sends_trains_in_one_batch() -> None:
+    """ShiftEnded: поезда с вагонами уходят одним пакетом, пустые составы снимаются без отправки."""
+    hill = SortingHill(number_of_paths=3)
+    hill.register_handler(_BatchRecordingOperator)
+    operator = hill.handlers[0]
+    for _ in range(2):
+        hill.handle_event(EventType.PreparePath)
+        hill.handle_event(EventType.TrainPlanned)
+    hill.handle_event(EventType.LocoArrived)
+    hill.handle_event(EventType.LocoArrived)
+    first_train = operator.handle_wagon(f'11111111/{WagonType.Gruz}')
+    second_train = operator.handle_wagon(f'22222222/{WagonType.Pass}')
+    hill.handle_event(EventType.PreparePath)
+
+    hill.handle_event(EventType.ShiftEnded)
+    assert operator.batches == [[first_train, second_train]], (
+        'Убедитесь, что оставшиеся поезда отправляются одним вызовом send_trains в порядке путей.'
+    )
+    assert not hill.trains_formed and not hill.assigned_paths, (
+        'Проверьте, что после окончания смены на путях не остаётся поездов и подготовленных путей.'
+    )
+    assert hill.trains_formed.trains_sent == 2, 'Убедитесь, что отправленными считаются только поезда с вагонами.'
+
+
+def test_blocked_yard_sends_partial_train(operator: SortingOperatorImpl, hill: SortingHill) -> None:
+    """handle_wagon: блокировка горки снимается отправкой недозаполненного поезда."""
+    for wagon_type in (WagonType.Gruz, WagonType.Pass):
+        operator.prepare_path()
+        operator.allocate_path_for_train()
+        operator.handle_locomotive(LocoType.Electro16)
+        operator.handle_wagon(f'00000001/{wagon_type}')
+
+    wagon_info = f'00000002/{WagonType.Empty}'
+    with pytest.raises(RuntimeError, match='no train for wagon .* sent to free a path'):
+        operator.handle_wagon(wagon_info)
+    assert hill.trains_formed.trains_sent == 1 and list(hill.trains_formed) == [f'0002{WagonType.Pass}'], (
+        'Убедитесь, что при блокировке уходит поезд, раньше других попавший на пути.'
+    )
+    assert hill.assigned_paths.free_count == 1, 'Проверьте, что путь отправленного поезда освобождён.'
+
+    operator.prepare_path()
+    operator.allocate_path_for_train()
+    with pytest.raises(RuntimeError, match='no train for wagon'):
+        operator.handle_wagon(wagon_info)
+    assert hill.trains_formed.trains_sent == 1, (
+        'Убедитесь, что без блокировки (поезд ждёт локомотив) недозаполненные поезда не отправляются.'
+    )
+    operator.handle_locomotive(LocoType.Electro16)
+    assert operator.handle_wagon(wagon_info) == f'0003{WagonType.Empty}'
+
+
 # ---------- негативные юниты ----------
 
 def test_handle_wagon_without_paths_raises(operator: SortingOperatorImpl) -> None:
@@ -150,3 +247,15 @@ def test_second_allocate_without_free_path_raises(operator: SortingOperatorImpl)
     operator.allocate_path_for_train()
     with pytest.raises(RuntimeError, match='no path for train'):
         operator.allocate_path_for_train()
+
+
+def test_send_trains_with_unready_train_raises(operator: SortingOperatorImpl, hill: SortingHill) -> None:
+    """send_trains: при непустой очереди недозаполненный поезд не готов, пакет не отправляется."""
+    operator.prepare_path()
+    operator.allocate_path_for_train()
+    operator.handle_locomotive(LocoType.Electro16)
+    train = operator.handle_wagon(f'11111111/{WagonType.Gruz}')
+    hill.wagon_buffer.append(f'22222222/{WagonType.Gruz}')
+    with pytest.raises(RuntimeError, match='is not ready'):
+        operator.send_trains([train])
+    assert train in hill.trains_formed, 'Проверьте, что поезд из отклонённого пакета остаётся на пути.'
@@ -0,0 +1,162 @@
+"""
+План тестирования (юниты для PlanningOperatorImpl)
+==================================================
+Позитивные тесты:
+- test_allocate_reserves_train_for_demanded_type:
+  новый поезд планируется под тип вагонов с наибольшим непокрытым спросом в голове очереди.
+- test_locomotive_goes_to_best_fitting_reservation:
+  локомотив прицепляется к поезду, зарезервированному под тип со спросом, близким к его вместимости.
+- test_wagon_goes_to_train_reserved_for_its_type:
+  вагон без открытого поезда своего типа ставится в поезд, зарезервированный под его тип.
+- test_planner_shift_matches_summary_contract:
+  смена с планировщиком отрабатывается до конца и воспроизводима для одинакового зерна.
+- test_covered_demand_disables_train_planned:
+  при покрытом спросе горка не допускает TrainPlanned, пока в очереди не появится новый спрос.
+- test_planner_shift_has_no_handler_errors:
+  смены с планировщиком и репортёром проходят без ошибок обработки команд.
+- test_planner_does_not_scan_text_manifest:
+  окно спроса по текстовому манифесту дочитывается без прохода по файлу для подсчёта длины.
+
+Негативные тесты:
+- test_allocate_without_uncovered_demand_raises:
+  планирование поезда при покрытом спросе приводит к ожидаемому исключению.
+"""
+
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sorting_handler.planning_operator import PlanningOperatorImpl
+from sorting_hill import manifest as manifest_module
+from sorting_hill.consts import EventType, LocoType, WagonType
+from sorting_hill.simulation import PLANNER_HANDLERS, generate_wagons, run_shift
+from sorting_hill.sorting_hill import SortingHill
+
+
+# ---------- фикстуры ----------
+
+@pytest.fixture
+def hill() -> SortingHill:
+    """Горка с тремя путями и очередью: 30 грузовых, затем 10 пассажирских вагонов."""
+    hill = SortingHill(number_of_paths=3)
+    hill.wagon_buffer.extend(f'{number:06d}/{WagonType.Gruz}' for number in range(30))
+    hill.wagon_buffer.extend(f'{number:06d}/{WagonType.Pass}' for number in range(30, 40))
+    return hill
+
+
+@pytest.fixture
+def planner(hill: SortingHill) -> PlanningOperatorImpl:
+    """Экземпляр планировщика для юнит-тестов."""
+    return PlanningOperatorImpl(hill)
+
+
+def _plan(planner: PlanningOperatorImpl) -> str:
+    planner.prepare_path()
+    return next(iter(planner.allocate_path_for_train().values()))
+
+
+# ---------- позитивные юниты ----------
+
+def test_allocate_reserves_train_for_demanded_type(planner: PlanningOperatorImpl) -> None:
+    """allocate_path_for_train: первый поезд - под грузовые вагоны, второй - под пассажирские."""
+    first = _plan(planner)
+    second = _plan(planner)
+    assert planner._reserved == {first: WagonType.Gruz, second: WagonType.Pass}, (
+        'Убедитесь, что поезда планируются под типы в порядке непокрытого спроса.'
+    )
+
+
+def test_locomotive_goes_to_best_fitting_reservation(planner: PlanningOperatorImpl, hill: SortingHill) -> None:
+    """handle_locomotive: 16-вагонный локомотив - к пассажирскому поезду (спрос 10), 32-вагонный - к грузовому."""
+    gruz_train = _plan(planner)
+    pass_train = _plan(planner)
+    assert planner.handle_locomotive(LocoType.Electro16) == pass_train, (
+        'Проверьте, что локомотив малой вместимости получает поезд с меньшим спросом.'
+    )
+    assert planner.handle_locomotive(LocoType.Electro32) == gruz_train, (
+        'Проверьте, что локомотив большой вместимости получает поезд с большим спросом.'
+    )
+    assert hill.trains_formed[pass_train][0] == LocoType.Electro16, (
+        'Убедитесь, что локомотив действительно прицеплен к выбранному поезду.'
+    )
+
+
+def test_wagon_goes_to_train_reserved_for_its_type(planner: PlanningOperatorImpl, hill: SortingHill) -> None:
+    """handle_wagon: пассажирский вагон идёт в зарезервированный под него поезд, а не в первый открытый."""
+    _plan(planner)
+    pass_train = _plan(planner)
+    planner.handle_locomotive(LocoType.Electro16)
+    planner.handle_locomotive(LocoType.Electro32)
+    for _ in range(30):
+        hill.wagon_buffer.popleft()
+    wagon_info = hill.wagon_buffer.popleft()
+    train = planner.handle_wagon(wagon_info)
+    assert train == f'{pass_train}{WagonType.Pass}', (
+        'Убедитесь, что вагон ставится в поезд, зарезервированный под его тип, и поезд переименован.'
+    )
+
+
+def test_planner_shift_matches_summary_contract() -> None:
+    """run_shift: смена с планировщиком отрабатывает очередь и воспроизводима."""
+    first = run_shift(seed=5, number_of_paths=6, number_of_wagons=400, handlers=(PlanningOperatorImpl,))
+    second = run_shift(seed=5, number_of_paths=6, number_of_wagons=400, handlers=(PlanningOperatorImpl,))
+    assert first == second, 'Убедитесь, что прогон с планировщиком воспроизводим.'
+    assert first.stalled or (first.wagons_left == 0 and first.wagons_on_tracks == 0), (
+        'Проверьте, что без застревания смена с планировщиком отправляет все вагоны.'
+    )
+
+
+def test_covered_demand_disables_train_planned(hill: SortingHill) -> None:
+    """check_event(TrainPlanned): планировщик отказывается от поезда без непокрытого спроса."""
+    hill.register_handler(PlanningOperatorImpl)
+    planner = hill.handlers[0]
+    _plan(planner)
+    _plan(planner)
+    planner.prepare_path()
+    assert hill.check_event(EventType.TrainPlanned) is None, (
+        'Проверьте, что при покрытом спросе горка не допускает планирование поезда.'
+    )
+    hill.wagon_buffer.extend(f'{number:06d}/{WagonType.OpasnGruz}' for number in range(40, 60))
+    assert hill.check_event(EventType.TrainPlanned) == EventType.TrainPlanned, (
+        'Проверьте, что новый спрос в очереди снова допускает планирование поезда.'
+    )
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_planner_shift_has_no_handler_errors(seed: int) -> None:
+    """run_shift: планировщик не получает команд, которые заведомо не выполнит."""
+    # На двух путях при четырёх типах вагонов горка блокируется, и оператор освобождает путь
+    # отклонением вагона (см. test_blocked_yard_sends_partial_train), поэтому путей больше
+    summary = run_shift(seed=seed, number_of_paths=4, handlers=PLANNER_HANDLERS)
+    assert summary.errors == 0, 'Проверьте, что TrainPlanned не допускается без непокрытого спроса.'
+
+
+def test_planner_does_not_scan_text_manifest(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """_sync: длина текстового манифеста не запрашивается, смена отрабатывает все вагоны."""
+    text = tmp_path / 'wagons.txt'
+    text.write_text('\n'.join(generate_wagons(random.Random(0), 500)) + '\n', encoding='utf-8')
+
+    def no_scan(path: object) -> int:
+        raise AssertionError('text manifest scanned')
+
+    monkeypatch.setattr(manifest_module, '_count_lines', no_scan)
+    summary = run_shift(seed=1, number_of_paths=4, handlers=PLANNER_HANDLERS, manifest=text)
+    assert summary.wagons_left == 0 and not summary.stalled, (
+        'Убедитесь, что планировщик дочитывает окно спроса без подсчёта строк манифеста.'
+    )
+
+
+# ---------- негативные юниты ----------
+
+def test_allocate_without_uncovered_demand_raises(planner: PlanningOperatorImpl) -> None:
+    """allocate_path_for_train: спрос покрыт запланированными поездами - исключение."""
+    _plan(planner)
+    _plan(planner)
+    planner.prepare_path()
+    with pytest.raises(RuntimeError, match='no demand for a new train'):
+        planner.allocate_path_for_train()
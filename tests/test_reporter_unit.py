@@ -12,11 +12,16 @@
   метод handle_wagon учитывает обработанный вагон по изменению total_wagons.
 - test_send_train_increments_trains_sent:
   метод send_train отражает убыль поездов в trains_formed как отправку.
+- test_shift_end_cleanup_is_counted_as_sent:
+  составы без вагонов, снятые с путей в конце смены, учитываются как отправленные, как и в отчёте по снэпшотам.
+- test_report_matches_snapshot_reporter:
+  на одной и той же смене с зерном статистика совпадает с репортёром, сравнивающим снэпшоты горки.
 
 Замечания:
-- Репортёр не изменяет состояние напрямую, а сравнивает снэпшоты SortingHill.
+- Репортёр не изменяет состояние напрямую, а читает агрегаты, которые поддерживает SortingHill.
 """
 import os
+import random
 import sys
 from typing import Tuple
 import pytest
@@ -24,9 +29,12 @@ import pytest
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from sorting_hill.sorting_hill import SortingHill
-from sorting_hill.consts import WagonType, LocoType
+from sorting_hill.consts import EventType, WagonType, LocoType
 from sorting_handler.sorting_operator import SortingOperatorImpl
 from sorting_handler.sorting_reporter import SortingReporterImpl
+from sorting_hill.scheduler import EventScheduler
+from sorting_hill.simulation import build_hill
+from sorting_hill.sink import NullSink
 
 
 # ---------- фикстуры ----------
@@ -144,3 +152,92 @@ def test_send_train_increments_trains_sent(operator: SortingOperatorImpl, report
         'Проверьте, что метод send_train в репортёре фиксирует отправку поезда: '
         'счётчик "trains_sent" становится не меньше 1 после удаления состава из trains_formed.'
     )
+
+
+def test_shift_end_cleanup_is_counted_as_sent(hill: SortingHill) -> None:
+    """end_shift: состав с локомотивом без вагонов снимается с пути и считается отправленным."""
+    hill.register_handler(SortingOperatorImpl)
+    hill.register_handler(SortingReporterImpl)
+    reporter = hill.handlers[1]
+    hill.handle_event(EventType.ShiftStarted)
+    for event in (EventType.PreparePath, EventType.TrainPlanned, EventType.LocoArrived,
+                  EventType.PreparePath, EventType.TrainPlanned, EventType.LocoArrived):
+        hill.handle_event(event)
+    hill.wagon_buffer.append(f'44444444/{WagonType.Pass}')
+    hill.handle_event(EventType.WagonArrived)
+
+    hill.handle_event(EventType.ShiftEnded)
+    assert reporter.stats['trains_sent'] == 2, (
+        'Убедитесь, что в конце смены отправленными считаются и поезд с вагонами, и снятый состав без вагонов.'
+    )
+    assert reporter.stats['wagons_handled'] == 1 and reporter.stats['locos_arrived'] == 2, (
+        'Проверьте, что счётчики вагонов и локомотивов совпадают с фактическими событиями смены.'
+    )
+
+
+class _SnapshotReporter(SortingReporterImpl):
+    """Прежний репортёр: считает события по разнице снэпшотов горки до и после события."""
+
+    def __init__(self, sorting_hill: SortingHill) -> None:
+        super().__init__(sorting_hill)
+        self._snapshot = self._take_snapshot()
+
+    def _take_snapshot(self) -> Tuple[int, int, int]:
+        hill = self.sorting_hill
+        total_wagons = sum(len(content) for content in hill.trains_formed.values())
+        return len(hill.assigned_paths), len(hill.trains_formed), total_wagons
+
+    def _diff(self) -> Tuple[int, int, int]:
+        before = self._snapshot
+        self._snapshot = after = self._take_snapshot()
+        return after[0] - before[0], after[1] - before[1], after[2] - before[2]
+
+    def handle_wagon(self, wagon_info: str) -> None:
+        self.stats['wagons_handled'] += max(0, self._diff()[2])
+
+    def handle_locomotive(self, locomotive: str) -> None:
+        self._diff()
+        self.stats['locos_arrived'] += 1
+
+    def prepare_path(self) -> None:
+        self.stats['paths_prepared'] += max(0, self._diff()[0])
+
+    def allocate_path_for_train(self) -> None:
+        self.stats['trains_planned'] += max(0, self._diff()[1])
+
+    def send_train(self) -> None:
+        self.stats['trains_sent'] += max(0, -self._diff()[1])
+
+    def send_trains(self, trains) -> list[None]:
+        return [self.send_train() for _ in trains]
+
+    def start_shift(self) -> None:
+        self.stats = dict.fromkeys(self.stats, 0)
+        self._snapshot = self._take_snapshot()
+
+    def end_shift(self) -> None:
+        pass
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_report_matches_snapshot_reporter(seed: int) -> None:
+    """run_shift: репортёр по агрегатам и прежний репортёр по снэпшотам дают одинаковую статистику."""
+    hill = build_hill(
+        random.Random(seed), number_of_paths=15, number_of_wagons=1_000,
+        handlers=(SortingOperatorImpl, SortingReporterImpl, _SnapshotReporter),
+    )
+    hill.sink = NullSink()
+    rng = random.Random(seed)
+    scheduler = EventScheduler(hill, rng)
+    hill.handle_event(EventType.ShiftStarted)
+    while hill.wagon_buffer:
+        event = scheduler.next_event()
+        if event is None:
+            break
+        hill.handle_event(event)
+    hill.handle_event(EventType.ShiftEnded)
+
+    reporter, snapshot_reporter = hill.handlers[1], hill.handlers[2]
+    assert reporter.stats == snapshot_reporter.stats, (
+        'Проверьте, что статистика смены совпадает с прежним отчётом, включая составы, снятые в конце смены.'
+    )
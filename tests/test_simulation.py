@@ -0,0 +1,264 @@
+"""
+План тестирования (безголовый прогон смены)
+===========================================
+Позитивные тесты:
+- test_same_seed_gives_same_shift:
+  прогоны с одинаковым зерном дают одинаковые итоги смены.
+- test_trace_output_is_reproducible:
+  трасса команд с виртуальным временем повторяется для одинакового зерна.
+- test_stalled_shift_ends_early:
+  смена, в которой головной вагон некуда поставить, а оператор не освобождает путь, завершается досрочно
+  с остатком вагонов.
+- test_monte_carlo_returns_compact_stats:
+  параллельный прогон возвращает компактные итоги смен и сводку по числу путей.
+- test_scheduler_draws_only_enabled_events:
+  планировщик выбирает только допустимые события, а вагон - только если его есть куда поставить.
+- test_scheduler_checks_each_candidate_once:
+  планировщик проверяет только вытянутые события и не проверяет отклонённое событие повторно.
+- test_send_first_policy_prefers_ready_train:
+  политика send-first выбирает отправку готового поезда без жребия.
+- test_scheduled_shift_has_no_wasted_commands:
+  смена с оператором проходит без ошибок обработки команд.
+- test_manifest_shift_does_not_scan_text_manifest:
+  смена по текстовому манифесту не считает его строки до начала, а по упакованному знает число вагонов.
+- test_profile_shift_writes_pstats_and_scoped_summary:
+  профилирование смены под cProfile пишет файл pstats и сводку по handle_event, check_event и хэндлерам.
+- test_stack_sampler_writes_collapsed_stacks:
+  семплирующий профилировщик пишет свёрнутые стеки в формате flamegraph.
+
+Негативные тесты:
+- test_unknown_output_mode_raises:
+  неизвестный режим вывода приводит к ожидаемому исключению.
+- test_unknown_policy_raises:
+  неизвестная политика планировщика приводит к ожидаемому исключению.
+- test_unknown_profiling_mode_raises:
+  неизвестный режим профилирования приводит к ожидаемому исключению.
+- test_broken_handler_is_not_swallowed:
+  ошибка инициализации хэндлера прерывает прогон, а не даёт пустую смену.
+"""
+
+import os
+import pstats
+import random
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sorting_handler.sorting_operator import SortingOperatorImpl
+from sorting_hill import manifest as manifest_module
+from sorting_hill.consts import EventType, LocoType, WagonType
+from sorting_hill.monte_carlo import ShiftStats, aggregate, run_monte_carlo
+from sorting_hill.profiling import StackSampler, profile_shift
+from sorting_hill.scheduler import POLICY_SEND_FIRST, EventScheduler
+from sorting_hill.simulation import generate_wagons, run_shift
+from sorting_hill.sorting_hill import SortingHill
+
+
+# ---------- позитивные юниты ----------
+
+def test_same_seed_gives_same_shift() -> None:
+    """run_shift: одинаковое зерно - одинаковые итоги, виртуальное время вместо ожидания."""
+    first = run_shift(seed=7, number_of_paths=4, number_of_wagons=300, handlers=())
+    second = run_shift(seed=7, number_of_paths=4, number_of_wagons=300, handlers=())
+    assert first == second, 'Убедитесь, что прогон с одинаковым зерном воспроизводим.'
+    assert first.wagons_total == 300 and first.wagons_left == 0, (
+        'Проверьте, что прогон использует заданное число вагонов и отрабатывает очередь до конца.'
+    )
+    assert first.virtual_time > 0, 'Убедитесь, что задержки накапливаются на виртуальных часах.'
+
+
+def test_trace_output_is_reproducible(capsys: pytest.CaptureFixture[str]) -> None:
+    """run_shift(output='trace'): трасса команд повторяется для одинакового зерна."""
+    run_shift(seed=3, number_of_paths=2, number_of_wagons=50, handlers=(), output='trace')
+    first = capsys.readouterr().out
+    run_shift(seed=3, number_of_paths=2, number_of_wagons=50, handlers=(), output='trace')
+    second = capsys.readouterr().out
+    assert first == second and 'Команда дежурного' in first, (
+        'Проверьте, что трасса команд детерминирована для одинакового зерна.'
+    )
+
+
+class _PatientOperator(SortingOperatorImpl):
+    """Оператор, который не отправляет недозаполненные поезда при блокировке горки."""
+
+    def _blocked_train(self) -> str | None:
+        return None
+
+
+def test_stalled_shift_ends_early() -> None:
+    """run_shift: на двух путях при четырёх типах вагонов смена блокируется и завершается досрочно."""
+    summary = run_shift(
+        seed=0, number_of_paths=2, number_of_wagons=500, handlers=(_PatientOperator,), stall_limit=1_000,
+    )
+    assert summary.stalled and summary.wagons_left > 0, (
+        'Убедитесь, что заблокированная смена завершается, а необработанные вагоны попадают в wagons_left.'
+    )
+
+
+def test_monte_carlo_returns_compact_stats() -> None:
+    """run_monte_carlo: итоги смен детерминированы и сводятся по числу путей."""
+    stats = run_monte_carlo(shifts=2, paths_values=[5], number_of_wagons=300, workers=2)
+    assert all(isinstance(item, ShiftStats) for item in stats) and len(stats) == 2, (
+        'Проверьте, что каждая смена возвращает компактные итоги ShiftStats.'
+    )
+    assert stats == run_monte_carlo(shifts=2, paths_values=[5], number_of_wagons=300, workers=1), (
+        'Убедитесь, что итоги не зависят от числа процессов.'
+    )
+    summary = aggregate(stats)
+    assert summary[5]['shifts'] == 2 and 0 < summary[5]['fill_ratio'] <= 1, (
+        'Проверьте, что сводка содержит число смен и среднюю заполненность поездов.'
+    )
+
+
+def test_scheduler_draws_only_enabled_events() -> None:
+    """EventScheduler: на пустой горке допустима только подготовка пути, вагон ждёт поезда."""
+    hill = SortingHill(number_of_paths=2)
+    hill.register_handler(SortingOperatorImpl)
+    hill.wagon_buffer.append(f'00000001/{WagonType.Gruz}')
+    scheduler = EventScheduler(hill, random.Random(0))
+    assert {scheduler.next_event() for _ in range(50)} == {EventType.PreparePath}, (
+        'Убедитесь, что выбираются только допустимые события.'
+    )
+
+    hill.handle_event(EventType.PreparePath)
+    hill.handle_event(EventType.TrainPlanned)
+    hill.trains_formed[hill.assigned_paths[1]].append(LocoType.Electro16)
+    assert EventType.WagonArrived in scheduler.enabled(), (
+        'Проверьте, что вагон допустим, когда есть поезд с локомотивом и свободным местом.'
+    )
+
+
+def test_scheduler_checks_each_candidate_once() -> None:
+    """EventScheduler: допустимость проверяется у вытянутого кандидата, отклонённый выбывает из жребия."""
+    hill = SortingHill(number_of_paths=2)
+    hill.register_handler(SortingOperatorImpl)
+    hill.wagon_buffer.append(f'00000001/{WagonType.Gruz}')
+    checked: list[EventType] = []
+    check_event = hill.check_event
+
+    def counting_check(candidate: EventType) -> str | None:
+        checked.append(candidate)
+        return check_event(candidate)
+
+    hill.check_event = counting_check
+    scheduler = EventScheduler(hill, random.Random(0))
+    for _ in range(50):
+        checked.clear()
+        assert scheduler.next_event() == EventType.PreparePath, 'Убедитесь, что выбрано единственное допустимое событие.'
+        assert len(checked) == len(set(checked)) and checked[-1] == EventType.PreparePath, (
+            'Проверьте, что каждое событие проверяется не больше одного раза за выбор.'
+        )
+
+
+def test_send_first_policy_prefers_ready_train() -> None:
+    """EventScheduler(policy='send-first'): готовый поезд отправляется раньше остальных команд."""
+    hill = SortingHill(number_of_paths=2)
+    hill.register_handler(SortingOperatorImpl)
+    hill.handle_event(EventType.PreparePath)
+    hill.handle_event(EventType.TrainPlanned)
+    hill.trains_formed[hill.assigned_paths[1]].append(LocoType.Electro16)
+    hill.trains_formed[hill.assigned_paths[1]].append(f'00000001/{WagonType.Gruz}')
+    scheduler = EventScheduler(hill, random.Random(0), policy=POLICY_SEND_FIRST)
+    assert scheduler.next_event() == EventType.TrainReady, (
+        'Убедитесь, что приоритетное событие выбирается без жребия, если оно допустимо.'
+    )
+
+
+def test_scheduled_shift_has_no_wasted_commands() -> None:
+    """run_shift: команды выбираются из допустимых, поэтому оператор не получает невыполнимых команд."""
+    summary = run_shift(seed=1, number_of_paths=6, number_of_wagons=500, handlers=(SortingOperatorImpl,))
+    assert summary.errors == 0 and summary.wagons_left == 0, (
+        'Проверьте, что планировщик не выбирает команды, которые оператор не может выполнить.'
+    )
+
+
+def test_manifest_shift_does_not_scan_text_manifest(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """run_shift(manifest=...): итоги смены по манифесту без предварительного прохода по файлу."""
+    wagons = generate_wagons(random.Random(0), 500)
+    text = tmp_path / 'wagons.txt'
+    text.write_text('\n'.join(wagons) + '\n\n', encoding='utf-8')
+    packed = tmp_path / 'wagons.bin'
+    manifest_module.write_manifest(packed, wagons)
+
+    def no_scan(path: object) -> int:
+        raise AssertionError('text manifest scanned')
+
+    monkeypatch.setattr(manifest_module, '_count_lines', no_scan)
+    summary = run_shift(seed=1, number_of_paths=15, manifest=text)
+    assert summary.wagons_total is None and summary.wagons_left == 0 and not summary.stalled, (
+        'Убедитесь, что смена по текстовому манифесту не считает его строки и отрабатывает все вагоны.'
+    )
+    assert run_shift(seed=1, number_of_paths=15, manifest=packed).wagons_total == len(wagons), (
+        'Проверьте, что число вагонов упакованного манифеста берётся из размера файла.'
+    )
+
+
+def test_profile_shift_writes_pstats_and_scoped_summary(tmp_path: Path) -> None:
+    """profile_shift(mode='cprofile'): файл pstats и сводка только по горке и хэндлерам."""
+    output = tmp_path / 'profile' / 'shift'
+    stats = profile_shift(output, seed=1, number_of_paths=4, number_of_wagons=300)
+    assert pstats.Stats(f'{output}.pstats').total_calls > 0, 'Убедитесь, что профиль записан в формате pstats.'
+
+    calls = {stat.name: stat.calls for stat in stats}
+    assert calls['SortingHill.handle_event'] > 0 and calls['sorting_operator.handle_wagon'] == 300, (
+        'Проверьте, что сводка содержит handle_event и методы хэндлеров с числом вызовов.'
+    )
+    assert all(name.startswith(('SortingHill.', 'sorting_')) for name in calls), (
+        'Убедитесь, что в сводку не попадают функции вне горки и хэндлеров.'
+    )
+
+
+def test_stack_sampler_writes_collapsed_stacks(tmp_path: Path) -> None:
+    """StackSampler: стеки основного потока пишутся строками «кадр;кадр число»."""
+    def busy() -> None:
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+
+    with StackSampler(interval=0.001) as sampler:
+        busy()
+    path = tmp_path / 'shift.folded'
+    assert sampler.write_collapsed(path) > 0, 'Убедитесь, что за время работы снят хотя бы один стек.'
+
+    lines = path.read_text(encoding='utf-8').splitlines()
+    frames, _, count = lines[0].rpartition(' ')
+    assert count.isdigit() and 'test_stack_sampler_writes_collapsed_stacks.<locals>.busy' in frames, (
+        'Проверьте формат свёрнутых стеков: кадры через «;» с подписью модуль:функция и число снимков.'
+    )
+
+
+# ---------- негативные юниты ----------
+
+def test_unknown_output_mode_raises() -> None:
+    """run_shift: неизвестный режим вывода приводит к ValueError."""
+    with pytest.raises(ValueError, match='unknown output mode'):
+        run_shift(seed=0, output='verbose')
+
+
+def test_unknown_policy_raises() -> None:
+    """run_shift: неизвестная политика планировщика приводит к ValueError."""
+    with pytest.raises(ValueError, match='unknown scheduling policy'):
+        run_shift(seed=0, policy='random')
+
+
+def test_unknown_profiling_mode_raises(tmp_path: Path) -> None:
+    """profile_shift: неизвестный режим профилирования приводит к ValueError."""
+    with pytest.raises(ValueError, match='unknown profiling mode'):
+        profile_shift(tmp_path / 'shift', seed=0, mode='perf')
+
+
+class _BrokenOperator(SortingOperatorImpl):
+    """Оператор, который не удаётся создать."""
+
+    def __init__(self, sorting_hill: SortingHill) -> None:
+        raise TypeError('operator misconfigured')
+
+
+def test_broken_handler_is_not_swallowed() -> None:
+    """run_shift: ошибка регистрации хэндлера передаётся вызывающему."""
+    with pytest.raises(TypeError, match='operator misconfigured'):
+        run_shift(seed=0, handlers=(_BrokenOperator,))
@@ -0,0 +1,154 @@
+"""
+План тестирования (приёмники вывода)
+====================================
+Позитивные тесты:
+- test_jsonl_sink_writes_all_records:
+  после flush() в файле JSON Lines есть все записи по порядку с видом, сообщением и полями.
+- test_prometheus_sink_renders_counters_and_gauges:
+  файл экспозиции содержит счётчики записей по видам и последние значения числовых полей.
+- test_overflow_is_aggregated_or_dropped:
+  при переполнении очереди политика aggregate сворачивает записи в счётчики, а drop - отбрасывает их.
+- test_shift_output_goes_to_sink:
+  команды, отчёт репортёра и итоги смены попадают в приёмник, а не в stdout.
+- test_output_off_prints_nothing:
+  в режиме off без приёмника смена с репортёром ничего не печатает.
+
+Негативные тесты:
+- test_unknown_format_raises:
+  неизвестный формат или политика приводят к ожидаемому исключению.
+- test_prometheus_without_path_raises:
+  формат prometheus без файла приводит к ожидаемому исключению.
+"""
+
+import io
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sorting_hill.simulation import DEFAULT_HANDLERS, run_shift
+from sorting_hill.sink import (
+    FORMAT_JSONL,
+    FORMAT_PROMETHEUS,
+    KIND_AGGREGATED,
+    POLICY_AGGREGATE,
+    POLICY_DROP,
+    BufferedSink,
+)
+
+
+class BlockingStream(io.StringIO):
+    """Поток, запись в который ждёт разрешения теста"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, text: str) -> int:
+        self.entered.set()
+        self.release.wait()
+        return super().write(text)
+
+
+def _fill_while_blocked(policy: str) -> tuple[BufferedSink, BlockingStream]:
+    stream = BlockingStream()
+    sink = BufferedSink(stream, FORMAT_JSONL, policy, max_queue=2)
+    sink.emit('command', 'первая')
+    assert stream.entered.wait(5), 'Поток записи должен забрать первую запись.'
+    for i in range(10):
+        sink.emit('command', f'команда {i}')
+    stream.release.set()
+    sink.close()
+    return sink, stream
+
+
+# ---------- позитивные юниты ----------
+
+def test_jsonl_sink_writes_all_records(tmp_path: Path) -> None:
+    """BufferedSink(jsonl): flush() дожидается записи, записи идут в порядке emit()."""
+    path = tmp_path / 'shift.jsonl'
+    with BufferedSink(path, FORMAT_JSONL, batch_size=7) as sink:
+        for i in range(100):
+            sink.emit('command', f'Команда {i}', clock=i * 0.5)
+        sink.flush()
+        records = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert [record['clock'] for record in records] == [i * 0.5 for i in range(100)], (
+        'Проверьте, что flush() дожидается записи всех переданных записей в порядке emit().'
+    )
+    assert records[0] == {'kind': 'command', 'message': 'Команда 0', 'clock': 0.0}, (
+        'Проверьте состав записи JSON Lines: вид, сообщение и поля.'
+    )
+
+
+def test_prometheus_sink_renders_counters_and_gauges(tmp_path: Path) -> None:
+    """BufferedSink(prometheus): счётчики по видам и последние значения полей."""
+    path = tmp_path / 'shift.prom'
+    with BufferedSink(path, FORMAT_PROMETHEUS) as sink:
+        sink.emit('command', 'a', clock=1.0)
+        sink.emit('command', 'b', clock=2.5)
+        sink.emit('summary', 'c', trains_sent=12, stalled=False, policy='balanced')
+    text = path.read_text(encoding='utf-8')
+    assert 'sorting_hill_records_total{kind="command"} 2' in text, 'Проверьте счётчик записей по видам.'
+    assert 'sorting_hill_command_clock 2.5' in text, 'Проверьте, что gauge хранит последнее значение поля.'
+    assert 'sorting_hill_summary_trains_sent 12' in text and 'sorting_hill_summary_stalled 0' in text, (
+        'Проверьте, что числовые и логические поля выводятся как gauge.'
+    )
+    assert 'policy' not in text and not os.path.exists(f'{path}.tmp'), (
+        'Проверьте, что строковые поля пропускаются, а временный файл заменяет основной.'
+    )
+
+
+def test_overflow_is_aggregated_or_dropped() -> None:
+    """BufferedSink: переполнение очереди не блокирует emit() и учитывается по политике."""
+    sink, stream = _fill_while_blocked(POLICY_AGGREGATE)
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    aggregated = [record for record in records if record['kind'] == KIND_AGGREGATED]
+    assert aggregated == [{
+        'kind': KIND_AGGREGATED, 'message': 'Свёрнуто записей command: 8', 'aggregated_kind': 'command', 'count': 8,
+    }], 'Проверьте, что лишние записи свёрнуты в одну запись aggregated на вид.'
+    assert len(records) == 4 and sink.dropped == 0, 'Проверьте, что при aggregate записи не отбрасываются.'
+
+    sink, stream = _fill_while_blocked(POLICY_DROP)
+    assert sink.dropped == 8 and len(stream.getvalue().splitlines()) == 3, (
+        'Проверьте, что при drop лишние записи отбрасываются и учитываются в dropped.'
+    )
+
+
+def test_shift_output_goes_to_sink(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    """run_shift(sink=...): трасса, отчёт и итоги пишутся в приёмник."""
+    path = tmp_path / 'shift.jsonl'
+    with BufferedSink(path, FORMAT_JSONL) as sink:
+        summary = run_shift(seed=3, number_of_wagons=200, handlers=DEFAULT_HANDLERS, output='trace', sink=sink)
+    records = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    kinds = {record['kind'] for record in records}
+    assert {'command', 'report', 'summary'} <= kinds, 'Проверьте, что команды, отчёт и итоги попадают в приёмник.'
+    assert records[-1]['wagons_total'] == summary.wagons_total, 'Проверьте поля записи итогов смены.'
+    assert capsys.readouterr().out == '', 'Убедитесь, что при заданном приёмнике прогон ничего не печатает.'
+
+
+def test_output_off_prints_nothing(capsys: pytest.CaptureFixture[str]) -> None:
+    """run_shift(output='off'): отчёт репортёра отбрасывается вместе с остальным выводом."""
+    run_shift(seed=3, number_of_wagons=200, handlers=DEFAULT_HANDLERS, output='off')
+    assert capsys.readouterr().out == '', 'Убедитесь, что в режиме off прогон ничего не печатает.'
+
+
+# ---------- негативные юниты ----------
+
+def test_unknown_format_raises(tmp_path: Path) -> None:
+    """BufferedSink: неизвестный формат или политика приводят к ValueError."""
+    with pytest.raises(ValueError, match='unknown output format'):
+        BufferedSink(tmp_path / 'shift.log', 'xml')
+    with pytest.raises(ValueError, match='unknown overload policy'):
+        BufferedSink(tmp_path / 'shift.log', policy='block')
+
+
+def test_prometheus_without_path_raises() -> None:
+    """BufferedSink: prometheus пишется только в файл."""
+    with pytest.raises(ValueError, match='needs a file path'):
+        BufferedSink(io.StringIO(), FORMAT_PROMETHEUS)
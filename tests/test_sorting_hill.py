@@ -1,3 +1,642 @@
+"""
+План тестирования (юниты для SortingHill)
+=========================================
+Позитивные тесты:
+- test_wagon_queue_fifo_and_bulk_enqueue:
+  очередь вагонов отдаёт вагоны в порядке поступления, поддерживает пакетное добавление и peek.
+- test_wagon_arrived_consumes_queue_head:
+  событие WagonArrived снимает первый вагон из очереди SortingHill.wagon_buffer.
+- test_train_ready_index_tracks_full_and_drained_trains:
+  индекс готовых поездов обновляется при прицепке локомотива и вагонов и при отправке поезда.
+- test_routing_index_tracks_open_and_untyped_trains:
+  индекс открытых поездов по типу вагона и пул поездов без типа следуют за составами.
+- test_loco_specs_cover_every_model:
+  характеристики (вместимость, серия, тяга) выведены при импорте для каждой модели LocoType.
+- test_train_caches_capacity_and_free_slots:
+  состав кэширует вместимость локомотива при прицепке и ведёт число свободных мест.
+- test_reverse_path_index_and_handles_follow_renames:
+  путь поезда и его внутренний номер сохраняются при переименовании и снимаются при отправке.
+- test_trains_sent_counts_only_departures:
+  отправленными считаются только поезда, снятые через depart(); переименование и clear() их не меняют.
+- test_admission_checks_follow_paths_and_empty_trains:
+  проверки PreparePath, TrainPlanned и LocoArrived следуют за реестрами путей и поездов.
+- test_pack_wagon_round_trip:
+  упакованный вагон восстанавливается в исходную строку.
+- test_compact_hill_stores_packed_wagons:
+  в компактном режиме очередь и составы хранят вагоны числами, а наружу отдают строки.
+- test_handle_events_batches_wagon_runs:
+  handle_events передаёт подряд идущие вагоны хэндлеру одним пакетом.
+- test_handle_wagons_falls_back_to_per_item_calls:
+  хэндлер без пакетного метода получает вагоны поштучно, а очередь снимается только на обработанные вагоны.
+- test_metrics_count_events_handlers_and_checks:
+  включённые метрики считают события, вызовы методов хэндлеров и результаты проверок.
+- test_journal_replay_rebuilds_state:
+  горка, восстановленная по журналу, совпадает с исходной, а недописанная последняя запись отбрасывается.
+- test_checkpoint_restores_state_and_mapped_queue:
+  горка, восстановленная из контрольной точки, совпадает с исходной, а очередь читается из файла.
+- test_manifest_streams_wagons_in_bounded_chunks:
+  текстовый и упакованный манифесты отдают вагоны в порядке файла, подгружаясь порциями.
+- test_checkpoint_streams_unread_manifest:
+  контрольная точка горки по манифесту содержит всю очередь, а непрочитанная часть манифеста не подгружается.
 
-def test_hello_world() -> None:
-    assert 1 == 1
+Негативные тесты:
+- test_wagon_queue_popleft_on_empty_raises:
+  снятие вагона из пустой очереди приводит к ожидаемому исключению.
+- test_pack_wagon_rejects_bad_format:
+  упаковка строки неверного формата приводит к ожидаемому исключению.
+- test_resolve_loco_rejects_unknown_series:
+  модель неизвестной серии или неверного формата приводит к ожидаемому исключению.
+- test_handle_event_unknown_event_raises:
+  неизвестное событие не находится в таблице диспетчеризации и приводит к ожидаемому исключению.
+- test_replay_rejects_foreign_file:
+  файл без заголовка журнала приводит к ожидаемому исключению.
+- test_load_checkpoint_into_busy_hill_raises:
+  восстановление в горку с вагонами в очереди приводит к ожидаемому исключению.
+- test_text_manifest_rejects_bad_line:
+  строка манифеста неверного формата приводит к ожидаемому исключению с номером строки.
+"""
+
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sorting_handler.interface import SortingHandler
+from sorting_handler.sorting_operator import SortingOperatorImpl
+from sorting_hill.checkpoint import MappedWagonQueue
+from sorting_hill.compact import CompactTrainContent, pack_wagon, unpack_wagon
+from sorting_hill.consts import EventType, LocoType, WagonType
+from sorting_hill.journal import EventJournal, read_journal
+from sorting_hill.locomotives import LOCO_SPECS, Traction, loco_spec, resolve_loco
+from sorting_hill.manifest import open_manifest, write_manifest
+from sorting_hill.mutations import TrainSent
+from sorting_hill.simulation import build_hill
+from sorting_hill.sorting_hill import SortingHill
+from sorting_hill.wagon_queue import WagonQueue
+
+
+# ---------- фикстуры ----------
+
+@pytest.fixture
+def hill() -> SortingHill:
+    """Короткая фабрика сортировочной горки."""
+    return SortingHill(number_of_paths=2)
+
+
+class _RecordingHandler(SortingHandler):
+    """Хэндлер, записывающий вызовы; принимает не больше capacity вагонов."""
+
+    def __init__(self, sorting_hill: SortingHill, capacity: int = 1000) -> None:
+        self.sorting_hill = sorting_hill
+        self.capacity = capacity
+        self.calls: list[tuple[str, object]] = []
+
+    def handle_wagon(self, wagon_info: str) -> str:
+        if self.capacity <= 0:
+            raise RuntimeError('no train for wagon')
+        self.capacity -= 1
+        self.calls.append(('wagon', wagon_info))
+        return '0001'
+
+    def handle_locomotive(self, locomotive: str) -> str:
+        self.calls.append(('loco', locomotive))
+        return '0001'
+
+    def prepare_path(self) -> int:
+        self.calls.append(('path', None))
+        return 1
+
+    def allocate_path_for_train(self) -> dict[int, str]:
+        return {1: '0001'}
+
+    def send_train(self) -> str:
+        return '0001'
+
+    def start_shift(self) -> None:
+        pass
+
+    def end_shift(self) -> None:
+        pass
+
+
+class _BatchRecordingHandler(_RecordingHandler):
+    """Хэндлер с пакетной обработкой вагонов."""
+
+    def handle_wagons(self, wagons: list[str]) -> list[str]:
+        self.calls.append(('batch', list(wagons)))
+        return ['0001'] * len(wagons)
+
+
+# ---------- позитивные юниты ----------
+
+def test_wagon_queue_fifo_and_bulk_enqueue() -> None:
+    """WagonQueue: FIFO, пакетное добавление, peek и проверка на истинность."""
+    queue = WagonQueue()
+    assert not queue and len(queue) == 0 and queue.peek() is None, (
+        'Убедитесь, что пустая очередь ложна, имеет длину 0, а peek возвращает None.'
+    )
+
+    queue.append(f'00000001/{WagonType.Gruz}')
+    queue.enqueue_many([f'00000002/{WagonType.Pass}', f'00000003/{WagonType.Empty}'])
+    assert queue and len(queue) == 3, (
+        'Проверьте, что append и enqueue_many добавляют вагоны в конец очереди.'
+    )
+    assert queue.peek() == f'00000001/{WagonType.Gruz}', (
+        'Убедитесь, что peek возвращает первый вагон, не снимая его.'
+    )
+    assert [queue.popleft() for _ in range(3)] == [
+        f'00000001/{WagonType.Gruz}', f'00000002/{WagonType.Pass}', f'00000003/{WagonType.Empty}'
+    ], 'Проверьте, что вагоны снимаются в порядке поступления.'
+
+
+def test_wagon_arrived_consumes_queue_head(hill: SortingHill) -> None:
+    """handle_event(WagonArrived): снимает голову очереди вагонов."""
+    hill.wagon_buffer.extend([f'00000001/{WagonType.Gruz}', f'00000002/{WagonType.Pass}'])
+    hill.handle_event(EventType.WagonArrived)
+    assert list(hill.wagon_buffer) == [f'00000002/{WagonType.Pass}'], (
+        'Убедитесь, что событие WagonArrived снимает из очереди именно первый вагон.'
+    )
+
+
+def test_train_ready_index_tracks_full_and_drained_trains(hill: SortingHill) -> None:
+    """check_event(TrainReady): индекс готовых поездов следует за изменениями составов."""
+    hill.wagon_buffer.append(f'00000099/{WagonType.Gruz}')
+    hill.trains_formed['0001'] = []
+    hill.trains_formed['0001'].append(LocoType.Electro16)
+    assert hill.check_event(EventType.TrainReady) is None, (
+        'Убедитесь, что поезд без вагонов не считается готовым к отправке.'
+    )
+
+    hill.trains_formed['0001'].extend(f'{number:08d}/{WagonType.Gruz}' for number in range(15))
+    assert hill.check_event(EventType.TrainReady) is None, (
+        'Проверьте, что недозаполненный поезд не готов, пока в очереди есть вагоны.'
+    )
+
+    hill.trains_formed['0001Г'] = hill.trains_formed.pop('0001')
+    hill.trains_formed['0001Г'].append(f'00000015/{WagonType.Gruz}')
+    assert hill.check_event(EventType.TrainReady) == EventType.TrainReady, (
+        'Убедитесь, что поезд, заполненный до вместимости локомотива, готов к отправке (в том числе после переименования).'
+    )
+    assert hill.trains_formed.next_ready(buffer_drained=False) == '0001Г', (
+        'Проверьте, что индекс готовых поездов отдаёт номер заполненного поезда.'
+    )
+
+    hill.trains_formed['0001Г'].pop()
+    hill.wagon_buffer.clear()
+    assert hill.check_event(EventType.TrainReady) == EventType.TrainReady, (
+        'Убедитесь, что после опустошения очереди готов любой поезд хотя бы с одним вагоном.'
+    )
+
+    del hill.trains_formed['0001Г']
+    assert hill.check_event(EventType.TrainReady) is None, (
+        'Проверьте, что отправленный поезд удаляется из индекса готовых поездов.'
+    )
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_routing_index_tracks_open_and_untyped_trains(compact: bool) -> None:
+    """next_open: поезд того же типа со свободным местом, иначе поезд с локомотивом без вагонов."""
+    trains = SortingHill(number_of_paths=2, compact=compact).trains_formed
+    trains['0001'] = []
+    trains['0002'] = []
+    assert trains.next_open(WagonType.Gruz) is None, 'Убедитесь, что поезд без локомотива не принимает вагоны.'
+
+    trains['0001'].append(LocoType.Electro16)
+    trains['0002'].append(LocoType.Diesel24)
+    assert trains.next_open(WagonType.Gruz) == '0001', 'Проверьте, что первым отдаётся поезд без типа с локомотивом.'
+
+    trains['0001Г'] = trains.pop('0001')
+    trains['0001Г'].append(f'00000001/{WagonType.Gruz}')
+    assert trains.next_open(WagonType.Gruz) == '0001Г', (
+        'Убедитесь, что поезд того же типа выбирается раньше поезда без типа.'
+    )
+    assert trains.next_open(WagonType.Pass) == '0002', (
+        'Проверьте, что для другого типа выбирается поезд без типа.'
+    )
+
+    trains['0001Г'].extend(f'{number:08d}/{WagonType.Gruz}' for number in range(2, 17))
+    assert trains.next_open(WagonType.Gruz) == '0002', (
+        'Убедитесь, что заполненный поезд удаляется из индекса открытых поездов.'
+    )
+    del trains['0002']
+    assert trains.next_open(WagonType.Gruz) is None, 'Проверьте, что удалённый поезд удаляется из пула.'
+
+
+def test_loco_specs_cover_every_model() -> None:
+    """LOCO_SPECS: для каждой модели LocoType выведены вместимость, серия и тяга."""
+    assert set(LOCO_SPECS) == set(LocoType), 'Убедитесь, что характеристики есть у каждой модели локомотива.'
+    spec = loco_spec(LocoType.Diesel64)
+    assert (spec.series, spec.capacity, spec.traction) == ('ТДЛ', 64, Traction.Diesel), (
+        'Проверьте разбор модели ТДЛ-64: серия, вместимость и тепловозная тяга.'
+    )
+    assert loco_spec(LocoType.Electro16).traction == Traction.Electric, (
+        'Убедитесь, что серия ЭВЛ относится к электровозам.'
+    )
+    assert loco_spec(f'00000001/{WagonType.Gruz}') is None, 'Проверьте, что вагон не считается локомотивом.'
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_train_caches_capacity_and_free_slots(compact: bool) -> None:
+    """capacity и free_slots: вместимость кэшируется при прицепке локомотива, свободные места убывают."""
+    trains = SortingHill(number_of_paths=2, compact=compact).trains_formed
+    trains['0001'] = []
+    content = trains['0001']
+    assert content.capacity is None and content.free_slots == 0, (
+        'Убедитесь, что у состава без локомотива нет свободных мест.'
+    )
+
+    content.append(LocoType.Electro16)
+    content.append(f'00000001/{WagonType.Gruz}')
+    assert content.capacity == 16 and content.free_slots == 15, (
+        'Проверьте, что вместимость взята из характеристик локомотива, а вагон занял место.'
+    )
+    content.extend(f'{number:08d}/{WagonType.Gruz}' for number in range(2, 17))
+    assert content.free_slots == 0 and '0001' in trains.full, (
+        'Убедитесь, что заполненный состав попадает в индекс готовых поездов.'
+    )
+    del content[0]
+    assert content.capacity is None and '0001' not in trains.full, (
+        'Проверьте, что при снятии локомотива кэш вместимости сбрасывается.'
+    )
+
+
+def test_reverse_path_index_and_handles_follow_renames(hill: SortingHill) -> None:
+    """path_of/train_of: обратный индекс и внутренний номер поезда без обхода путей."""
+    hill.register_handler(SortingOperatorImpl)
+    hill.handle_event(EventType.PreparePath)
+    hill.handle_event(EventType.TrainPlanned)
+    assert hill.path_of('0001') == 1, 'Убедитесь, что путь запланированного поезда есть в обратном индексе.'
+    handle = hill.trains_formed['0001'].handle
+
+    hill.trains_formed['0001'].append(LocoType.Electro16)
+    hill.wagon_buffer.append(f'00000001/{WagonType.Gruz}')
+    hill.handle_event(EventType.WagonArrived)
+    assert hill.path_of('0001') is None and hill.path_of('0001Г') == 1, (
+        'Проверьте, что переименование переносит поезд в обратном индексе.'
+    )
+    assert hill.trains_formed['0001Г'].handle == handle and hill.trains_formed.train_of(handle) == '0001Г', (
+        'Убедитесь, что внутренний номер поезда не меняется при переименовании.'
+    )
+
+    hill.handle_event(EventType.TrainReady)
+    assert hill.path_of('0001Г') is None and not hill.assigned_paths, (
+        'Проверьте, что отправка освобождает путь поезда.'
+    )
+    assert hill.trains_formed.train_of(handle) is None
+
+
+def test_trains_sent_counts_only_departures(hill: SortingHill) -> None:
+    """TrainRegistry: trains_sent и TrainSent - только при depart(), а не при удалении из словаря."""
+    sent = []
+    hill.subscribe(lambda mutation: sent.append(mutation) if isinstance(mutation, TrainSent) else None)
+    trains = hill.trains_formed
+    trains['0001'] = [LocoType.Electro16, f'00000001/{WagonType.Gruz}']
+    trains['0002'] = [LocoType.Diesel24, f'00000002/{WagonType.Pass}']
+
+    trains['0001Г'] = trains.pop('0001')
+    assert trains.trains_sent == 0 and trains.wagons_on_tracks == 2, (
+        'Убедитесь, что переименование поезда с вагонами не считается отправкой.'
+    )
+    trains.depart('0001Г')
+    assert trains.trains_sent == 1 and sent == [TrainSent('0001Г', 1)], (
+        'Проверьте, что depart() учитывает отправку и публикует TrainSent.'
+    )
+    trains.clear()
+    assert trains.trains_sent == 1 and trains.wagons_on_tracks == 0 and len(sent) == 1, (
+        'Убедитесь, что clear() удаляет составы, но не считает их отправленными.'
+    )
+
+
+def test_admission_checks_follow_paths_and_empty_trains(hill: SortingHill) -> None:
+    """check_event: допуск PreparePath, TrainPlanned и LocoArrived по поддерживаемым индексам."""
+    assert hill.check_event(EventType.TrainPlanned) is None, (
+        'Убедитесь, что поезд нельзя запланировать, пока нет подготовленного пути.'
+    )
+    assert hill.assigned_paths.next_free() == 1, 'Проверьте, что первым свободным считается путь 1.'
+
+    hill.assigned_paths[1] = None
+    hill.assigned_paths[2] = None
+    assert hill.check_event(EventType.PreparePath) is None, (
+        'Убедитесь, что нельзя готовить путь, когда все пути уже подготовлены.'
+    )
+    assert hill.check_event(EventType.TrainPlanned) == EventType.TrainPlanned, (
+        'Проверьте, что поезд можно запланировать на подготовленный свободный путь.'
+    )
+    assert hill.check_event(EventType.LocoArrived) is None, (
+        'Убедитесь, что локомотив не подаётся, пока нет пустого состава.'
+    )
+
+    hill.assigned_paths[1] = '0001'
+    hill.trains_formed['0001'] = []
+    assert hill.assigned_paths.next_unassigned() == 2 and hill.trains_formed.next_empty() == '0001', (
+        'Проверьте, что реестры отдают путь без поезда и состав без локомотива.'
+    )
+    assert hill.check_event(EventType.LocoArrived) == EventType.LocoArrived, (
+        'Убедитесь, что локомотив подаётся при наличии пустого состава.'
+    )
+
+    hill.trains_formed['0001'].append(LocoType.Diesel24)
+    del hill.assigned_paths[1]
+    assert hill.check_event(EventType.LocoArrived) is None, (
+        'Проверьте, что состав с локомотивом перестаёт считаться пустым.'
+    )
+    assert hill.assigned_paths.next_free() == 1 and hill.check_event(EventType.PreparePath) is not None, (
+        'Убедитесь, что освобождённый путь снова доступен для подготовки.'
+    )
+
+
+def test_pack_wagon_round_trip() -> None:
+    """pack_wagon/unpack_wagon: упаковка без потерь для всех типов вагонов."""
+    for wagon_type in WagonType:
+        wagon_info = f'99999999/{wagon_type}'
+        assert unpack_wagon(pack_wagon(wagon_info)) == wagon_info, (
+            f'Убедитесь, что вагон типа {wagon_type} восстанавливается из упакованного числа без потерь.'
+        )
+
+
+def test_compact_hill_stores_packed_wagons() -> None:
+    """SortingHill(compact=True): вагоны хранятся числами, составы - массивами."""
+    hill = SortingHill(number_of_paths=2, compact=True)
+    hill.wagon_buffer.extend([f'00000001/{WagonType.Gruz}', f'00000002/{WagonType.Pass}'])
+    assert hill.wagon_buffer.peek() == f'00000001/{WagonType.Gruz}', (
+        'Проверьте, что компактная очередь отдаёт вагоны строками.'
+    )
+
+    hill.trains_formed['0001'] = []
+    train = hill.trains_formed['0001']
+    train.append(LocoType.Electro16)
+    train.append(hill.wagon_buffer.popleft())
+    assert isinstance(train, CompactTrainContent) and train.wagons.itemsize == 8, (
+        'Убедитесь, что в компактном режиме вагоны состава хранятся в array по 8 байт.'
+    )
+    assert train == [LocoType.Electro16, f'00000001/{WagonType.Gruz}'] and train.loco is LocoType.Electro16, (
+        'Проверьте, что компактный состав выглядит как список с локомотивом первым элементом.'
+    )
+
+    hill.trains_formed['0001'].extend(f'{number:08d}/{WagonType.Gruz}' for number in range(15))
+    assert hill.check_event(EventType.TrainReady) == EventType.TrainReady, (
+        'Убедитесь, что индекс готовых поездов работает и для компактных составов.'
+    )
+
+
+def test_handle_events_batches_wagon_runs(hill: SortingHill) -> None:
+    """handle_events: подряд идущие WagonArrived передаются одним пакетом."""
+    hill.register_handler(_BatchRecordingHandler)
+    handler = hill.handlers[0]
+    wagons = [f'{number:08d}/{WagonType.Gruz}' for number in range(5)]
+    hill.wagon_buffer.extend(wagons)
+
+    hill.handle_events([
+        EventType.WagonArrived, EventType.WagonArrived, EventType.PreparePath,
+        EventType.WagonArrived, EventType.WagonArrived, EventType.WagonArrived,
+    ])
+    assert handler.calls == [('batch', wagons[:2]), ('path', None), ('batch', wagons[2:])], (
+        'Убедитесь, что handle_events объединяет подряд идущие вагоны в пакеты и сохраняет порядок событий.'
+    )
+    assert not hill.wagon_buffer, 'Проверьте, что обработанные пакетом вагоны снимаются из очереди.'
+
+
+def test_handle_wagons_falls_back_to_per_item_calls(hill: SortingHill) -> None:
+    """handle_wagons: хэндлер без пакетного метода получает вагоны по одному."""
+    hill.register_handler(lambda sorting_hill: _RecordingHandler(sorting_hill, capacity=2))
+    handler = hill.handlers[0]
+    wagons = [f'{number:08d}/{WagonType.Pass}' for number in range(3)]
+    hill.wagon_buffer.extend(wagons)
+
+    assert hill.handle_wagons(3) == 2, 'Убедитесь, что handle_wagons возвращает число обработанных вагонов.'
+    assert handler.calls == [('wagon', wagons[0]), ('wagon', wagons[1])], (
+        'Проверьте, что без пакетного метода вагоны передаются через handle_wagon по одному.'
+    )
+    assert list(hill.wagon_buffer) == wagons[2:], (
+        'Убедитесь, что необработанный вагон остаётся в голове очереди.'
+    )
+
+
+def test_metrics_count_events_handlers_and_checks(hill: SortingHill) -> None:
+    """metrics: события, методы хэндлеров и проверки учитываются при включённом сборе."""
+    hill.register_handler(_RecordingHandler)
+    assert hill.metrics() == {}, 'Убедитесь, что при выключенном сборе метрики пусты.'
+
+    hill.enable_metrics()
+    hill.wagon_buffer.append(f'00000001/{WagonType.Gruz}')
+    hill.handle_event(EventType.WagonArrived)
+    hill.check_event(EventType.PreparePath)
+    hill.check_event(EventType.TrainPlanned)
+
+    snapshot = hill.metrics()
+    assert snapshot['events']['WagonArrived']['count'] == 1, (
+        'Проверьте, что метрики считают вызовы событий.'
+    )
+    assert snapshot['handlers']['_RecordingHandler.handle_wagon']['count'] == 1, (
+        'Убедитесь, что метрики считают вызовы методов каждого хэндлера.'
+    )
+    assert snapshot['check_results']['PreparePath'] == {'accepted': 1, 'rejected': 0}, (
+        'Проверьте, что принятые проверки учитываются.'
+    )
+    assert snapshot['check_results']['TrainPlanned'] == {'accepted': 0, 'rejected': 1}, (
+        'Проверьте, что отклонённые проверки учитываются.'
+    )
+
+    hill.enable_metrics(False)
+    assert hill.metrics() == {} and 'check_event' not in vars(hill), (
+        'Убедитесь, что выключение сбора снимает обёртки.'
+    )
+
+
+def test_journal_replay_rebuilds_state(tmp_path: Path) -> None:
+    """replay: состояние, восстановленное по журналу, совпадает с исходным."""
+    rng = random.Random(3)
+    journal_path = tmp_path / 'shift.journal'
+    hill = build_hill(rng, number_of_paths=4, number_of_wagons=200, handlers=(SortingOperatorImpl,))
+    events = [event for event in EventType if event != EventType.ShiftEnded]
+    with EventJournal(journal_path, group_size=16, fsync=False) as journal:
+        hill.attach_journal(journal)
+        hill.handle_event(EventType.ShiftStarted)
+        for _ in range(500):
+            event = rng.choice(events)
+            if hill.check_event(event) is None:
+                continue
+            try:
+                hill.handle_event(event)
+            except RuntimeError:
+                pass
+        hill.handle_wagons(5)
+
+    restored = SortingHill(number_of_paths=4)
+    restored.register_handler(SortingOperatorImpl)
+    assert restored.replay(journal_path) == len(list(read_journal(journal_path)))
+    assert dict(restored.assigned_paths) == dict(hill.assigned_paths), (
+        'Убедитесь, что по журналу восстанавливаются назначенные пути.'
+    )
+    assert {train: list(content) for train, content in restored.trains_formed.items()} == {
+        train: list(content) for train, content in hill.trains_formed.items()
+    }, 'Проверьте, что по журналу восстанавливаются составы с выбранными локомотивами и вагонами.'
+    assert restored.train_index == hill.train_index
+    assert restored.aggregates() == hill.aggregates()
+
+    records = len(list(read_journal(journal_path)))
+    with open(journal_path, 'ab') as file:
+        file.write(b'\x01\x02\x03')
+    assert len(list(read_journal(journal_path))) == records, (
+        'Убедитесь, что недописанная при сбое запись отбрасывается.'
+    )
+
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_checkpoint_restores_state_and_mapped_queue(tmp_path: Path, compact: bool) -> None:
+    """load_checkpoint: пути, поезда, индексы, счётчики и очередь совпадают с исходной горкой."""
+    rng = random.Random(11)
+    checkpoint_path = tmp_path / 'shift.checkpoint'
+    hill = build_hill(rng, number_of_paths=3, number_of_wagons=300, handlers=(SortingOperatorImpl,), compact=compact)
+    events = [event for event in EventType if event != EventType.ShiftEnded]
+    hill.handle_event(EventType.ShiftStarted)
+    for _ in range(400):
+        event = rng.choice(events)
+        if hill.check_event(event) is None:
+            continue
+        try:
+            hill.handle_event(event)
+        except RuntimeError:
+            pass
+    hill.save_checkpoint(checkpoint_path)
+
+    restored = SortingHill(number_of_paths=3)
+    restored.register_handler(SortingOperatorImpl)
+    restored.load_checkpoint(checkpoint_path)
+    assert dict(restored.assigned_paths) == dict(hill.assigned_paths)
+    assert {train: list(content) for train, content in restored.trains_formed.items()} == {
+        train: list(content) for train, content in hill.trains_formed.items()
+    }, 'Проверьте, что из контрольной точки восстанавливаются составы.'
+    assert list(restored.trains_formed.loaded) == list(hill.trains_formed.loaded), (
+        'Убедитесь, что восстанавливается порядок индексов готовых поездов.'
+    )
+    assert restored.train_index == hill.train_index
+    assert restored.aggregates() == hill.aggregates()
+
+    assert isinstance(restored.wagon_buffer, MappedWagonQueue), (
+        'Убедитесь, что очередь вагонов читается из отображённого в память файла.'
+    )
+    restored.wagon_buffer.append(f'00000001/{WagonType.Gruz}')
+    assert list(restored.wagon_buffer) == [*hill.wagon_buffer, f'00000001/{WagonType.Gruz}'], (
+        'Проверьте, что новые вагоны встают в хвост восстановленной очереди.'
+    )
+    assert restored.wagon_buffer.popleft() == hill.wagon_buffer.popleft()
+
+
+@pytest.mark.parametrize('packed', [False, True])
+def test_manifest_streams_wagons_in_bounded_chunks(tmp_path: Path, packed: bool) -> None:
+    """load_manifest: вагоны читаются из файла порциями и снимаются в порядке манифеста."""
+    wagons = [f'{number:08d}/{wagon_type}' for number, wagon_type in zip(range(1, 51), list(WagonType) * 13)]
+    path = tmp_path / 'manifest'
+    if packed:
+        assert write_manifest(path, wagons) == len(wagons)
+    else:
+        # Пустые строки (в том числе в конце файла) вагонами не считаются
+        path.write_text('\n'.join(wagons[:25]) + '\n\n' + '\n'.join(wagons[25:]) + '\n\n', encoding='utf-8')
+
+    hill = SortingHill(number_of_paths=2)
+    hill.register_handler(_RecordingHandler)
+    hill.load_manifest(path, chunk_size=8)
+    assert len(hill.wagon_buffer._items) == 0, 'Убедитесь, что манифест не читается при открытии.'
+    assert hill.wagon_buffer.total == (len(wagons) if packed else None), (
+        'Проверьте, что длина известна по размеру упакованного манифеста, а текстовый не пересчитывается заранее.'
+    )
+    assert len(hill.wagon_buffer) == len(wagons), 'Проверьте, что пустые строки не считаются вагонами.'
+
+    hill.handle_event(EventType.WagonArrived)
+    assert len(hill.wagon_buffer._items) == 8, 'Проверьте, что манифест подгружается порциями.'
+    hill.wagon_buffer.append(f'00000099/{WagonType.Gruz}')
+    assert list(hill.wagon_buffer) == [*wagons[1:], f'00000099/{WagonType.Gruz}'], (
+        'Убедитесь, что вагоны идут в порядке манифеста, а поставленные позже - за ним.'
+    )
+    while hill.wagon_buffer:
+        hill.handle_event(EventType.WagonArrived)
+    assert hill.handlers[0].calls[-1] == ('wagon', f'00000099/{WagonType.Gruz}')
+    assert len(hill.handlers[0].calls) == len(wagons) + 1
+
+
+@pytest.mark.parametrize('packed', [False, True])
+def test_checkpoint_streams_unread_manifest(tmp_path: Path, packed: bool) -> None:
+    """save_checkpoint: непрочитанный остаток манифеста пишется из файла, очередь держит только текущую порцию."""
+    wagons = [f'{number:08d}/{wagon_type}' for number, wagon_type in zip(range(1, 51), list(WagonType) * 13)]
+    path = tmp_path / 'manifest'
+    if packed:
+        write_manifest(path, wagons)
+    else:
+        path.write_text('\n\n'.join(wagons) + '\n', encoding='utf-8')
+
+    hill = SortingHill(number_of_paths=2)
+    hill.register_handler(_RecordingHandler)
+    hill.load_manifest(path, chunk_size=8)
+    for _ in range(10):
+        hill.handle_event(EventType.WagonArrived)
+    hill.wagon_buffer.append(f'00000099/{WagonType.Gruz}')
+    hill.save_checkpoint(tmp_path / 'shift.checkpoint')
+    assert len(hill.wagon_buffer._items) == 16, 'Убедитесь, что контрольная точка не подгружает манифест в очередь.'
+
+    restored = SortingHill(number_of_paths=2)
+    restored.load_checkpoint(tmp_path / 'shift.checkpoint')
+    assert list(restored.wagon_buffer) == [*wagons[10:], f'00000099/{WagonType.Gruz}'], (
+        'Проверьте, что в контрольную точку попали текущая порция, остаток манифеста и вагоны за ним.'
+    )
+    assert list(hill.wagon_buffer) == list(restored.wagon_buffer), (
+        'Убедитесь, что после записи контрольной точки очередь продолжает читать манифест.'
+    )
+
+
+# ---------- негативные юниты ----------
+
+def test_wagon_queue_popleft_on_empty_raises() -> None:
+    """WagonQueue.popleft: пустая очередь приводит к IndexError."""
+    with pytest.raises(IndexError):
+        WagonQueue().popleft()
+
+
+def test_pack_wagon_rejects_bad_format() -> None:
+    """pack_wagon: строка без корректного типа вагона приводит к ValueError."""
+    with pytest.raises(ValueError, match='bad wagon info'):
+        pack_wagon('12345678/X')
+
+
+def test_resolve_loco_rejects_unknown_series() -> None:
+    """resolve_loco: тяга не угадывается по названию серии, неизвестная серия приводит к ValueError."""
+    with pytest.raises(ValueError, match='unknown locomotive series: ЭП'):
+        resolve_loco('ЭП-20')
+    with pytest.raises(ValueError, match='bad locomotive model'):
+        resolve_loco('ТДЛ')
+
+
+def test_handle_event_unknown_event_raises(hill: SortingHill) -> None:
+    """handle_event: неизвестное событие приводит к RuntimeError."""
+    hill.register_handler(_RecordingHandler)
+    with pytest.raises(RuntimeError, match='unknown event'):
+        hill.handle_event('сход с рельсов')
+
+
+def test_replay_rejects_foreign_file(hill: SortingHill, tmp_path: Path) -> None:
+    """replay: файл без заголовка журнала приводит к ValueError."""
+    path = tmp_path / 'wagons.txt'
+    path.write_text('00000001/Г\n')
+    with pytest.raises(ValueError, match='not a sorting hill journal'):
+        hill.replay(path)
+
+
+def test_load_checkpoint_into_busy_hill_raises(hill: SortingHill, tmp_path: Path) -> None:
+    """load_checkpoint: горка с вагонами в очереди приводит к RuntimeError."""
+    checkpoint_path = tmp_path / 'shift.checkpoint'
+    hill.save_checkpoint(checkpoint_path)
+    hill.wagon_buffer.append(f'00000001/{WagonType.Gruz}')
+    with pytest.raises(RuntimeError, match='non-empty hill'):
+        hill.load_checkpoint(checkpoint_path)
+
+
+def test_text_manifest_rejects_bad_line(tmp_path: Path) -> None:
+    """open_manifest: строка неверного формата приводит к ValueError с номером строки."""
+    path = tmp_path / 'manifest.txt'
+    path.write_text(f'00000001/{WagonType.Gruz}\nвагон\n', encoding='utf-8')
+    with pytest.raises(ValueError, match='bad manifest line 2'):
+        list(open_manifest(path))